@@ -0,0 +1,65 @@
+"""
+Button event queue shared between pin IRQs and the main loop.
+"""
+from array import array
+import time
+
+# Button ids, in the order of UI.btn_*_handler
+BTN_A = 0
+BTN_B = 1
+BTN_X = 2
+BTN_Y = 3
+BUTTON_COUNT = 4
+
+EVENT_QUEUE_SIZE = 16
+
+
+class UIEventQueue:
+    """Preallocated ring buffer of timestamped button events.
+
+    push() runs inside the pin IRQ: it does no allocation and debounces
+    by comparing timestamps instead of sleeping. The main loop drains the
+    queue with pop().
+    """
+
+    def __init__(self, debounce_ms, size=EVENT_QUEUE_SIZE):
+        self.debounce_ms = debounce_ms
+        self.size = size
+        self.buttons = bytearray(size)
+        self.times = array('L', [0] * size)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        # Last accepted press per button, for debouncing
+        self.last_press = array('L', [0] * BUTTON_COUNT)
+        self.pressed = bytearray(BUTTON_COUNT)
+        # Flag with an IRQ-safe set(), wakes the main loop on a press
+        self.wake = None
+
+    def push(self, button, t):
+        """Queue a press at ticks_ms t. Returns False when it was dropped."""
+        if self.pressed[button] and time.ticks_diff(t, self.last_press[button]) < self.debounce_ms:
+            return False
+        self.pressed[button] = 1
+        self.last_press[button] = t
+        head = (self.head + 1) % self.size
+        if head == self.tail:
+            self.dropped += 1
+            return False
+        self.buttons[self.head] = button
+        self.times[self.head] = t
+        self.head = head
+        if self.wake:
+            self.wake.set()
+        return True
+
+    def pop(self):
+        """Oldest event as (button, ticks_ms), or None when empty."""
+        if self.tail == self.head:
+            return None
+        tail = self.tail
+        self.tail = (tail + 1) % self.size
+        return self.buttons[tail], self.times[tail]
+
+    def __len__(self):
+        return (self.head - self.tail) % self.size
@@ -0,0 +1,118 @@
+"""Headless host backend for running the UI under CPython.
+
+Call install() before importing ui: it registers stand-ins for the
+MicroPython-only modules (picographics, machine, network, deflate) and
+patches the MicroPython extensions of time, os and gc that CPython lacks.
+
+    import host
+    host.install()
+    import ui
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+
+class Clock:
+    """Millisecond clock behind time.ticks_ms().
+
+    Follows the host clock until set_manual() is called; from then on it
+    only moves with advance(), which makes timing-dependent code
+    deterministic.
+    """
+
+    def __init__(self):
+        self.manual = False
+        self.now = 0
+        self._origin = time.perf_counter()
+
+    def set_manual(self, start=0):
+        self.manual = True
+        self.now = start
+
+    def advance(self, ms):
+        self.now += ms
+
+    def ticks_us(self):
+        if self.manual:
+            return self.now * 1000
+        return int((time.perf_counter() - self._origin) * 1000000)
+
+    def ticks_ms(self):
+        return self.ticks_us() // 1000
+
+
+clock = Clock()
+
+# ticks_ms() and ticks_us() wrap at this period, as on MicroPython ports
+TICKS_PERIOD = 1 << 30
+_TICKS_MASK = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+def _ticks_diff(a, b):
+    return ((a - b + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+
+
+def _ticks_add(a, b):
+    return (a + b) & _TICKS_MASK
+
+_installed = False
+
+
+def _sleep_ms(ms):
+    if clock.manual:
+        clock.advance(ms)
+    else:
+        time.sleep(ms / 1000)
+
+
+def _ilistdir(path='.'):
+    for entry in os.scandir(path):
+        kind = 0x4000 if entry.is_dir() else 0x8000
+        yield (entry.name, kind, 0, entry.stat().st_size if kind == 0x8000 else 0)
+
+
+# Nominal heap of a Pico W running this UI
+HEAP_SIZE = 192 * 1024
+
+
+def _mem_alloc():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def _mem_free():
+    return HEAP_SIZE - _mem_alloc()
+
+
+def install():
+    """Register the host stand-ins. Safe to call more than once."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from host import picographics, machine, network, deflate, config
+    sys.modules.setdefault('picographics', picographics)
+    sys.modules.setdefault('machine', machine)
+    sys.modules.setdefault('network', network)
+    sys.modules.setdefault('deflate', deflate)
+    try:
+        import config as _device_config  # noqa: F401
+    except ImportError:
+        sys.modules['config'] = config
+
+    time.ticks_ms = lambda: clock.ticks_ms() & _TICKS_MASK
+    time.ticks_us = lambda: clock.ticks_us() & _TICKS_MASK
+    time.ticks_diff = _ticks_diff
+    time.ticks_add = _ticks_add
+    time.sleep_ms = _sleep_ms
+    if not hasattr(os, 'ilistdir'):
+        os.ilistdir = _ilistdir
+    if not hasattr(gc, 'mem_free'):
+        gc.mem_free = _mem_free
+        gc.mem_alloc = _mem_alloc
@@ -0,0 +1,295 @@
+"""Render benchmarks on the headless backend.
+
+Drives each screen through a fixed workload and reports per-frame time,
+draw calls and pixels pushed to the panel. Run from the project root:
+
+    python -m host.bench
+    python -m host.bench --frames 200 --json bench.json
+    python -m host.bench --baseline bench.json
+    python -m host.bench --costs
+
+With --baseline each scenario gains a line with the change against a
+previous --json run, so a regression is visible in review. --costs
+builds every screen and prints the registry's construction-cost report.
+"""
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import host
+host.install()
+
+from host.vfs import FakeOS  # noqa: E402
+import ui  # noqa: E402
+from events import BTN_A, BTN_B, BTN_X, BTN_Y  # noqa: E402
+import screen.files  # noqa: E402
+import screen.home  # noqa: E402
+
+
+class Recorder:
+    """Collects per-frame cost of a scenario."""
+
+    def __init__(self, display):
+        self.display = display
+        self.times = []
+        self.calls = []
+        self.pushed = []
+
+    def frame(self, fn, *args):
+        d = self.display
+        calls = d.draw_calls
+        pushed = d.pixels_pushed
+        start = time.perf_counter()
+        fn(*args)
+        self.times.append((time.perf_counter() - start) * 1000)
+        self.calls.append(d.draw_calls - calls)
+        self.pushed.append(d.pixels_pushed - pushed)
+
+    def summary(self):
+        times = sorted(self.times)
+        n = len(times)
+        return {
+            'frames': n,
+            'mean_ms': sum(times) / n,
+            'p95_ms': times[min(n - 1, int(n * 0.95))],
+            'max_ms': times[-1],
+            'calls': sum(self.calls) / n,
+            'pushed_px': sum(self.pushed) / n,
+        }
+
+
+def press(u, button):
+    """Queue a press the way the pin IRQ does and run the next frame."""
+    # Space presses past the debounce window
+    host.clock.advance(u.events.debounce_ms + 1)
+    u.events.push(button, time.ticks_ms())
+    u.update()
+
+
+def tick(u):
+    """Run the active screen's periodic tasks and the next frame."""
+    for callback, period_ms in u.get_active_screen().tasks():
+        callback()
+    u.update()
+
+
+def new_ui():
+    host.clock.set_manual()
+    random.seed(1)
+    return ui.UI(ui.display, ui.palette, True)
+
+
+# Scenarios
+
+
+def bench_boot(frames):
+    """UI construction up to the first rendered frame."""
+    rec = Recorder(ui.display)
+    for _ in range(frames):
+        rec.frame(new_ui)
+    return rec
+
+
+def bench_home(clock_type):
+    def run(frames):
+        u = new_ui()
+        u.clock_type = clock_type
+        u.set_active_screen('HOME')
+        rec = Recorder(u.display)
+        for _ in range(frames):
+            screen.home.rtc.advance(1)
+            rec.frame(tick, u)
+        return rec
+    return run
+
+
+def bench_list_scroll(frames):
+    u = new_ui()
+    u.set_active_screen('SETTINGS')
+    rec = Recorder(u.display)
+    for _ in range(frames):
+        rec.frame(press, u, BTN_B)
+    return rec
+
+
+def bench_list_smooth(frames):
+    """Eased scrolling, one press per 8 frames 20 ms apart."""
+    u = new_ui()
+    u.smooth_scroll = True
+    u.set_active_screen('SETTINGS')
+    rec = Recorder(u.display)
+    for i in range(frames):
+        if i % 8 == 0:
+            rec.frame(press, u, BTN_B)
+        else:
+            host.clock.advance(20)
+            rec.frame(u.update)
+    return rec
+
+
+def bench_back_nav(budget):
+    """SETTINGS to CLOCK and back, with a snapshot cache of budget bytes."""
+    def run(frames):
+        u = new_ui()
+        u.snapshots.budget = budget
+        u.set_active_screen('SETTINGS')
+        rec = Recorder(u.display)
+        for i in range(frames):
+            rec.frame(u.set_active_screen, 'SETTINGS' if i % 2 else 'CLOCK')
+        return rec
+    return run
+
+
+def bench_network(frames):
+    """Re-renders of an unchanged network screen, as its old 1 s timer did."""
+    u = new_ui()
+    u.set_active_screen('NETWORK')
+    network = u.get_active_screen()
+    rec = Recorder(u.display)
+    for _ in range(frames):
+        network.request_render()
+        rec.frame(u.update)
+    return rec
+
+
+def bench_files(entries, shuffle=None):
+    """Browse folders of entries files, listed unsorted with shuffle."""
+    def run(frames):
+        fs = FakeOS.generate(folders=10, files=entries, depth=2, shuffle=shuffle)
+        real_os = screen.files.os
+        screen.files.os = fs
+        try:
+            u = new_ui()
+            u.set_active_screen('FILES')
+            files = u.get_active_screen()
+            rec = Recorder(u.display)
+            down = True
+            for i in range(frames):
+                # Scroll, and every tenth frame open a folder and come back.
+                # The root is scrolled back and forth over its ten folders
+                # so Y never lands on a file and opens the viewer. Unsorted,
+                # folders found later sort in above the highlighted entry,
+                # which may then be a file; that frame scrolls up instead.
+                if i % 10 == 9:
+                    if files.path != '/':
+                        rec.frame(press, u, BTN_X)
+                    elif files.list[files.active_item].startswith('./'):
+                        rec.frame(press, u, BTN_Y)
+                    else:
+                        rec.frame(press, u, BTN_A)
+                else:
+                    if i % 10 == 0 and files.path == '/':
+                        down = files.active_item == 0
+                    rec.frame(press, u, BTN_B if down or files.path != '/' else BTN_A)
+        finally:
+            screen.files.os = real_os
+        return rec
+    return run
+
+
+def bench_pong(frame_ms):
+    """Pong with frames arriving every frame_ms of game time."""
+    def run(frames):
+        u = new_ui()
+        u.set_active_screen('PONG')
+        rec = Recorder(u.display)
+        for _ in range(frames):
+            host.clock.advance(frame_ms)
+            rec.frame(tick, u)
+        return rec
+    return run
+
+
+SCENARIOS = [
+    ('boot', bench_boot),
+    ('home_digital', bench_home(0)),
+    ('home_analog', bench_home(1)),
+    ('list_scroll', bench_list_scroll),
+    ('list_smooth', bench_list_smooth),
+    ('network', bench_network),
+    ('back_nav', bench_back_nav(0)),
+    ('back_snap', bench_back_nav(16 * 1024)),
+    ('files_500', bench_files(500)),
+    ('files_2000', bench_files(2000)),
+    ('files_fat', bench_files(500, shuffle=1)),
+    ('pong', bench_pong(16)),
+    # A loaded loop: fewer frames, same game speed
+    ('pong_50ms', bench_pong(50)),
+]
+
+COLUMNS = ['mean_ms', 'p95_ms', 'max_ms', 'calls', 'pushed_px']
+
+
+def run(frames=100, only=None):
+    results = {}
+    for name, scenario in SCENARIOS:
+        if only and name not in only:
+            continue
+        # Screens print to the serial console, keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = scenario(frames).summary()
+    return results
+
+
+def report(results, baseline=None, out=sys.stdout):
+    out.write(f"{'scenario':<14}" + ''.join(f'{c:>12}' for c in COLUMNS) + '\n')
+    for name, row in results.items():
+        out.write(f'{name:<14}' + ''.join(f'{row[c]:>12.2f}' for c in COLUMNS) + '\n')
+        base = baseline.get(name) if baseline else None
+        if base:
+            deltas = []
+            for c in COLUMNS:
+                if base[c]:
+                    deltas.append(f'{(row[c] - base[c]) * 100 / base[c]:>+11.0f}%')
+                else:
+                    deltas.append(f"{'-':>12}")
+            out.write(f"{'  vs base':<14}" + ''.join(deltas) + '\n')
+
+
+def costs():
+    """Build every registered screen under tracemalloc and report costs."""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            u = new_ui()
+            # Construction time needs the real clock
+            host.clock.manual = False
+            for name in u.screen_order:
+                u.screens.get(name)
+        u.screens.report()
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv):
+    frames = 100
+    json_out = None
+    baseline = None
+    only = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--frames':
+            frames = int(next(args))
+        elif arg == '--json':
+            json_out = next(args)
+        elif arg == '--costs':
+            costs()
+            return
+        elif arg == '--baseline':
+            with open(next(args)) as f:
+                baseline = json.load(f)
+        else:
+            only.append(arg)
+    results = run(frames, only)
+    report(results, baseline)
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,9 @@
+"""Host defaults for the settings normally kept in the device's config.py."""
+
+WIFI_SSID = 'host'
+WIFI_PASSWORD = 'host'
+WEATHER_LAT = 55.676098
+WEATHER_LNG = 12.568337
+DISPLAY_BACKLIGHT = 1.0
+DEBOUNCE_DELAY = 0.2
+DISPLAY_PARTIAL_UPDATE = True
@@ -0,0 +1,64 @@
+"""Host stand-in for the MicroPython deflate module, backed by zlib.
+
+Only what the UI uses: DeflateIO over a stream, compressing on write and
+decompressing on read, in the RAW, ZLIB and GZIP formats.
+"""
+import zlib
+
+AUTO = 0
+RAW = 1
+ZLIB = 2
+GZIP = 3
+
+# zlib wbits per format. The device's window only bounds its memory use.
+# zlib has none below 512 bytes and is slow with small ones, so the
+# largest is always used, which also reads streams written with any.
+_WBITS = {AUTO: 32 + 15, RAW: -15, ZLIB: 15, GZIP: 16 + 15}
+
+
+class DeflateIO:
+    """Compressed stream wrapper, like deflate.DeflateIO on the device."""
+
+    def __init__(self, stream, format=AUTO, wbits=0, close=False):
+        self.stream = stream
+        self.close_stream = close
+        self.wbits = _WBITS[format]
+        self.compressor = None
+        self.data = None
+        self.pos = 0
+
+    def write(self, data):
+        if self.compressor is None:
+            # The device's compressor is greedy and fast, like level 1
+            self.compressor = zlib.compressobj(1, zlib.DEFLATED, self.wbits)
+        self.stream.write(self.compressor.compress(bytes(data)))
+        return len(data)
+
+    def readinto(self, buf):
+        if self.data is None:
+            self.data = zlib.decompress(self.stream.read(), self.wbits)
+        n = min(len(buf), len(self.data) - self.pos)
+        buf[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def read(self, size=-1):
+        if self.data is None:
+            self.data = zlib.decompress(self.stream.read(), self.wbits)
+        end = len(self.data) if size < 0 else self.pos + size
+        chunk = self.data[self.pos:end]
+        self.pos += len(chunk)
+        return chunk
+
+    def close(self):
+        if self.compressor is not None:
+            self.stream.write(self.compressor.flush())
+            self.compressor = None
+        if self.close_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,57 @@
+"""Local stand-in for the Open-Meteo HTTP API.
+
+    server = await httpd.serve()
+    service = weather.WeatherService(host='127.0.0.1', port=httpd.port(server))
+
+Serves one canned forecast to every request, optionally in small delayed
+chunks to exercise the streaming parser, or with an error status.
+"""
+import asyncio
+import json
+
+FORECAST = {
+    'latitude': 55.68,
+    'longitude': 12.56,
+    'generationtime_ms': 0.04,
+    'utc_offset_seconds': 0,
+    'timezone': 'GMT',
+    'elevation': 14.0,
+    'current_units': {
+        'time': 'iso8601',
+        'interval': 'seconds',
+        'temperature_2m': '°C',
+        'weather_code': 'wmo code',
+        'wind_speed_10m': 'km/h',
+    },
+    'current': {
+        'time': '2026-10-18T12:00',
+        'interval': 900,
+        'temperature_2m': 12.3,
+        'weather_code': 61,
+        'wind_speed_10m': 14.8,
+    },
+}
+
+
+async def serve(payload=None, status='200 OK', chunk=64, delay_ms=0, host='127.0.0.1', port=0):
+    """Start the server. Every response body is payload as JSON, written
+    chunk bytes at a time with delay_ms between the writes."""
+    body = json.dumps(FORECAST if payload is None else payload).encode()
+
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b'\r\n', b''):
+            pass
+        writer.write(f'HTTP/1.0 {status}\r\nContent-Type: application/json\r\n'
+                     f'Content-Length: {len(body)}\r\n\r\n'.encode())
+        for i in range(0, len(body), chunk):
+            writer.write(body[i:i + chunk])
+            await writer.drain()
+            if delay_ms:
+                await asyncio.sleep(delay_ms / 1000)
+        writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def port(server):
+    return server.sockets[0].getsockname()[1]
@@ -0,0 +1,101 @@
+"""Host stand-in for the MicroPython machine module.
+
+Nothing here runs on its own: pins are pressed and timers fired by the
+harness driving the UI, so runs are repeatable.
+"""
+import time
+
+
+class Pin:
+    """GPIO pin whose falling edge is simulated with press()."""
+
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    # Every constructed pin by number, so a harness can find the buttons
+    pins = {}
+
+    def __init__(self, id, mode=IN, pull=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        self.handler = None
+        self.trigger = None
+        Pin.pins[id] = self
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def irq(self, handler=None, trigger=IRQ_FALLING, hard=False):
+        self.handler = handler
+        self.trigger = trigger
+
+    def press(self):
+        """Pull the pin low and run its IRQ handler, like a button press."""
+        self._value = 0
+        if self.handler:
+            self.handler(self)
+        self._value = 1
+
+
+class Timer:
+    """Periodic or one-shot timer fired by the harness with fire()."""
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    # Running timers, in creation order
+    active = []
+
+    def __init__(self, id=-1, mode=PERIODIC, period=-1, callback=None, freq=None):
+        self.init(mode=mode, period=period, callback=callback, freq=freq)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=None):
+        self.mode = mode
+        self.period = 1000 // freq if freq else period
+        self.callback = callback
+        if self not in Timer.active:
+            Timer.active.append(self)
+
+    def deinit(self):
+        if self in Timer.active:
+            Timer.active.remove(self)
+
+    def fire(self):
+        if self.mode == Timer.ONE_SHOT:
+            self.deinit()
+        if self.callback:
+            self.callback(self)
+
+    @classmethod
+    def fire_all(cls):
+        for timer in list(cls.active):
+            timer.fire()
+
+
+class RTC:
+    """Real-time clock, starts at host local time and can be stepped."""
+
+    def __init__(self):
+        t = time.localtime()
+        # (year, month, day, weekday, hours, minutes, seconds, subseconds)
+        self._datetime = (t[0], t[1], t[2], t[6], t[3], t[4], t[5], 0)
+
+    def datetime(self, value=None):
+        if value is None:
+            return self._datetime
+        self._datetime = tuple(value)
+
+    def advance(self, seconds=1):
+        y, mo, d, wd, h, m, s, ss = self._datetime
+        total = h * 3600 + m * 60 + s + seconds
+        d += total // 86400
+        total %= 86400
+        self._datetime = (y, mo, d, wd, total // 3600, total // 60 % 60, total % 60, ss)
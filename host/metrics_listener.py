@@ -0,0 +1,81 @@
+"""Local StatsD listener for the metrics exporter (metrics.py).
+
+    python -m host.metrics_listener
+    python -m host.metrics_listener 8125
+    python -m host.metrics_listener --demo
+
+Prints every datagram received, one metric per line. --demo runs a host
+UI through a few screens and a round of Pong, exports once to a
+listener on localhost and checks the datagram parses.
+"""
+import socket
+import sys
+
+import host
+host.install()
+
+import metrics  # noqa: E402
+
+
+def parse(payload):
+    """StatsD lines as {name: (value, type)}."""
+    values = {}
+    for line in payload.decode().split('\n'):
+        name, rest = line.rsplit(':', 1)
+        value, kind = rest.split('|')
+        values[name] = (int(value), kind)
+    return values
+
+
+def listen(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('0.0.0.0', port))
+    print(f'listening on udp {port}')
+    while True:
+        payload, address = sock.recvfrom(2048)
+        print(f'--- {len(payload)} bytes from {address[0]}')
+        for name, (value, kind) in parse(payload).items():
+            print(f'{name:<40}{value:>10} {kind}')
+
+
+def demo():
+    import ui
+    from host.bench import press, tick
+    from events import BTN_B, BTN_X, BTN_Y
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(2)
+    host.clock.set_manual()
+    u = ui.UI(ui.display, ui.palette, True)
+    exporter = metrics.UIMetricsExporter(u.metrics, '127.0.0.1', sock.getsockname()[1])
+    for button in (BTN_B, BTN_B, BTN_X, BTN_Y):
+        press(u, button)
+    for _ in range(120):
+        host.clock.advance(16)
+        tick(u)
+    exporter.poll()
+    payload, _ = sock.recvfrom(2048)
+    values = parse(payload)
+    for name, (value, kind) in values.items():
+        print(f'{name:<40}{value:>10} {kind}')
+    frames = values['pico.ui.frame_us.count'][0]
+    ok = (len(payload) <= metrics.MAX_DATAGRAM and values['pico.ui.button.b'][0] == 2
+          and values['pico.ui.screen.PONG'] == (1, 'g') and frames == 124 and 'pico.pong.fps' in values)
+    # Leaving Pong zeroes its screen gauge
+    press(u, BTN_X)
+    exporter.poll()
+    after = parse(sock.recvfrom(2048)[0])
+    ok = ok and after['pico.ui.screen.PONG'] == (0, 'g') and after['pico.ui.screen.HOME'] == (1, 'g')
+    print(f'{len(payload)} bytes, {"ok" if ok else "UNEXPECTED VALUES"}')
+    return 0 if ok else 1
+
+
+def main(argv):
+    if '--demo' in argv:
+        return demo()
+    listen(int(argv[0]) if argv else metrics.METRICS_PORT)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
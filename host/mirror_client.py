@@ -0,0 +1,162 @@
+"""Viewer for the framebuffer mirror (mirror.py).
+
+    python -m host.mirror_client 192.168.1.50 --ppm screen.ppm
+    python -m host.mirror_client 192.168.1.50 8023 --frames 10 --ppm screen.ppm
+    python -m host.mirror_client --demo
+
+Connects to a unit, applies the streamed row diffs to a local copy of
+its framebuffer and writes it as a PPM image after --frames frames.
+--demo serves a host UI locally instead, drives it through a few
+screens, and checks that the copy ends up identical to the panel.
+"""
+import asyncio
+import sys
+import time
+
+import host
+host.install()
+
+import mirror  # noqa: E402
+
+# RGB of the pens in the order ui.py creates them
+PALETTE = [
+    (0, 0, 0), (255, 255, 255), (255, 0, 0), (255, 255, 0),
+    (0, 255, 0), (0, 255, 255), (0, 0, 255), (255, 0, 255),
+]
+
+
+class MirrorClient:
+    """Local copy of a mirrored framebuffer, one pen per byte."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.width = 0
+        self.height = 0
+        self.pixels = bytearray()
+        self.frames = 0
+        self.bytes_read = 0
+
+    async def _read(self, n):
+        data = await self.reader.readexactly(n)
+        self.bytes_read += n
+        return data
+
+    async def read_header(self):
+        header = await self._read(8)
+        if header[:4] != mirror.MAGIC:
+            raise ValueError('not a framebuffer mirror')
+        self.width = int.from_bytes(header[4:6], 'little')
+        self.height = int.from_bytes(header[6:8], 'little')
+        self.pixels = bytearray(self.width * self.height)
+
+    async def read_frame(self):
+        """Apply the next frame. Returns the number of rows it changed."""
+        head = await self._read(3)
+        if head[:1] != b'F':
+            raise ValueError('bad frame')
+        count = int.from_bytes(head[1:3], 'little')
+        for _ in range(count):
+            row = await self._read(4)
+            y = int.from_bytes(row[:2], 'little')
+            runs = await self._read(int.from_bytes(row[2:4], 'little'))
+            x = y * self.width
+            for i in range(0, len(runs), 2):
+                high = runs[i + 1] >> 4
+                low = runs[i + 1] & 0xf
+                for _ in range(runs[i]):
+                    self.pixels[x] = high
+                    self.pixels[x + 1] = low
+                    x += 2
+        self.frames += 1
+        return count
+
+    def save_ppm(self, path, palette=PALETTE):
+        with open(path, 'wb') as f:
+            f.write(f'P6 {self.width} {self.height} 255\n'.encode())
+            f.write(bytes(c for pen in self.pixels for c in palette[pen % len(palette)]))
+
+
+async def view(address, port, frames, ppm):
+    reader, writer = await asyncio.open_connection(address, port)
+    client = MirrorClient(reader)
+    await client.read_header()
+    for _ in range(frames):
+        rows = await client.read_frame()
+        print(f'frame {client.frames}: {rows} rows, {client.bytes_read} bytes so far')
+    writer.close()
+    if ppm:
+        client.save_ppm(ppm)
+        print(f'saved {ppm}')
+
+
+async def demo(ppm):
+    import ui
+    from events import BTN_A, BTN_B, BTN_X, BTN_Y
+    u = ui.UI(ui.display, ui.palette, True)
+    server = mirror.UIMirrorServer(u, 0, host='127.0.0.1')
+    u.mirror = server
+    await server.start()
+    port = server.server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    client = MirrorClient(reader)
+    await client.read_header()
+
+    async def follow():
+        while True:
+            await client.read_frame()
+
+    follower = asyncio.create_task(follow())
+    frame_ms = []
+    for button in (BTN_B, BTN_B, BTN_B, BTN_Y, BTN_B, BTN_X, BTN_X, BTN_A, BTN_X, BTN_Y):
+        u.events.push(button, time.ticks_ms())
+        start = time.perf_counter()
+        u.update()
+        frame_ms.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.3)
+    while any(server.dirty):
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.3)
+    follower.cancel()
+    writer.close()
+    server.stop()
+    while server.writer:
+        await asyncio.sleep(0.01)
+    same = bytes(client.pixels) == bytes(u.display.panel)
+    raw = u.width * u.height // 2
+    print(f'{server.frames} frames, {server.bytes_sent} bytes sent '
+          f'({server.bytes_sent * 100 // (raw * server.frames)}% of raw PEN_P4 frames), '
+          f'longest encode step {server.max_step_us / 1000:.2f} ms, '
+          f'UI frames {sum(frame_ms) / len(frame_ms):.2f} ms mean')
+    print('viewer matches the panel' if same else 'viewer DIFFERS from the panel')
+    if ppm:
+        client.save_ppm(ppm)
+    return 0 if same else 1
+
+
+def main(argv):
+    ppm = None
+    frames = 1
+    rest = []
+    run_demo = False
+    args = iter(argv)
+    for arg in args:
+        if arg == '--ppm':
+            ppm = next(args)
+        elif arg == '--frames':
+            frames = int(next(args))
+        elif arg == '--demo':
+            run_demo = True
+        else:
+            rest.append(arg)
+    if run_demo:
+        return asyncio.run(demo(ppm))
+    if not rest:
+        print(__doc__)
+        return 2
+    port = int(rest[1]) if len(rest) > 1 else mirror.MIRROR_PORT
+    asyncio.run(view(rest[0], port, frames, ppm))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+"""Host stand-in for the MicroPython network module.
+
+All WLAN objects share one simulated interface, like the CYW43 driver.
+Set WLAN.scenario to 'connected' or 'down' to pick what connect() does.
+"""
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+
+class WLAN:
+    """Simulated station interface."""
+
+    scenario = 'connected'
+    # Driver calls made through any instance
+    calls = 0
+
+    _state = {
+        'active': False,
+        'status': STAT_IDLE,
+        'essid': '',
+        'ifconfig': ('0.0.0.0', '0.0.0.0', '0.0.0.0', '0.0.0.0'),
+    }
+
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+
+    @classmethod
+    def reset(cls, scenario='connected'):
+        cls.scenario = scenario
+        cls.calls = 0
+        cls._state.update(active=False, status=STAT_IDLE, essid='',
+                          ifconfig=('0.0.0.0', '0.0.0.0', '0.0.0.0', '0.0.0.0'))
+
+    def active(self, value=None):
+        WLAN.calls += 1
+        if value is None:
+            return self._state['active']
+        self._state['active'] = bool(value)
+
+    def connect(self, ssid, password=None):
+        WLAN.calls += 1
+        self._state['essid'] = ssid
+        if WLAN.scenario == 'connected':
+            self._state['status'] = STAT_GOT_IP
+            self._state['ifconfig'] = ('192.168.1.50', '255.255.255.0', '192.168.1.1', '192.168.1.1')
+        else:
+            self._state['status'] = STAT_NO_AP_FOUND
+
+    def disconnect(self):
+        WLAN.calls += 1
+        self._state['status'] = STAT_IDLE
+
+    def isconnected(self):
+        WLAN.calls += 1
+        return self._state['status'] == STAT_GOT_IP
+
+    def ifconfig(self):
+        WLAN.calls += 1
+        return self._state['ifconfig']
+
+    def config(self, key):
+        WLAN.calls += 1
+        if key == 'mac':
+            return b'\x28\xcd\xc1\x00\x00\x01'
+        if key in ('essid', 'ssid'):
+            return self._state['essid']
+        raise ValueError('unknown config param')
+
+    def status(self, param=None):
+        WLAN.calls += 1
+        if param == 'rssi':
+            return -52
+        if param is not None:
+            raise ValueError('unknown status param')
+        return self._state['status']
@@ -0,0 +1,173 @@
+"""Host stand-in for the Pimoroni picographics module.
+
+Rasterizes into an in-memory framebuffer of palette indices, one byte per
+pixel, and counts draw calls and pixels pushed to the (imaginary) panel.
+Text is drawn with a deterministic placeholder glyph per character since
+the bitmap fonts live in firmware.
+"""
+
+DISPLAY_PICO_DISPLAY_2 = 'pico_display_2'
+PEN_P4 = 'p4'
+
+_BOUNDS = {
+    DISPLAY_PICO_DISPLAY_2: (320, 240),
+}
+
+# bitmap6 cell size at scale 1
+GLYPH_WIDTH = 6
+GLYPH_HEIGHT = 6
+
+
+class PicoGraphics:
+    """In-memory PicoGraphics with draw-call and push accounting."""
+
+    def __init__(self, display=DISPLAY_PICO_DISPLAY_2, pen_type=PEN_P4, rotate=0):
+        self.width, self.height = _BOUNDS[display]
+        self.pen_type = pen_type
+        self.framebuffer = bytearray(self.width * self.height)
+        # Last pushed frame, what the panel actually shows
+        self.panel = bytearray(self.width * self.height)
+        self.palette = []
+        self.pen = 0
+        self.font = 'bitmap6'
+        self.backlight = 1.0
+        self.clip = (0, 0, self.width, self.height)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.draw_calls = 0
+        self.calls = {}
+        self.pixels_drawn = 0
+        self.updates = 0
+        self.partial_updates = 0
+        self.pixels_pushed = 0
+
+    def _count(self, name):
+        self.draw_calls += 1
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    # Setup
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def set_backlight(self, brightness):
+        self.backlight = brightness
+
+    def set_font(self, font):
+        self.font = font
+
+    def create_pen(self, r, g, b):
+        if len(self.palette) >= 16:
+            raise RuntimeError('PEN_P4 palette is full')
+        self.palette.append((r, g, b))
+        return len(self.palette) - 1
+
+    def set_pen(self, pen):
+        self.pen = pen
+
+    def set_clip(self, x, y, w, h):
+        self.clip = (max(0, x), max(0, y), min(self.width, x + w), min(self.height, y + h))
+
+    def remove_clip(self):
+        self.clip = (0, 0, self.width, self.height)
+
+    # Drawing
+
+    def _span(self, x0, x1, y):
+        cx0, cy0, cx1, cy1 = self.clip
+        if y < cy0 or y >= cy1:
+            return
+        x0 = max(x0, cx0)
+        x1 = min(x1, cx1)
+        if x1 <= x0:
+            return
+        row = y * self.width
+        self.framebuffer[row + x0:row + x1] = bytes((self.pen,)) * (x1 - x0)
+        self.pixels_drawn += x1 - x0
+
+    def clear(self):
+        self._count('clear')
+        for y in range(self.height):
+            self._span(0, self.width, y)
+
+    def pixel(self, x, y):
+        self._count('pixel')
+        self._span(x, x + 1, y)
+
+    def pixel_span(self, x, y, length):
+        self._count('pixel_span')
+        self._span(x, x + length, y)
+
+    def rectangle(self, x, y, w, h):
+        self._count('rectangle')
+        for row in range(max(y, 0), min(y + h, self.height)):
+            self._span(x, x + w, row)
+
+    def circle(self, x, y, r):
+        self._count('circle')
+        r2 = r * r
+        for dy in range(-r, r + 1):
+            dx = 0
+            while (dx + 1) * (dx + 1) + dy * dy <= r2:
+                dx += 1
+            self._span(x - dx, x + dx + 1, y + dy)
+
+    def line(self, x0, y0, x1, y1, thickness=1):
+        self._count('line')
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self._span(x0, x0 + thickness, y0)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def measure_text(self, text, scale=2, spacing=1, fixed_width=False):
+        return len(text) * GLYPH_WIDTH * scale
+
+    def text(self, text, x, y, wordwrap=None, scale=2, angle=0, spacing=1, fixed_width=False):
+        self._count('text')
+        text = str(text)
+        if wordwrap is None:
+            wordwrap = self.width
+        cx = x
+        for ch in text:
+            if cx + GLYPH_WIDTH * scale > x + wordwrap:
+                break
+            # 5x6 placeholder glyph built from the character code
+            bits = (ord(ch) * 2654435761) & 0x3fffffff if ch != ' ' else 0
+            for gy in range(GLYPH_HEIGHT):
+                for gx in range(GLYPH_WIDTH - 1):
+                    if bits >> (gy * 5 + gx) & 1:
+                        for sy in range(scale):
+                            self._span(cx + gx * scale, cx + (gx + 1) * scale, y + gy * scale + sy)
+            cx += GLYPH_WIDTH * scale
+
+    # Panel
+
+    def update(self):
+        self.updates += 1
+        self.pixels_pushed += self.width * self.height
+        self.panel[:] = self.framebuffer
+
+    def partial_update(self, x, y, w, h):
+        self.partial_updates += 1
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        for row in range(y0, y1):
+            a = row * self.width + x0
+            b = row * self.width + x1
+            self.panel[a:b] = self.framebuffer[a:b]
+        self.pixels_pushed += max(0, x1 - x0) * max(0, y1 - y0)
@@ -0,0 +1,276 @@
+"""Replay input traces on the headless backend.
+
+Feeds a trace recorded with TRACE_INPUT (see inputtrace.py) through a
+fresh UI under the manual clock, and reports the latency from every
+press to the first display push after it. Run from the project root:
+
+    python -m host.replay trace.bin
+    python -m host.replay trace.bin --json latency.json
+    python -m host.replay trace.bin --baseline latency.json
+    python -m host.replay --make trace.bin BBYBXXAY
+
+Frames run when the device's scheduler would run them: on a press, when
+a screen task is due, and every frame_ms of an animated screen, which
+only sees presses at its next frame. The simulated clock stands still
+while a frame renders, so replays are deterministic. A press's latency
+is the simulated wait for the frame that handled it plus the measured
+time that frame took up to its first push; frames counts the frames
+that pushed pixels before the next press, e.g. the steps of a scroll
+animation, leaving out those only a screen task woke.
+
+The measured part is wall-clock time, so the trace is replayed once to
+warm up imports and caches and then --runs times, and every press gets
+the median of its latencies.
+
+With --baseline the run fails when a press needs a different number of
+frames, or mean or worst latency grows past --tolerance percent.
+--make writes a trace of the given buttons --gap ms apart, for trying
+the harness without a device.
+"""
+import json
+import random
+import sys
+import time
+
+import host
+host.install()
+
+import ui  # noqa: E402
+from inputtrace import UITrace  # noqa: E402
+
+BUTTON_NAMES = 'ABXY'
+# Keep running after the last press until animations have settled
+SETTLE_MS = 2000
+# Replays measured after the warm-up, the median latency is reported
+RUNS = 5
+# Latency growth in percent, and in ms, tolerated against a baseline
+TOLERANCE = 25
+TOLERANCE_MS = 1.0
+
+
+class Replay:
+    """Runs one trace through a UI and collects per-press latencies."""
+
+    def __init__(self, trace, settle_ms=SETTLE_MS):
+        self.trace = trace
+        self.settle_ms = settle_ms
+        host.clock.set_manual()
+        # Pong draws its serves from random
+        random.seed(trace.seed)
+        self.ui = ui.UI(ui.display, ui.palette, True)
+        self.display = self.ui.display
+        self.presses = []
+        # Presses queued for the next frame, and the last handled one
+        self.queued = []
+        self.last = None
+        self.frames = 0
+        self.push_at = None
+
+    def _watch(self, name):
+        push = getattr(self.display, name)
+
+        def watched(*args):
+            push(*args)
+            if self.push_at is None:
+                self.push_at = time.perf_counter()
+        setattr(self.display, name, watched)
+
+    def run(self):
+        self._watch('update')
+        self._watch('partial_update')
+        try:
+            self._run()
+        finally:
+            # Back to the class methods
+            del self.display.update
+            del self.display.partial_update
+        return self
+
+    def _run(self):
+        u = self.ui
+        clock = host.clock
+        presses = list(self.trace.presses())
+        end = (presses[-1][1] if presses else 0) + self.settle_ms
+        i = 0
+        next_frame = None
+        task_screen = None
+        deadlines = []
+        while True:
+            screen = u.get_active_screen()
+            if screen is not task_screen:
+                # The scheduler restarts the tasks of a new screen
+                task_screen = screen
+                tasks = screen.tasks()
+                deadlines = [clock.now + period for _, period in tasks]
+            frame_ms = screen.frame_ms
+            due = list(deadlines)
+            if i < len(presses):
+                due.append(presses[i][1])
+            if frame_ms:
+                due.append(next_frame if next_frame is not None else clock.now)
+            if not due:
+                break
+            now = min(due)
+            if now > end:
+                break
+            clock.now = max(clock.now, now)
+            wake = frame_ms and (next_frame is None or clock.now >= next_frame)
+            while i < len(presses) and presses[i][1] <= clock.now:
+                button, t = presses[i]
+                if u.events.push(button, t):
+                    self.queued.append({'button': BUTTON_NAMES[button], 't': t})
+                    # A waiting loop wakes, an animated one sees it next frame
+                    wake = wake or not frame_ms
+                i += 1
+            ticked = False
+            for j, (callback, period) in enumerate(tasks):
+                if deadlines[j] <= clock.now:
+                    callback()
+                    deadlines[j] += period
+                    ticked = True
+            if wake or ticked:
+                self.frame(bool(wake))
+                frame_ms = u.get_active_screen().frame_ms
+                next_frame = clock.now + frame_ms if frame_ms else None
+
+    def frame(self, counted=True):
+        """Run one frame. Pushes of frames woken only by a screen task,
+        like the clock ticking, are not counted against the last press."""
+        u = self.ui
+        queued = self.queued
+        screen = u.active_screen
+        self.push_at = None
+        start = time.perf_counter()
+        u.update()
+        self.frames += 1
+        now = host.clock.now
+        for press in queued:
+            press['screen'] = screen
+            press['wait_ms'] = now - press['t']
+            press['latency_ms'] = None
+            press['frames'] = 0
+            if self.push_at is not None:
+                press['latency_ms'] = press['wait_ms'] + (self.push_at - start) * 1000
+            self.presses.append(press)
+        if queued:
+            self.last = queued[-1]
+            queued.clear()
+        if counted and self.last is not None and self.push_at is not None:
+            self.last['frames'] += 1
+
+    def summary(self):
+        latencies = sorted(p['latency_ms'] for p in self.presses if p['latency_ms'] is not None)
+        n = len(latencies)
+        return {
+            'presses': len(self.presses),
+            'frames': self.frames,
+            'pushed': n,
+            'mean_ms': sum(latencies) / n if n else 0,
+            'p95_ms': latencies[min(n - 1, int(n * 0.95))] if n else 0,
+            'max_ms': latencies[-1] if n else 0,
+        }
+
+    def results(self):
+        return {'seed': self.trace.seed, 'summary': self.summary(), 'presses': self.presses}
+
+
+def measure(trace, runs=RUNS):
+    """Replay trace after a warm-up run, runs times. Returns the first
+    replay with each press's latency the median over all of them."""
+    Replay(trace).run()
+    replays = [Replay(trace).run() for _ in range(runs)]
+    first = replays[0]
+    for i, press in enumerate(first.presses):
+        # Everything but the measured time is the same in every run
+        latencies = sorted(r.presses[i]['latency_ms'] for r in replays
+                           if r.presses[i]['latency_ms'] is not None)
+        if latencies:
+            press['latency_ms'] = latencies[len(latencies) // 2]
+    return first
+
+
+def report(results, out=sys.stdout):
+    out.write(f"{'#':>4} {'btn':>3} {'at_ms':>7} {'screen':<10}{'wait_ms':>9}{'latency':>9}{'frames':>7}\n")
+    for i, p in enumerate(results['presses']):
+        latency = f"{p['latency_ms']:>9.2f}" if p['latency_ms'] is not None else f"{'-':>9}"
+        out.write(f"{i:>4} {p['button']:>3} {p['t']:>7} {p['screen']:<10}{p['wait_ms']:>9}{latency}{p['frames']:>7}\n")
+    s = results['summary']
+    out.write(f"{s['presses']} presses, {s['frames']} frames, {s['pushed']} pushed: "
+              f"mean {s['mean_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, max {s['max_ms']:.2f} ms\n")
+
+
+def compare(results, baseline, tolerance=TOLERANCE, out=sys.stdout):
+    """Report regressions against a previous --json run. Returns how many."""
+    problems = []
+    if results['seed'] != baseline['seed'] or len(results['presses']) != len(baseline['presses']):
+        problems.append('baseline was recorded from a different trace')
+    else:
+        for i, (p, b) in enumerate(zip(results['presses'], baseline['presses'])):
+            if p['frames'] != b['frames'] or p['screen'] != b['screen']:
+                problems.append(f"press {i} ({p['button']} on {b['screen']}): "
+                                f"{b['frames']} -> {p['frames']} frames on {p['screen']}")
+        for key in ('mean_ms', 'max_ms'):
+            now = results['summary'][key]
+            base = baseline['summary'][key]
+            if now > base * (1 + tolerance / 100) and now - base > TOLERANCE_MS:
+                problems.append(f'{key} {base:.2f} -> {now:.2f}')
+    for problem in problems:
+        out.write(f'REGRESSION {problem}\n')
+    if not problems:
+        out.write('no regressions against the baseline\n')
+    return len(problems)
+
+
+def make(path, buttons, gap_ms, seed=1):
+    trace = UITrace(seed, 0)
+    t = 0
+    for name in buttons.upper():
+        t += gap_ms
+        trace.record(BUTTON_NAMES.index(name), t)
+    trace.save(path)
+    print(f'{trace.count} presses written to {path}')
+
+
+def main(argv):
+    json_out = None
+    baseline = None
+    tolerance = TOLERANCE
+    runs = RUNS
+    gap_ms = 250
+    paths = []
+    make_path = None
+    args = iter(argv)
+    for arg in args:
+        if arg == '--json':
+            json_out = next(args)
+        elif arg == '--baseline':
+            with open(next(args)) as f:
+                baseline = json.load(f)
+        elif arg == '--tolerance':
+            tolerance = float(next(args))
+        elif arg == '--runs':
+            runs = int(next(args))
+        elif arg == '--make':
+            make_path = next(args)
+        elif arg == '--gap':
+            gap_ms = int(next(args))
+        else:
+            paths.append(arg)
+    if make_path:
+        make(make_path, ''.join(paths), gap_ms)
+        return 0
+    if len(paths) != 1:
+        print(__doc__)
+        return 2
+    results = measure(UITrace.load(paths[0]), runs).results()
+    report(results)
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline:
+        return 1 if compare(results, baseline, tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
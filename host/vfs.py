@@ -0,0 +1,88 @@
+"""In-memory filesystem with the subset of the MicroPython os API the UI uses."""
+import random
+
+S_IFDIR = 0x4000
+S_IFREG = 0x8000
+
+
+class FakeOS:
+    """Directory tree of dicts (folders) and ints (file sizes).
+
+    Patch it in place of a screen module's os to browse a fake tree:
+    screen.files.os = FakeOS(tree).
+
+    Folders are listed in the order of their dicts. With shuffle set,
+    every listing comes in an order drawn from that seed instead, like
+    the unsorted directories of a FAT SD card.
+    """
+
+    def __init__(self, tree=None, shuffle=None):
+        self.tree = tree if tree is not None else {}
+        self.shuffle = shuffle
+        self.cwd = '/'
+        self.listings = 0
+
+    @classmethod
+    def generate(cls, folders=10, files=500, depth=2, shuffle=None):
+        """Tree with the given number of folders and files per level.
+        Entries are listed in name order, as littlefs lists them; the
+        dir_ folders happen to sort before the file_ files."""
+        def level(d):
+            node = {}
+            if d:
+                for i in range(folders):
+                    node[f'dir_{i:03d}'] = level(d - 1)
+            for i in range(files):
+                node[f'file_{i:04d}.txt'] = 100 + i
+            return node
+        return cls(level(depth), shuffle)
+
+    def _resolve(self, path):
+        if not path.startswith('/'):
+            path = self.cwd.rstrip('/') + '/' + path
+        parts = []
+        for part in path.split('/'):
+            if part in ('', '.'):
+                continue
+            if part == '..':
+                if parts:
+                    parts.pop()
+            else:
+                parts.append(part)
+        node = self.tree
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                raise OSError(2, 'ENOENT')
+            node = node[part]
+        return '/' + '/'.join(parts), node
+
+    def getcwd(self):
+        return self.cwd
+
+    def chdir(self, path):
+        path, node = self._resolve(path)
+        if not isinstance(node, dict):
+            raise OSError(20, 'ENOTDIR')
+        self.cwd = path
+
+    def ilistdir(self, path='.'):
+        path, node = self._resolve(path)
+        self.listings += 1
+        names = list(node)
+        if self.shuffle is not None:
+            random.Random(f'{self.shuffle}{path}').shuffle(names)
+        for name in names:
+            child = node[name]
+            if isinstance(child, dict):
+                yield (name, S_IFDIR, 0, 0)
+            else:
+                yield (name, S_IFREG, 0, child)
+
+    def listdir(self, path='.'):
+        return [entry[0] for entry in self.ilistdir(path)]
+
+    def stat(self, path):
+        _, node = self._resolve(path)
+        if isinstance(node, dict):
+            return (S_IFDIR, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        return (S_IFREG, 0, 0, 0, 0, 0, node, 0, 0, 0)
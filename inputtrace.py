@@ -0,0 +1,74 @@
+"""
+Input traces.
+
+A trace holds the button presses of a session with their times, and the
+seed the random generator was started with, which is all the input the
+UI takes apart from the network and the clock. host/replay.py feeds it
+back through a fresh UI to reproduce a session frame by frame.
+
+Recording starts with the UI, so a trace always replays from boot.
+Presses are packed as they are handled, the button in the low two bits
+of a varint with the milliseconds since the previous press above them,
+so most presses cost two bytes. The file is MAGIC, the seed as four
+bytes little-endian, then the packed presses.
+"""
+import time
+
+MAGIC = b'UIT1'
+TRACE_FILE = 'trace.bin'
+
+
+class UITrace:
+    """Button presses with their times relative to the start of the trace."""
+
+    def __init__(self, seed, start=None):
+        self.seed = seed
+        # ticks_ms the press times are relative to
+        self.start = time.ticks_ms() if start is None else start
+        self.last = self.start
+        self.data = bytearray()
+        self.count = 0
+
+    def record(self, button, t):
+        """Append a press of button at ticks_ms t."""
+        value = max(0, time.ticks_diff(t, self.last)) << 2 | button
+        self.last = t
+        data = self.data
+        while value > 0x7f:
+            data.append(value & 0x7f | 0x80)
+            value >>= 7
+        data.append(value)
+        self.count += 1
+
+    def presses(self):
+        """Yield (button, ms since the start of the trace) in order."""
+        t = 0
+        value = 0
+        shift = 0
+        for byte in self.data:
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if byte & 0x80:
+                continue
+            t += value >> 2
+            yield value & 3, t
+            value = 0
+            shift = 0
+
+    def save(self, path=TRACE_FILE):
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(self.seed.to_bytes(4, 'little'))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path=TRACE_FILE):
+        with open(path, 'rb') as f:
+            header = f.read(8)
+            if header[:4] != MAGIC:
+                raise ValueError(f'{path} is not an input trace')
+            trace = cls(int.from_bytes(header[4:], 'little'), 0)
+            trace.data = bytearray(f.read())
+        for _ in trace.presses():
+            trace.count += 1
+        return trace
@@ -0,0 +1,138 @@
+"""
+Streaming JSON field extraction.
+
+The document is fed in chunks as they arrive from a socket and only the
+scalar values at the requested paths are kept, so a response is never
+held in memory and no object tree is built. A path is a tuple of object
+keys and array indexes, e.g. ('daily', 'temperature_2m_max', 0).
+"""
+
+_OBJECT = 0
+_ARRAY = 1
+
+_NONE = 0
+_STRING = 1
+_ESCAPE = 2
+_SCALAR = 3
+
+_ESCAPES = {ord('n'): 10, ord('t'): 9, ord('r'): 13, ord('b'): 8, ord('f'): 12}
+
+
+class JSONFieldReader:
+    """Incremental JSON tokenizer that collects the values at paths."""
+
+    def __init__(self, paths):
+        self.paths = [tuple(p.encode() if isinstance(p, str) else p for p in path) for path in paths]
+        self.names = [tuple(path) for path in paths]
+        # Key names worth remembering at each depth, others are dropped
+        self.wanted = {}
+        for path in self.paths:
+            for depth, key in enumerate(path):
+                if not isinstance(key, int):
+                    self.wanted.setdefault(depth, []).append(key)
+        self.values = {}
+        # Containers being parsed and the key or index inside each
+        self.kinds = []
+        self.keys = []
+        self.expect_key = False
+        self.mode = _NONE
+        self.token = bytearray()
+
+    def feed(self, data):
+        """Parse the next chunk of the document."""
+        token = self.token
+        for c in data:
+            mode = self.mode
+            if mode == _STRING:
+                if c == 34:  # "
+                    self.mode = _NONE
+                    self._string()
+                elif c == 92:  # backslash
+                    self.mode = _ESCAPE
+                else:
+                    token.append(c)
+                continue
+            if mode == _ESCAPE:
+                # \uXXXX is kept verbatim, only the fields we read matter
+                token.append(_ESCAPES.get(c, c))
+                self.mode = _STRING
+                continue
+            if mode == _SCALAR:
+                if c not in b',}] \t\r\n':
+                    token.append(c)
+                    continue
+                self.mode = _NONE
+                i = self._match()
+                if i >= 0:
+                    self.values[self.names[i]] = self._scalar()
+            if c == 34:
+                self.mode = _STRING
+                token[:] = b''
+            elif c == 123:  # {
+                self.kinds.append(_OBJECT)
+                self.keys.append(None)
+                self.expect_key = True
+            elif c == 91:  # [
+                self.kinds.append(_ARRAY)
+                self.keys.append(0)
+                self.expect_key = False
+            elif c == 125 or c == 93:  # } ]
+                self.kinds.pop()
+                self.keys.pop()
+                self.expect_key = False
+            elif c == 44:  # ,
+                if self.kinds and self.kinds[-1] == _ARRAY:
+                    self.keys[-1] += 1
+                else:
+                    self.expect_key = True
+            elif c == 58:  # :
+                self.expect_key = False
+            elif c not in b' \t\r\n':
+                self.mode = _SCALAR
+                token[:] = b''
+                token.append(c)
+
+    def _string(self):
+        if self.expect_key:
+            depth = len(self.kinds) - 1
+            key = None
+            for name in self.wanted.get(depth, ()):
+                if self.token == name:
+                    key = name
+                    break
+            self.keys[-1] = key
+            return
+        i = self._match()
+        if i >= 0:
+            self.values[self.names[i]] = str(self.token, 'utf-8')
+
+    def _scalar(self):
+        token = self.token
+        if token == b'true':
+            return True
+        if token == b'false':
+            return False
+        if token == b'null':
+            return None
+        text = str(token, 'ascii')
+        if b'.' in token or b'e' in token or b'E' in token:
+            return float(text)
+        return int(text)
+
+    def _match(self):
+        """Index of the path the value just read sits at, or -1. Values
+        are only decoded from the token when they are wanted."""
+        keys = self.keys
+        depth = len(keys)
+        for i, path in enumerate(self.paths):
+            if len(path) != depth:
+                continue
+            for j in range(depth):
+                if keys[j] != path[j]:
+                    break
+            else:
+                return i
+        return -1
+
+    def get(self, path, default=None):
+        return self.values.get(path, default)
@@ -1 +1,73 @@
-print('lib munbers')
\ No newline at end of file
+"""
+Big digit glyphs for clocks and counters.
+
+Each glyph is a 5x7 bitmap, run-length encoded per row and merged into
+rectangles at import time, so drawing a digit at any scale is a handful
+of display.rectangle() calls instead of rasterizing font text.
+"""
+
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 7
+# Columns of the narrow separator glyph
+COLON_WIDTH = 1
+
+_BITMAPS = {
+    '0': ('01110', '10001', '10011', '10101', '11001', '10001', '01110'),
+    '1': ('00100', '01100', '00100', '00100', '00100', '00100', '01110'),
+    '2': ('01110', '10001', '00001', '00010', '00100', '01000', '11111'),
+    '3': ('11111', '00010', '00100', '00010', '00001', '10001', '01110'),
+    '4': ('00010', '00110', '01010', '10010', '11111', '00010', '00010'),
+    '5': ('11111', '10000', '11110', '00001', '00001', '10001', '01110'),
+    '6': ('00110', '01000', '10000', '11110', '10001', '10001', '01110'),
+    '7': ('11111', '00001', '00010', '00100', '01000', '01000', '01000'),
+    '8': ('01110', '10001', '10001', '01110', '10001', '10001', '01110'),
+    '9': ('01110', '10001', '10001', '01111', '00001', '00010', '01100'),
+    ':': ('0', '0', '1', '0', '1', '0', '0'),
+}
+
+
+def _encode(rows):
+    """Row runs merged vertically into (x, y, w, h) rectangles."""
+    rects = []
+    # Runs still open from the row above, (x, w) -> index in rects
+    open_runs = {}
+    for y, row in enumerate(rows):
+        runs = {}
+        x = 0
+        while x < len(row):
+            if row[x] == '1':
+                start = x
+                while x < len(row) and row[x] == '1':
+                    x += 1
+                key = (start, x - start)
+                if key in open_runs:
+                    i = open_runs[key]
+                    rx, ry, rw, rh = rects[i]
+                    rects[i] = (rx, ry, rw, rh + 1)
+                    runs[key] = i
+                else:
+                    runs[key] = len(rects)
+                    rects.append((start, y, x - start, 1))
+            else:
+                x += 1
+        open_runs = runs
+    return tuple(rects)
+
+
+GLYPHS = {ch: _encode(rows) for ch, rows in _BITMAPS.items()}
+
+_scaled = {}
+
+
+def glyph_rects(ch, scale):
+    """Rectangles of glyph ch at scale, cached after the first call."""
+    key = (ch, scale)
+    rects = _scaled.get(key)
+    if rects is None:
+        rects = tuple((x * scale, y * scale, w * scale, h * scale) for x, y, w, h in GLYPHS[ch])
+        _scaled[key] = rects
+    return rects
+
+
+def glyph_width(ch):
+    return COLON_WIDTH if ch == ':' else GLYPH_WIDTH
@@ -2,17 +2,45 @@
 Main entry point for Pico Screen UI application.
 Initializes WiFi connection and starts the UI.
 """
+import asyncio
 import wifi
+import netstatus
+import weather
 from ui import init_ui, init_ui_buttons
+try:
+    from config import MIRROR_PORT
+except ImportError:
+    # Off unless a port is configured
+    MIRROR_PORT = None
+try:
+    from config import METRICS_HOST
+except ImportError:
+    # Off unless a StatsD host is configured
+    METRICS_HOST = None
 
-pico_ui = init_ui()
-init_ui_buttons(pico_ui)
+# Connect to WiFi in the background, with one shared poll of the
+# driver that screens subscribe to
+wifi_manager = wifi.WiFiManager()
+wifi_manager.start()
+network_status = netstatus.NetworkStatusService(wifi_manager)
+# Shows the weather cached in flash until a fresh one is fetched
+weather_service = weather.WeatherService(wifi_manager)
 
-# Initialize WiFi connection
-wlan = wifi.connect()
+pico_ui = init_ui(wifi_manager, network_status, weather_service)
+init_ui_buttons(pico_ui)
+pico_ui.scheduler.add_task(wifi_manager.poll, wifi_manager.poll_ms)
+pico_ui.scheduler.add_task(network_status.poll, network_status.poll_ms)
+pico_ui.scheduler.add_task(weather_service.poll, weather.POLL_MS)
+if MIRROR_PORT:
+    # Only imported when used, it is not needed on most units
+    import mirror
+    pico_ui.mirror = mirror.UIMirrorServer(pico_ui, MIRROR_PORT, wifi_manager)
+    pico_ui.scheduler.add_task(pico_ui.mirror.poll, mirror.POLL_MS)
+if METRICS_HOST:
+    import metrics
+    exporter = metrics.UIMetricsExporter(pico_ui.metrics, METRICS_HOST, wifi=wifi_manager)
+    pico_ui.scheduler.add_task(exporter.poll, metrics.EXPORT_MS)
 
-# Main loop - continuously update active screen
-# This allows screens like Pong to animate while still
-# responding to button interrupts
-while True:
-    pico_ui.update()
\ No newline at end of file
+# Main loop - sleeps until a button press, a screen task or the
+# next frame of an animated screen like Pong is due
+asyncio.run(pico_ui.scheduler.run())
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Device health metrics.
+
+Counters, gauges and histograms live in fixed arrays indexed by the id
+handed out when they are registered, so updating one in a hot path is
+an array store and allocates nothing. Values that are cheaper to read
+than to track, like free heap, are filled in by samplers right before
+an export.
+
+UIMetricsExporter sends everything as one StatsD datagram every
+EXPORT_MS from a background task, never from a render, and starts the
+counters and histograms over. A histogram goes out as a counter per
+bucket, named by its upper bound, plus its count and sum. A state, like
+the screen shown, goes out as a gauge per value that is 1 while it
+holds.
+"""
+import socket
+from array import array
+
+METRICS_PORT = 8125
+# How often the UI loop should call the exporter's poll()
+EXPORT_MS = 10000
+# Stay below a typical MTU so the datagram is never fragmented
+MAX_DATAGRAM = 1400
+# Frame time histogram bounds in us, 16, 33, 66 and 125 ms are 60 to 8 FPS
+FRAME_US_BOUNDS = (2000, 4000, 8000, 16000, 33000, 66000, 125000)
+# Largest histogram sum the 'L' array holds, about 72 minutes in us
+SUM_MAX = 0xFFFFFFFF
+
+
+class UIMetrics:
+    """Registry and fixed storage of metric values."""
+
+    def __init__(self):
+        self.counter_names = []
+        self.counts = array('L')
+        self.gauge_names = []
+        self.gauges = array('l')
+        # Whether a gauge was set since it was registered
+        self.gauge_set = bytearray()
+        # Which of several values holds, like the active screen, and
+        # the value exported last
+        self.state_names = []
+        self.states = []
+        self.states_sent = []
+        self.histogram_names = []
+        self.bounds = []
+        self.buckets = []
+        self.sums = array('L')
+        self.samplers = []
+
+    # Registration, returns the id used to update the metric. Names
+    # registered twice share the id, so rebuilt screens find theirs.
+
+    def counter(self, name):
+        return self._register(self.counter_names, name, self.counts)
+
+    def gauge(self, name):
+        i = self._register(self.gauge_names, name, self.gauges)
+        if i == len(self.gauge_set):
+            self.gauge_set.append(0)
+        return i
+
+    def state(self, name):
+        if name in self.state_names:
+            return self.state_names.index(name)
+        self.state_names.append(name)
+        self.states.append(None)
+        self.states_sent.append(None)
+        return len(self.states) - 1
+
+    def histogram(self, name, bounds):
+        """Buckets of values up to each of the ascending bounds, and one
+        for everything above the last."""
+        if name in self.histogram_names:
+            return self.histogram_names.index(name)
+        self.histogram_names.append(name)
+        self.bounds.append(array('L', bounds))
+        self.buckets.append(array('L', [0] * (len(bounds) + 1)))
+        self.sums.append(0)
+        return len(self.sums) - 1
+
+    def _register(self, names, name, values):
+        if name in names:
+            return names.index(name)
+        names.append(name)
+        values.append(0)
+        return len(values) - 1
+
+    def sampler(self, callback):
+        """callback(metrics) sets gauges and states before each export."""
+        self.samplers.append(callback)
+
+    # Updates, allocation free
+
+    def inc(self, i, n=1):
+        self.counts[i] += n
+
+    def set(self, i, value):
+        self.gauges[i] = value
+        self.gauge_set[i] = 1
+
+    def unset(self, i):
+        """Leave a gauge out of exports until it is set again."""
+        self.gauge_set[i] = 0
+
+    def set_state(self, i, value):
+        """value, a name-safe string, holds now instead of the last one."""
+        self.states[i] = value
+
+    def observe(self, i, value):
+        if self.sums[i] > SUM_MAX - value:
+            # Not exported for an hour or more, e.g. offline. Start over
+            # so the buckets, count and sum still cover the same values
+            self.clear_histogram(i)
+        bounds = self.bounds[i]
+        b = 0
+        n = len(bounds)
+        while b < n and value > bounds[b]:
+            b += 1
+        self.buckets[i][b] += 1
+        self.sums[i] += value
+
+    def clear_histogram(self, i):
+        buckets = self.buckets[i]
+        for b in range(len(buckets)):
+            buckets[b] = 0
+        self.sums[i] = 0
+
+    # Export
+
+    def encode(self, prefix):
+        """Everything as StatsD lines in one payload, then start counting
+        afresh. Lines past MAX_DATAGRAM are left out."""
+        for callback in self.samplers:
+            callback(self)
+        lines = []
+        for i, name in enumerate(self.counter_names):
+            lines.append(f'{prefix}.{name}:{self.counts[i]}|c')
+            self.counts[i] = 0
+        for i, name in enumerate(self.gauge_names):
+            if self.gauge_set[i]:
+                lines.append(f'{prefix}.{name}:{self.gauges[i]}|g')
+        for i, name in enumerate(self.state_names):
+            value = self.states[i]
+            sent = self.states_sent[i]
+            if sent is not None and sent != value:
+                # Gauges keep their value, put the old one back to 0
+                lines.append(f'{prefix}.{name}.{sent}:0|g')
+            if value is not None:
+                lines.append(f'{prefix}.{name}.{value}:1|g')
+            self.states_sent[i] = value
+        for i, name in enumerate(self.histogram_names):
+            buckets = self.buckets[i]
+            for b, bound in enumerate(self.bounds[i]):
+                lines.append(f'{prefix}.{name}.le_{bound}:{buckets[b]}|c')
+            lines.append(f'{prefix}.{name}.le_inf:{buckets[-1]}|c')
+            lines.append(f'{prefix}.{name}.count:{sum(buckets)}|c')
+            lines.append(f'{prefix}.{name}.sum:{self.sums[i]}|c')
+            self.clear_histogram(i)
+        size = 0
+        for n, line in enumerate(lines):
+            size += len(line) + 1
+            if size > MAX_DATAGRAM:
+                print(f'Metrics: {len(lines) - n} lines over the datagram size left out')
+                lines = lines[:n]
+                break
+        return '\n'.join(lines).encode()
+
+
+class UIMetricsExporter:
+    """Sends the metrics as one UDP datagram per poll(), as StatsD lines
+    named prefix.name:
+
+        counter     pico.ui.button.a:3|c
+        gauge       pico.mem.free:81234|g
+        state       pico.ui.screen.HOME:1|g, and pico.ui.screen.PONG:0|g
+                    once PONG no longer holds
+        histogram   pico.ui.frame_us.le_2000:41|c per bound, the values
+                    up to it and above the previous one, then
+                    pico.ui.frame_us.le_inf, .count and .sum as counters
+
+    Counters and histogram buckets are per export, not running totals.
+    """
+
+    def __init__(self, metrics, host, port=METRICS_PORT, wifi=None, prefix='pico'):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.wifi = wifi
+        self.prefix = prefix
+        self.sock = None
+        self.address = None
+        self.sent = 0
+        self.failed = 0
+
+    def poll(self):
+        """Export now. Without a network the values keep accumulating,
+        except histograms, which start over before their sum overflows."""
+        if self.wifi and not self.wifi.is_connected():
+            return
+        payload = self.metrics.encode(self.prefix)
+        try:
+            if self.sock is None:
+                # Resolved once, use an IP address to avoid a DNS wait
+                self.address = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_DGRAM)[0][-1]
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.sock.setblocking(False)
+            self.sock.sendto(payload, self.address)
+            self.sent += 1
+        except OSError as e:
+            self.failed += 1
+            print(f'Metrics not sent: {e}')
@@ -0,0 +1,186 @@
+"""
+Framebuffer mirror.
+
+Streams what the panel shows to a TCP client, to see what a unit is
+showing without walking to it. UIScreen.flush() reports the regions it
+pushed and their rows are marked; a task sends the marked rows, packed
+two PEN_P4 pixels per byte and run-length encoded, so each frame is a
+diff that only holds the rows changed since the one before. Encoding
+yields to the UI loop every ROWS_PER_STEP rows and output is paced to
+MAX_BYTES_PER_S, at most MAX_FPS frames a second, so a viewer does not
+cost the UI frames.
+
+Stream, integers little-endian:
+    header  b'UIM1', width u16, height u16
+    frame   b'F', row count u16, then per row: y u16, length u16 and
+            length bytes of (run u8, packed pixels u8) pairs
+A packed byte holds the even pixel in its high nibble, as PicoGraphics
+stores them.
+"""
+import asyncio
+import time
+from snapshot import framebuffer
+
+MAGIC = b'UIM1'
+MIRROR_PORT = 8023
+# Caps that keep a viewer from slowing the UI down
+MAX_FPS = 5
+MAX_BYTES_PER_S = 32 * 1024
+ROWS_PER_STEP = 8
+# How often the UI loop should call poll()
+POLL_MS = 1000
+
+
+def encode_row(row, out):
+    """Append row as (run, byte) pairs to out."""
+    n = len(row)
+    i = 0
+    while i < n:
+        value = row[i]
+        j = i + 1
+        end = min(n, i + 255)
+        while j < end and row[j] == value:
+            j += 1
+        out.append(j - i)
+        out.append(value)
+        i = j
+
+
+class UIMirrorServer:
+    """Serves the framebuffer to one viewer at a time."""
+
+    def __init__(self, ui, port=MIRROR_PORT, wifi=None, host='0.0.0.0'):
+        self.ui = ui
+        self.port = port
+        self.wifi = wifi
+        self.host = host
+        self.width = ui.width
+        self.height = ui.height
+        self.stride = ui.width // 2
+        # Rows pushed to the panel since they were last sent
+        self.dirty = bytearray(ui.height)
+        self.changed = asyncio.Event()
+        self.server = None
+        self.starting = False
+        self.writer = None
+        # One row's packed pixels, when the framebuffer is not PEN_P4
+        self.row = bytearray(self.stride)
+        self.out = bytearray()
+        self.frames = 0
+        self.bytes_sent = 0
+        # Longest stretch spent encoding without yielding to the UI
+        self.max_step_us = 0
+
+    def poll(self):
+        """Start listening once the network is up. Never blocks."""
+        if self.server or self.starting:
+            return
+        if self.wifi and not self.wifi.is_connected():
+            return
+        self.starting = True
+        asyncio.create_task(self.start())
+
+    async def start(self):
+        try:
+            self.server = await asyncio.start_server(self._serve, self.host, self.port)
+            # The bound port, which differs from self.port when it is 0
+            print(f'Mirror listening on port {self.server.sockets[0].getsockname()[1]}')
+        except OSError as e:
+            print(f'Mirror not started: {e}')
+        finally:
+            self.starting = False
+
+    def stop(self):
+        if self.server:
+            self.server.close()
+            self.server = None
+        # Lets a waiting viewer task see the server is gone
+        self.changed.set()
+
+    def pushed(self, regions):
+        """The panel was updated in regions, as (x, y, w, h) tuples."""
+        if self.writer is None:
+            return
+        dirty = self.dirty
+        for _, y, _, h in regions:
+            for row in range(max(0, y), min(self.height, y + h)):
+                dirty[row] = 1
+        self.changed.set()
+
+    async def _serve(self, reader, writer):
+        if self.writer is not None:
+            # One viewer at a time, it already gets every frame
+            writer.close()
+            await writer.wait_closed()
+            return
+        self.writer = writer
+        for row in range(self.height):
+            self.dirty[row] = 1
+        try:
+            writer.write(MAGIC + self.width.to_bytes(2, 'little') + self.height.to_bytes(2, 'little'))
+            await writer.drain()
+            while True:
+                if not any(self.dirty):
+                    self.changed.clear()
+                    await self.changed.wait()
+                if self.server is None:
+                    break
+                start = time.ticks_ms()
+                await self._send_frame(writer)
+                delay = 1000 // MAX_FPS - time.ticks_diff(time.ticks_ms(), start)
+                if delay > 0:
+                    await asyncio.sleep(delay / 1000)
+        except OSError:
+            # Viewer went away
+            pass
+        finally:
+            self.writer = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _send_frame(self, writer):
+        dirty = self.dirty
+        rows = [y for y in range(self.height) if dirty[y]]
+        for y in rows:
+            dirty[y] = 0
+        out = self.out
+        out[:] = b'F'
+        out.extend(len(rows).to_bytes(2, 'little'))
+        step = time.ticks_us()
+        for i, y in enumerate(rows):
+            # Rows are read as they are sent. One pushed again meanwhile
+            # goes out as it is now, and again with the next frame
+            out.extend(y.to_bytes(2, 'little'))
+            at = len(out)
+            out.extend(b'\0\0')
+            encode_row(self._row(y), out)
+            out[at:at + 2] = (len(out) - at - 2).to_bytes(2, 'little')
+            if (i + 1) % ROWS_PER_STEP == 0 or i == len(rows) - 1:
+                self.max_step_us = max(self.max_step_us, time.ticks_diff(time.ticks_us(), step))
+                await self._write(writer)
+                step = time.ticks_us()
+        self.frames += 1
+
+    async def _write(self, writer):
+        out = self.out
+        writer.write(bytes(out))
+        await writer.drain()
+        self.bytes_sent += len(out)
+        # Pacing to the bandwidth cap also hands the CPU back to the UI
+        await asyncio.sleep(len(out) / MAX_BYTES_PER_S)
+        out[:] = b''
+
+    def _row(self, y):
+        fb = framebuffer(self.ui.display)
+        stride = self.stride
+        if len(fb) == stride * self.height:
+            return fb[y * stride:(y + 1) * stride]
+        # One pen per byte, as on the host
+        row = self.row
+        src = y * self.width
+        for x in range(stride):
+            row[x] = fb[src + 2 * x] << 4 | fb[src + 2 * x + 1]
+        return row
@@ -0,0 +1,92 @@
+"""
+Shared network status cache.
+
+One service polls the WLAN driver every poll_ms and keeps the result
+as an immutable snapshot. Screens read the snapshot for free and
+subscribe to be told when a field actually changed, instead of each
+querying the driver on its own timer.
+"""
+from collections import namedtuple
+import network
+from wifi import STATE_CONNECTED, STATE_CONNECTING, STATE_BACKOFF
+try:
+    from config import NETWORK_POLL_MS
+except ImportError:
+    NETWORK_POLL_MS = 2000
+
+NetworkSnapshot = namedtuple('NetworkSnapshot', (
+    'connected', 'status', 'ssid', 'ip', 'netmask', 'gateway', 'dns', 'mac', 'rssi'))
+
+DISABLED = NetworkSnapshot(False, 'WiFi Disabled', '-', '-', '-', '-', '-', '-', '-')
+
+
+class NetworkStatusService:
+    """Polls the station interface and notifies subscribers of changes."""
+
+    def __init__(self, wifi=None, poll_ms=NETWORK_POLL_MS):
+        self.wifi = wifi
+        # How often the UI loop should call poll() to read the driver
+        self.poll_ms = poll_ms
+        self.wlan = network.WLAN(network.STA_IF)
+        self.snapshot = DISABLED
+        self.subscribers = []
+        # Constant for the life of the interface, formatted once
+        self.mac = None
+        self.ssid = '-'
+        # Signal strength in dBm for metrics, None when unknown
+        self.rssi = None
+
+    def subscribe(self, callback):
+        """callback(snapshot, previous) is called after a change."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll(self):
+        """Read the driver and publish a new snapshot if anything changed."""
+        try:
+            snapshot = self._read()
+        except Exception as e:
+            snapshot = NetworkSnapshot(False, f'Error: {str(e)}', '-', '-', '-', '-', '-', '-', '-')
+        if snapshot != self.snapshot:
+            previous = self.snapshot
+            self.snapshot = snapshot
+            for callback in self.subscribers:
+                callback(snapshot, previous)
+
+    def _read(self):
+        wlan = self.wlan
+        if not wlan.active():
+            return DISABLED
+        if self.mac is None:
+            self.mac = ':'.join(f'{b:02x}' for b in wlan.config('mac'))
+        if not wlan.isconnected():
+            self.ssid = '-'
+            self.rssi = None
+            return NetworkSnapshot(False, self._connection_state(), '-', '-', '-', '-', '-', self.mac, '-')
+        if self.ssid == '-':
+            # Only changes on (re)association
+            self.ssid = wlan.config('essid')
+        ifconfig = wlan.ifconfig()
+        try:
+            self.rssi = wlan.status('rssi')
+            rssi = f'{self.rssi} dBm'
+        except:
+            self.rssi = None
+            rssi = 'N/A'
+        return NetworkSnapshot(True, 'Connected', self.ssid, ifconfig[0], ifconfig[1],
+                               ifconfig[2], ifconfig[3], self.mac, rssi)
+
+    def _connection_state(self):
+        """Progress of the background connection while not connected."""
+        wifi = self.wifi
+        if wifi is None or wifi.state == STATE_CONNECTED:
+            return 'Not Connected'
+        if wifi.state == STATE_CONNECTING:
+            return f'Connecting #{wifi.attempts}'
+        if wifi.state == STATE_BACKOFF:
+            return f'Retry in {max(0, wifi.backoff_ms - wifi.elapsed_ms()) // 1000}s'
+        return 'Not Connected'
@@ -0,0 +1,122 @@
+"""
+Frame profiler.
+
+Every frame run by UI.update() is recorded into a fixed-size ring: which
+screen was active, how long the whole frame, its rendering and its
+display pushes took, the heap change across it and the game ticks it
+dropped. Nothing is allocated while recording, so the profiler can stay
+on. The ring can be drawn as an overlay in a corner of any screen or
+dumped over serial as CSV.
+"""
+import gc
+import time
+from array import array
+
+# Frames kept in the ring
+PROFILE_FRAMES = 64
+# Overlay box in the top-right corner, three rows at font scale 1
+OVERLAY_WIDTH = 110
+OVERLAY_HEIGHT = 30
+
+
+class UIProfiler:
+    """Ring buffer of per-frame timings, filled by UI and UIScreen."""
+
+    def __init__(self, ui, size=PROFILE_FRAMES):
+        self.ui = ui
+        self.size = size
+        self.count = 0
+        self.next = 0
+        # One slot per frame
+        self.screens = bytearray(size)
+        self.ended_ms = array('L', [0] * size)
+        self.frame_us = array('L', [0] * size)
+        self.render_us = array('L', [0] * size)
+        self.flush_us = array('L', [0] * size)
+        self.mem_delta = array('l', [0] * size)
+        self.dropped = array('H', [0] * size)
+        # The frame being measured
+        self.start_us = 0
+        self.start_free = 0
+        self.frame_render_us = 0
+        self.frame_flush_us = 0
+        self.dropped_ticks = 0
+        self.overlay = False
+
+    def begin(self):
+        self.start_us = time.ticks_us()
+        self.start_free = gc.mem_free()
+
+    def add_render(self, us):
+        self.frame_render_us += us
+
+    def add_flush(self, us):
+        self.frame_flush_us += us
+
+    def end(self, name):
+        """Close the frame started by begin() while screen name was active.
+        Returns how long the frame took in us."""
+        i = self.next
+        screen = self.ui.screens.screens.get(name)
+        dropped_ticks = getattr(screen, 'dropped_ticks', 0)
+        self.screens[i] = self.ui.screen_order.index(name)
+        self.ended_ms[i] = time.ticks_ms()
+        frame_us = time.ticks_diff(time.ticks_us(), self.start_us)
+        self.frame_us[i] = frame_us
+        self.render_us[i] = self.frame_render_us
+        self.flush_us[i] = self.frame_flush_us
+        self.mem_delta[i] = gc.mem_free() - self.start_free
+        self.dropped[i] = min(0xffff, max(0, dropped_ticks - self.dropped_ticks))
+        self.dropped_ticks = dropped_ticks
+        self.frame_render_us = 0
+        self.frame_flush_us = 0
+        self.next = (i + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        return frame_us
+
+    def slots(self):
+        """Ring indexes from the oldest frame to the newest."""
+        start = (self.next - self.count) % self.size
+        return [(start + n) % self.size for n in range(self.count)]
+
+    def fps(self):
+        """Frames per second over the frames in the ring."""
+        if self.count < 2:
+            return 0
+        last = (self.next - 1) % self.size
+        first = (self.next - self.count) % self.size
+        span = time.ticks_diff(self.ended_ms[last], self.ended_ms[first])
+        return (self.count - 1) * 1000 / span if span > 0 else 0
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    def overlay_area(self):
+        """Area the overlay covers as (x, y, w, h)."""
+        return self.ui.width - OVERLAY_WIDTH, 0, OVERLAY_WIDTH, OVERLAY_HEIGHT
+
+    def draw_overlay(self, display, palette):
+        """Draw the latest stats over the top-right corner of display.
+        Returns the area drawn as (x, y, w, h), None before any frame."""
+        if not self.count:
+            return None
+        last = (self.next - 1) % self.size
+        slots = self.slots()
+        render_ms = sum(self.render_us[i] for i in slots) / len(slots) / 1000
+        flush_ms = sum(self.flush_us[i] for i in slots) / len(slots) / 1000
+        dropped = sum(self.dropped[i] for i in slots)
+        x = self.ui.width - OVERLAY_WIDTH
+        display.set_pen(palette.secondary)
+        display.rectangle(x, 0, OVERLAY_WIDTH, OVERLAY_HEIGHT)
+        display.set_pen(palette.primary)
+        display.text(f'{self.fps():.1f}fps drop {dropped}', x + 4, 2, OVERLAY_WIDTH, 1)
+        display.text(f'r {render_ms:.1f} f {flush_ms:.1f}ms', x + 4, 11, OVERLAY_WIDTH, 1)
+        display.text(f'{gc.mem_free() // 1024}k {self.mem_delta[last]:+d}', x + 4, 20, OVERLAY_WIDTH, 1)
+        return self.overlay_area()
+
+    def dump(self):
+        """Print the ring as CSV, oldest frame first."""
+        print('ms,screen,frame_us,render_us,flush_us,mem_delta,dropped')
+        for i in self.slots():
+            print(f'{self.ended_ms[i]},{self.ui.screen_order[self.screens[i]]},{self.frame_us[i]},'
+                  f'{self.render_us[i]},{self.flush_us[i]},{self.mem_delta[i]},{self.dropped[i]}')
@@ -0,0 +1,97 @@
+"""
+Lazy screen registry.
+
+Screens are registered by name with the module and class that implement
+them. Nothing is imported or constructed until a screen is first shown,
+and screens that have not been used recently can be dropped again when
+the heap runs low.
+"""
+import gc
+import sys
+import time
+
+# Evict idle screens before building a new one below this much free heap
+MIN_FREE_HEAP = 48 * 1024
+
+
+class UIScreenRegistry:
+    """Screen factories by name, built on first use and evictable."""
+
+    def __init__(self, ui, min_free=MIN_FREE_HEAP):
+        self.ui = ui
+        self.min_free = min_free
+        # name -> (module, class name, args callable or None)
+        self.factories = {}
+        self.order = []
+        self.screens = {}
+        self.pinned = set()
+        self.last_used = {}
+        # name -> (construction ms, heap bytes)
+        self.costs = {}
+
+    def register(self, name, module, class_name, args=None, pinned=False):
+        """Record how to build a screen. args returns the extra constructor
+        arguments and is only called when the screen is built."""
+        self.factories[name] = (module, class_name, args)
+        self.order.append(name)
+        if pinned:
+            self.pinned.add(name)
+
+    def __contains__(self, name):
+        return name in self.factories
+
+    def get(self, name):
+        """The screen called name, imported and built if needed."""
+        screen = self.screens.get(name)
+        if screen is None:
+            if gc.mem_free() < self.min_free:
+                self.evict_idle()
+            screen = self._build(name)
+        self.last_used[name] = time.ticks_ms()
+        return screen
+
+    def _build(self, name):
+        module, class_name, args = self.factories[name]
+        gc.collect()
+        heap = gc.mem_alloc()
+        start = time.ticks_ms()
+        cls = getattr(__import__(module, None, None, [class_name]), class_name)
+        screen = cls(name, self.ui, *(args() if args else ()))
+        self.costs[name] = (time.ticks_diff(time.ticks_ms(), start), gc.mem_alloc() - heap)
+        self.screens[name] = screen
+        return screen
+
+    def evict(self, name):
+        """Drop a built screen, and its module if no other screen uses it."""
+        if name not in self.screens or name in self.pinned or name == self.ui.active_screen:
+            return False
+        del self.screens[name]
+        self.last_used.pop(name, None)
+        self.ui.snapshots.discard(name)
+        module = self.factories[name][0]
+        if not any(self.factories[other][0] == module for other in self.screens):
+            sys.modules.pop(module, None)
+        gc.collect()
+        return True
+
+    def evict_idle(self):
+        """Evict least recently used screens until min_free is available.
+        Saved frames go first, they are only a shortcut."""
+        self.ui.snapshots.clear()
+        gc.collect()
+        now = time.ticks_ms()
+        # Longest idle first, by time since use as ticks_ms() wraps
+        idle = sorted(self.screens, key=lambda name: time.ticks_diff(now, self.last_used[name]), reverse=True)
+        for name in idle:
+            if gc.mem_free() >= self.min_free:
+                break
+            self.evict(name)
+
+    def report(self):
+        """Print construction time and heap cost of every screen built so far."""
+        print('screen        ms    bytes  loaded')
+        for name in self.order:
+            if name in self.costs:
+                ms, size = self.costs[name]
+                print(f'{name:<12}{ms:>4}{size:>9}  {"yes" if name in self.screens else "no"}')
+        print(f'free heap: {gc.mem_free()}')
@@ -0,0 +1,89 @@
+"""
+Cooperative asyncio runtime for the UI.
+
+One frame loop handles input, steps the active screen and renders. The
+active screen's periodic tasks run beside it and are cancelled when the
+screen is left, so nothing renders from a timer interrupt and the loop
+sleeps whenever no deadline or button press is due.
+"""
+import asyncio
+import time
+try:
+    from asyncio import ThreadSafeFlag
+except ImportError:
+    # CPython has no IRQs, a plain Event wakes the loop just as well
+    from asyncio import Event as ThreadSafeFlag
+
+
+class UIScheduler:
+    """Runs a UI and the periodic tasks declared by its active screen."""
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.tasks = []
+        # (callback, period_ms) that run for the whole life of the loop
+        self.background = []
+        self.running = False
+        self.wake = None
+
+    def add_task(self, callback, period_ms):
+        """Run callback every period_ms regardless of the active screen.
+        Must be called before run()."""
+        self.background.append((callback, period_ms))
+
+    def start_screen(self, screen):
+        """Spawn the screen's tasks() while the loop is running."""
+        if not self.running:
+            return
+        for callback, period_ms in screen.tasks():
+            self.tasks.append(asyncio.create_task(self._periodic(callback, period_ms, True)))
+
+    def stop_screen(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+
+    def notify(self):
+        """Wake the frame loop. Safe to call from an IRQ on MicroPython."""
+        if self.wake:
+            self.wake.set()
+
+    async def _periodic(self, callback, period_ms, notify):
+        deadline = time.ticks_add(time.ticks_ms(), period_ms)
+        while True:
+            delay = time.ticks_diff(deadline, time.ticks_ms())
+            await asyncio.sleep(max(0, delay) / 1000)
+            deadline = time.ticks_add(deadline, period_ms)
+            if notify:
+                # Screen tasks draw, count them as rendering of the next frame
+                start = time.ticks_us()
+                callback()
+                self.ui.profiler.add_render(time.ticks_diff(time.ticks_us(), start))
+                self.notify()
+            else:
+                callback()
+
+    async def run(self):
+        """Frame loop. Screens with a frame_ms are stepped at that rate,
+        all others only when input or one of their tasks wakes the loop."""
+        self.wake = ThreadSafeFlag()
+        self.ui.events.wake = self.wake
+        self.running = True
+        for callback, period_ms in self.background:
+            # Background work has nothing to render, don't wake the loop
+            asyncio.create_task(self._periodic(callback, period_ms, False))
+        self.start_screen(self.ui.get_active_screen())
+        try:
+            while True:
+                start = time.ticks_ms()
+                self.ui.update()
+                frame_ms = self.ui.get_active_screen().frame_ms
+                if frame_ms:
+                    delay = frame_ms - time.ticks_diff(time.ticks_ms(), start)
+                    await asyncio.sleep(max(0, delay) / 1000)
+                else:
+                    await self.wake.wait()
+                    self.wake.clear()
+        finally:
+            self.running = False
+            self.stop_screen()
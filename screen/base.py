@@ -1,48 +1,453 @@
+import time
+
+# Damage tracking
+
+# Height of one bitmap6 text row at scale 1, with room for descenders
+GLYPH_HEIGHT = 8
+# Above this many separate dirty rectangles they are merged into one
+MAX_DIRTY_RECTS = 8
+
+class UIDamage:
+    """Collects the screen regions touched since the last flush.
+
+    Overlapping or touching rectangles are merged as they are added, so
+    a flush pushes the union of the dirty regions rather than every draw
+    call separately. Rectangles are stored as (x0, y0, x1, y1).
+    """
+
+    def __init__(self, width, height, max_rects=MAX_DIRTY_RECTS):
+        self.width = width
+        self.height = height
+        self.max_rects = max_rects
+        self.rects = []
+        self.full = False
+
+    def reset(self):
+        self.rects.clear()
+        self.full = False
+
+    def add_full(self):
+        self.rects.clear()
+        self.full = True
+
+    def add(self, x, y, w, h):
+        if self.full:
+            return
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        rects = self.rects
+        i = 0
+        while i < len(rects):
+            r = rects[i]
+            if x0 <= r[2] and r[0] <= x1 and y0 <= r[3] and r[1] <= y1:
+                # Grow and rescan, the bigger rect may now touch others
+                x0 = min(x0, r[0])
+                y0 = min(y0, r[1])
+                x1 = max(x1, r[2])
+                y1 = max(y1, r[3])
+                rects.pop(i)
+                i = 0
+            else:
+                i += 1
+        rects.append((x0, y0, x1, y1))
+        if len(rects) > self.max_rects:
+            self._collapse()
+        if x0 == 0 and y0 == 0 and x1 == self.width and y1 == self.height:
+            self.add_full()
+
+    def _collapse(self):
+        x0, y0, x1, y1 = self.rects[0]
+        for r in self.rects:
+            x0 = min(x0, r[0])
+            y0 = min(y0, r[1])
+            x1 = max(x1, r[2])
+            y1 = max(y1, r[3])
+        self.rects.clear()
+        self.rects.append((x0, y0, x1, y1))
+
+    def is_empty(self):
+        return not self.full and not self.rects
+
+    def regions(self):
+        """Dirty regions as (x, y, w, h) tuples."""
+        if self.full:
+            return [(0, 0, self.width, self.height)]
+        return [(r[0], r[1], r[2] - r[0], r[3] - r[1]) for r in self.rects]
+
+# Display lists
+
+CMD_CLEAR = 0
+CMD_RECT = 1
+CMD_TEXT = 2
+CMD_LINE = 3
+CMD_CIRCLE = 4
+CMD_PIXEL = 5
+
+class UIDisplayList:
+    """Records a screen's drawing calls instead of rasterizing them.
+
+    Stands in for the display while the screen renders. Every command is
+    a tuple that carries its own pen, so on flush() the frame is compared
+    with the previous one as plain data: an identical frame is not drawn
+    or pushed at all, otherwise only the regions of the commands that
+    appeared or disappeared are cleared and replayed under a clip.
+
+    A frame starts with clear(). Commands drawn without one are added on
+    top of the previous frame.
+    """
+
+    def __init__(self, display, width, height, measure=None):
+        self.display = display
+        # measure(text, scale), e.g. a UITextCache.width
+        self.measure = measure or display.measure_text
+        self.width = width
+        self.height = height
+        self.damage = UIDamage(width, height)
+        self.pen = 0
+        # This frame's commands, None until something is drawn
+        self.commands = None
+        # What the framebuffer holds, None when it is unknown
+        self.previous = None
+        self.skipped = 0
+
+    def forget(self):
+        """The framebuffer was drawn by someone else, replay everything next flush."""
+        self.previous = None
+
+    # Display API used by screens
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def measure_text(self, text, scale=2, spacing=1):
+        return self.measure(text, scale)
+
+    def set_pen(self, pen):
+        self.pen = pen
+
+    def clear(self):
+        self.commands = [(CMD_CLEAR, self.pen)]
+
+    def _add(self, command):
+        if self.commands is None:
+            self.commands = list(self.previous or ())
+        self.commands.append(command)
+
+    def rectangle(self, x, y, w, h):
+        self._add((CMD_RECT, self.pen, x, y, w, h))
+
+    def text(self, text, x, y, wordwrap=-1, scale=2):
+        self._add((CMD_TEXT, self.pen, text, x, y, wordwrap if wordwrap > 0 else self.width, scale))
+
+    def line(self, x0, y0, x1, y1):
+        self._add((CMD_LINE, self.pen, x0, y0, x1, y1))
+
+    def circle(self, x, y, r):
+        self._add((CMD_CIRCLE, self.pen, x, y, r))
+
+    def pixel(self, x, y):
+        self._add((CMD_PIXEL, self.pen, x, y))
+
+    # Replay
+
+    def bounds(self, command):
+        """Screen region a command can touch, as (x, y, w, h)."""
+        op = command[0]
+        if op == CMD_CLEAR:
+            return 0, 0, self.width, self.height
+        if op == CMD_RECT:
+            return command[2:]
+        if op == CMD_TEXT:
+            _, _, text, x, y, wordwrap, scale = command
+            width = self.measure(text, scale)
+            if width <= wordwrap:
+                return x, y, width, GLYPH_HEIGHT * scale
+            # Wrapped onto an unknown number of rows
+            return x, y, wordwrap, self.height - y
+        if op == CMD_LINE:
+            _, _, x0, y0, x1, y1 = command
+            return min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1
+        if op == CMD_CIRCLE:
+            _, _, x, y, r = command
+            return x - r, y - r, 2 * r + 1, 2 * r + 1
+        return command[2], command[3], 1, 1
+
+    def draw(self, command):
+        display = self.display
+        display.set_pen(command[1])
+        op = command[0]
+        if op == CMD_CLEAR:
+            # Honours the clip, so it only clears the replayed region
+            display.clear()
+        elif op == CMD_RECT:
+            display.rectangle(*command[2:])
+        elif op == CMD_TEXT:
+            display.text(*command[2:])
+        elif op == CMD_LINE:
+            display.line(*command[2:])
+        elif op == CMD_CIRCLE:
+            display.circle(*command[2:])
+        else:
+            display.pixel(*command[2:])
+
+    def replay(self, region=None):
+        """Redraw the frame, or only the part of it inside region."""
+        display = self.display
+        if region:
+            x, y, w, h = region
+            display.set_clip(x, y, w, h)
+        for command in self.commands:
+            if region:
+                cx, cy, cw, ch = self.bounds(command)
+                if cx >= x + w or cy >= y + h or cx + cw <= x or cy + ch <= y:
+                    continue
+            self.draw(command)
+        if region:
+            display.remove_clip()
+
+    def flush(self, partial_update, overlay=None):
+        """Draw and push what changed since the previous flush. Returns
+        the damage pushed, None when nothing was.
+
+        overlay(display), if given, draws onto the display over the frame
+        without being recorded, so it does not make frames differ, and
+        returns the area it drew as (x, y, w, h) to be pushed as well.
+        """
+        commands = self.commands
+        previous = self.previous
+        damage = self.damage
+        damage.reset()
+        if commands is None or commands == previous:
+            # Nothing drawn, or exactly the frame already on the panel
+            self.commands = None
+            self.skipped += 1
+            area = overlay(self.display) if overlay else None
+            if not area:
+                return None
+            damage.add(*area)
+            self._push(damage, partial_update)
+            return damage
+        if previous is None:
+            damage.add_full()
+        else:
+            old = set(previous)
+            new = set(commands)
+            for command in previous:
+                if command not in new:
+                    damage.add(*self.bounds(command))
+            for command in commands:
+                if command not in old:
+                    damage.add(*self.bounds(command))
+            if damage.is_empty():
+                # Same commands in a different order
+                damage.add_full()
+        if damage.full:
+            self.replay()
+        else:
+            for region in damage.regions():
+                self.replay(region)
+        area = overlay(self.display) if overlay else None
+        if area:
+            damage.add(*area)
+        self._push(damage, partial_update)
+        self.previous = commands
+        self.commands = None
+        return damage
+
+    def _push(self, damage, partial_update):
+        if damage.full or not partial_update:
+            self.display.update()
+        else:
+            for x, y, w, h in damage.regions():
+                self.display.partial_update(x, y, w, h)
+
 # Base screen
 
 class UIScreen:
 
+    # Screens that set this draw through the helpers below so only the
+    # regions they touched are pushed on flush(). Other screens get a
+    # full display update every flush.
+    track_damage = False
+    # Frame period in ms while active; 0 renders only on input or tasks()
+    frame_ms = 0
+    # Screens that redraw everything from clear() on every render set
+    # this to draw into a UIDisplayList, so flush() skips identical
+    # frames and replays only the commands that changed.
+    record_frames = False
+
     def __init__(self, name, ui):
         self.name = name
         self.ui = ui
         self.display = ui.display
+        self.frame = None
+        if self.record_frames:
+            self.frame = UIDisplayList(ui.display, ui.width, ui.height, ui.text_cache.width)
+            self.display = self.frame
         self.palette = ui.palette
+        self.damage = UIDamage(ui.width, ui.height)
+        # Set by input handlers, UI.update() renders once per frame
+        self.needs_render = False
+        # Whether the last flush drew the profiler overlay
+        self.overlaid = False
+        # Corner button widgets and the layout render_labels() uses
+        self.buttons = None
+        self.label_layout = None
     
     def init(self):
         pass
     
     def deinit(self):
         pass
+
+    def snapshot_key(self):
+        """Value that changes whenever this screen would render differently,
+        or None when its last frame must not be reused."""
+        return None
+
+    def restore(self):
+        """Called instead of init() once the snapshot cache has put this
+        screen's last frame back into the framebuffer."""
+        pass
     
     def clear(self):
         self.display.set_pen(self.palette.secondary)
         self.display.clear()
+        self.damage.add_full()
     
     def update(self):
         pass
+
+    def tasks(self):
+        """Periodic work while the screen is active, as (callback, period_ms)
+        pairs. The scheduler cancels them when the screen is left."""
+        return ()
     
     def render(self, tim=None):
         pass
+
+    def redraw(self):
+        """Draw everything the screen shows, without flushing. Screens
+        tracking damage implement it for repaint()."""
+        pass
+
+    def repaint(self, x, y, w, h):
+        """Draw the screen again inside an area only, e.g. where the
+        profiler overlay was, and push the area on this flush."""
+        damage = self.damage
+        # Whatever redraw() touches outside the clip is unchanged
+        self.damage = UIDamage(self.ui.width, self.ui.height)
+        self.display.set_clip(x, y, w, h)
+        self.redraw()
+        self.display.remove_clip()
+        self.damage = damage
+        damage.add(x, y, w, h)
+
+    def request_render(self):
+        self.needs_render = True
+        self.ui.scheduler.notify()
     
-    def render_labels(self, labels: list):
-        positions = [
-            (True, True),      # A button (top-left)
-            (True, False),     # B button (bottom-left)
-            (False, True),     # X button (top-right)
-            (False, False)     # Y button (bottom-right)
+    # DRAWING
+
+    def fill_rect(self, x, y, w, h):
+        self.display.rectangle(x, y, w, h)
+        self.damage.add(x, y, w, h)
+
+    def erase_rect(self, x, y, w, h):
+        self.display.set_pen(self.palette.secondary)
+        self.fill_rect(x, y, w, h)
+
+    def draw_text(self, text, x, y, wordwrap, scale=2):
+        self.display.text(text, x, y, wordwrap, scale)
+        width = min(self.ui.text_cache.width(text, scale), wordwrap)
+        self.damage.add(x, y, width, GLYPH_HEIGHT * scale)
+
+    def draw_line(self, x0, y0, x1, y1):
+        self.display.line(x0, y0, x1, y1)
+        self.damage.add(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+
+    def draw_circle(self, x, y, r):
+        self.display.circle(x, y, r)
+        self.damage.add(x - r, y - r, 2 * r + 1, 2 * r + 1)
+
+    def flush(self):
+        """Push the frame to the panel.
+
+        Damage-tracking screens push only their dirty regions, or nothing
+        at all when nothing was drawn since the last flush.
+        """
+        damage = self.damage
+        profiler = self.ui.profiler
+        overlay = None
+        if profiler.overlay:
+            if self.frame:
+                # Drawn past the display list, whose frames would never
+                # match otherwise
+                overlay = self.draw_overlay
+            else:
+                area = profiler.draw_overlay(self.display, self.palette)
+                if area:
+                    damage.add(*area)
+        elif self.overlaid:
+            # The overlay is gone, draw what it covered
+            if self.frame:
+                self.frame.forget()
+            else:
+                self.repaint(*profiler.overlay_area())
+        self.overlaid = profiler.overlay
+        start = time.ticks_us()
+        pushed = None
+        if self.frame:
+            pushed = self.frame.flush(self.ui.partial_update, overlay)
+        elif not self.track_damage or damage.full:
+            self.display.update()
+            # Drawn without the helpers, the damage may be incomplete
+            damage.add_full()
+            pushed = damage
+        elif damage.rects:
+            if self.ui.partial_update:
+                for x, y, w, h in damage.regions():
+                    self.display.partial_update(x, y, w, h)
+            else:
+                self.display.update()
+            pushed = damage
+        profiler.add_flush(time.ticks_diff(time.ticks_us(), start))
+        if pushed and self.ui.mirror:
+            self.ui.mirror.pushed(pushed.regions())
+        damage.reset()
+
+    def corner_buttons(self):
+        """Button labels in the A, B, X and Y corners, for a screen's layout."""
+        # screen.layout imports this module
+        from screen.layout import UIButton, UIPlace, LEFT, RIGHT, TOP, BOTTOM
+        self.buttons = [UIButton() for _ in range(4)]
+        return [
+            UIPlace(self.buttons[0], LEFT, TOP),
+            UIPlace(self.buttons[1], LEFT, BOTTOM),
+            UIPlace(self.buttons[2], RIGHT, TOP),
+            UIPlace(self.buttons[3], RIGHT, BOTTOM),
         ]
-        
-        for i, (is_left, is_top) in enumerate(positions):
-            if i < len(labels) and labels[i]:
-                text = labels[i]
-                width = self.display.measure_text(text, 2)
-                x = 0 if is_left else self.ui.width - width - 12
-                y = 0 if is_top else self.ui.height - 24
-                
-                self.display.set_pen(self.palette.primary)
-                self.display.rectangle(x, y, width + 12, 24)
-                self.display.set_pen(self.palette.secondary)
-                self.display.text(text, x + 6, y + 6, self.ui.width, 2)
+
+    def set_labels(self, labels):
+        """Texts of the corner buttons, None hides one."""
+        for i, button in enumerate(self.buttons):
+            button.set_text(labels[i] if i < len(labels) else None)
+
+    def draw_overlay(self, display):
+        return self.ui.profiler.draw_overlay(display, self.palette)
+
+    def render_labels(self, labels: list):
+        """Draw button labels onto a cleared screen, for screens without
+        a layout of their own."""
+        if self.label_layout is None:
+            from screen.layout import UILayout, UIStack
+            self.label_layout = UILayout(self.ui, UIStack(self.corner_buttons()))
+        self.set_labels(labels)
+        self.label_layout.paint(self, True)
 
     def btn_a_handler(self):
         print(f'{self.name}: A')
@@ -1,41 +1,182 @@
 import os
-from screen.list import UIListScreen
+from screen.list import UIListScreen, UIListModel, SCROLL_THRESHOLD
+
+# Directory entries read per page while scrolling
+PAGE_SIZE = 16
+# Recently visited directories kept for instant back navigation
+DIR_CACHE_SIZE = 4
+
+def insort(model, lo, hi, label):
+    """Insert label into model, whose entries lo to hi are sorted.
+    Returns the position it was inserted at."""
+    if lo < hi and model.label(hi - 1) <= label:
+        # Already in order, as littlefs lists them
+        lo = hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if model.label(mid) < label:
+            lo = mid + 1
+        else:
+            hi = mid
+    model.insert(lo, label)
+    return lo
+
+class UIDirListing(UIListModel):
+    """Directory listing streamed from os.ilistdir() a page at a time.
+
+    Entries read so far are kept sorted, folders first, so the rows on
+    screen only ever need the pages up to the viewport to be read.
+    Folders are prefixed with './'. On filesystems that list a folder
+    unsorted, like FAT, a later page can sort entries in before ones
+    already shown; the readers report how many landed at or before the
+    highlighted entry so the screen can keep it highlighted.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.folders = 0
+        self.entries = os.ilistdir(path)
+        self.exhausted = False
+        # Restored when navigating back to this directory
+        self.active_item = 0
+
+    def read_page(self, active=-1):
+        """Read the next page. Returns how many entries were inserted at
+        or before the entry at position active, which moves down by as
+        many."""
+        if active >= len(self):
+            # Not read yet, nothing shown to keep in place
+            active = -1
+        shift = 0
+        for _ in range(PAGE_SIZE):
+            try:
+                item = next(self.entries)
+            except StopIteration:
+                self.exhausted = True
+                self.entries = None
+                break
+            if item[1] == 0x4000:
+                at = insort(self, 0, self.folders, './' + item[0])
+                self.folders += 1
+            else:
+                at = insort(self, self.folders, len(self), item[0])
+            if at <= active:
+                active += 1
+                shift += 1
+        return shift
+
+    def ensure(self, count, active=-1):
+        """Read pages until count entries are known or the folder ends.
+        Returns the shift of position active, as read_page()."""
+        shift = 0
+        while not self.exhausted and len(self) < count + shift:
+            shift += self.read_page(active + shift)
+        return shift
+
+    def ensure_all(self, active=-1):
+        shift = 0
+        while not self.exhausted:
+            shift += self.read_page(active + shift)
+        return shift
 
 class UIFilesScreen(UIListScreen):
-    
+
     def __init__(self, name, ui):
         super().__init__(name, ui)
-        self.list: list[str] = self.get_folder_items()
-        self.active_item = 0
+        self.path = '/'
+        # Listings by path, least recently used first
+        self.cache = {}
+        self.cache_order = []
+        # Set while a file is open in the viewer, to come back to it
+        self.resume = False
 
     def init(self):
-        os.chdir('/')
-        self.active_item = 0
+        if not self.resume:
+            # Fresh listings every time the browser is entered
+            self.cache.clear()
+            self.cache_order.clear()
+            self.open_folder('/')
+        self.resume = False
         super().init()
 
-    def get_folder_items(self) -> list[str]:
-        items = []
-        for item in os.ilistdir():
-            print(item)
-            is_folder = item[1] == 0x4000
-            prefix = './' if is_folder else ''
-            items.append(prefix + item[0])
-        items.sort(key=lambda x: (not x.startswith('./'), x))
-        return items
+    def snapshot_key(self):
+        # Entering from HOME lists the folders afresh, only the way back
+        # from the viewer shows the same listing
+        if not self.resume:
+            return None
+        key = super().snapshot_key()
+        return key and (self.path,) + key
+
+    def restore(self):
+        self.resume = False
+        super().restore()
+
+    def get_listing(self, path) -> UIDirListing:
+        listing = self.cache.get(path)
+        if listing is None:
+            listing = UIDirListing(path)
+            self.cache[path] = listing
+            if len(self.cache_order) >= DIR_CACHE_SIZE:
+                del self.cache[self.cache_order.pop(0)]
+        else:
+            self.cache_order.remove(path)
+        self.cache_order.append(path)
+        return listing
+
+    def open_folder(self, path):
+        if isinstance(self.list, UIDirListing):
+            self.list.active_item = self.active_item
+        self.path = path
+        self.list = self.get_listing(path)
+        self.active_item = self.list.active_item
+        # Keep the restored entry inside the viewport
+        self.list_offset = -max(0, self.active_item - (self.items_on_screen - 1 - SCROLL_THRESHOLD))
+        self.invalidate()
+
+    def follow(self, shift):
+        """Keep the highlighted entry on its row after shift entries
+        were sorted in before it."""
+        if shift:
+            self.active_item += shift
+            self.list_offset -= shift
+            self.scroll_px += shift * self.item_height
+
+    def render(self):
+        # Only the pages up to the bottom of the viewport are read
+        self.follow(self.list.ensure(self.active_item + self.items_on_screen + 1, self.active_item))
+        super().render()
+
+    def activate_next_item(self):
+        # Know whether a next entry exists before wrapping to the top
+        self.follow(self.list.ensure(self.active_item + 2, self.active_item))
+        super().activate_next_item()
+
+    def scroll_by(self, rows):
+        self.follow(self.list.ensure(self.active_item + rows + 1, self.active_item))
+        super().scroll_by(rows)
+
+    def activate_prev_item(self):
+        if self.active_item == 0:
+            # Wrapping to the bottom needs the whole folder
+            self.follow(self.list.ensure_all(self.active_item))
+        super().activate_prev_item()
 
     def select_item(self):
+        if not len(self.list):
+            return
         item = self.list[self.active_item]
         if item.startswith('./'):
-            os.chdir(item)
-            self.list = self.get_folder_items()
-            self.active_item = 0
-            self.render()
+            self.open_folder(self.path.rstrip('/') + '/' + item[2:])
+            self.request_render()
+        else:
+            self.resume = True
+            self.ui.screens.get('VIEWER').open(self.path.rstrip('/') + '/' + item)
+            self.ui.set_active_screen('VIEWER')
 
     def go_back(self):
-        if os.getcwd() == '/':
+        if self.path == '/':
             super().go_back()
         else:
-            os.chdir('../')
-            self.list = self.get_folder_items()
-            self.active_item = 0
-            self.render()
+            self.open_folder(self.path[:self.path.rstrip('/').rfind('/')] or '/')
+            self.request_render()
@@ -1,96 +1,248 @@
-from machine import RTC, Timer
+from array import array
+from machine import RTC
 from screen.base import UIScreen
-import network
+from screen.layout import UILayout, UIStack, UIPlace, UIBar, UIText, CENTER, BOTTOM, STRETCH
+from libs.numbers.lib_numbers import glyph_rects, glyph_width, GLYPH_HEIGHT
+from weather import weather_label
 import math
 
 rtc = RTC()
 
+# Largest digital clock glyph scale, 'HH:MM:SS' is then 273 x 49 px.
+# Smaller panels get the largest scale that fits CLOCK_MARGIN px in.
+CLOCK_SCALE = 7
+CLOCK_MARGIN = 20
+
+# Analog clock dial radius as a share of the shorter panel side, and
+# hand lengths in tenths of the radius. 100 px, 80, 70 and 50 on 320x240
+DIAL_SHARE = 5 / 12
+SECOND_HAND = 8
+MINUTE_HAND = 7
+HOUR_HAND = 5
+
+def endpoint_table(length, steps):
+    """x and y offsets of a hand of length at each of steps positions
+    clockwise from 12, so the per-second path needs no trigonometry."""
+    xs = array('h', bytearray(2 * steps))
+    ys = array('h', bytearray(2 * steps))
+    for i in range(steps):
+        rad = math.radians(i * 360 / steps - 90)
+        xs[i] = int(length * math.cos(rad))
+        ys[i] = int(length * math.sin(rad))
+    return xs, ys
+
 class UIHomeScreen(UIScreen):
+
+    track_damage = True
     
     def __init__(self, name, ui):
         super().__init__(name, ui)
         self.rtc = rtc
+        # Labels and weather are widgets, so a change repaints only them.
+        # The weather sits between the bottom labels, ellipsized to fit
+        top_left, _, top_right, _ = self.corner_buttons()
+        self.weather = UIText(fit=True)
+        bottom = UIBar(self.buttons[1], UIPlace(self.weather, CENTER, BOTTOM, dy=2), self.buttons[3])
+        self.layout = UILayout(ui, UIStack([top_left, top_right, UIPlace(bottom, STRETCH, BOTTOM)]))
+        # Whether the clock and widgets are on the panel since init()
+        self.drawn = False
+        # Digital clock: glyph rectangles per digit and the digit cells
+        self.clock_scale = self.fit_clock_scale()
+        self.digit_rects = [glyph_rects(str(d), self.clock_scale) for d in range(10)]
+        self.digit_cells, self.colon_cells = self.layout_clock_digital()
+        self.clock_digits = bytearray(6)
+        self.drawn_digits = bytearray(6)
+        # Analog clock: hand endpoints per minute/second, and per
+        # minute of the half day for the hour hand
+        self.clock_cx = ui.width // 2
+        self.clock_cy = ui.height // 2
+        self.clock_r = int(min(ui.width, ui.height) * DIAL_SHARE)
+        self.tick_table = endpoint_table(self.clock_r, 60)
+        self.second_table = endpoint_table(self.clock_r * SECOND_HAND // 10, 60)
+        self.minute_table = endpoint_table(self.clock_r * MINUTE_HAND // 10, 60)
+        self.hour_table = endpoint_table(self.clock_r * HOUR_HAND // 10, 720)
+        # Table indexes of the hands on the panel, -1 when not drawn
+        self.drawn_hands = array('h', [-1, -1, -1])
     
     def get_ip_address(self):
-        try:
-            wlan = network.WLAN(network.STA_IF)
-            if wlan.isconnected():
-                return wlan.ifconfig()[0]
-            else:
-                return 'no wifi'
-        except:
-            return 'no wifi'
+        if self.ui.network and self.ui.network.snapshot.connected:
+            return self.ui.network.snapshot.ip
+        if self.ui.wifi:
+            # Connection progress while associating
+            return self.ui.wifi.status_text()
+        return 'no wifi'
     
     def init(self):
+        if self.ui.network:
+            self.ui.network.subscribe(self.on_network_change)
+        if self.ui.weather:
+            self.ui.weather.subscribe(self.on_weather_change)
+        self.drawn = False
         self.render()
-        self.rtc_timer = Timer(mode=Timer.PERIODIC, period=1000, callback=self.render)
-    
+
     def deinit(self):
-        self.rtc_timer.deinit()
+        if self.ui.network:
+            self.ui.network.unsubscribe(self.on_network_change)
+        if self.ui.weather:
+            self.ui.weather.unsubscribe(self.on_weather_change)
+
+    def on_network_change(self, snapshot, previous):
+        if snapshot.connected != previous.connected or snapshot.ip != previous.ip:
+            self.request_render()
+
+    def on_weather_change(self, snapshot):
+        self.request_render()
+
+    def get_weather_text(self):
+        weather = self.ui.weather.snapshot if self.ui.weather else None
+        if weather is None:
+            return None
+        return f'{round(weather.temperature)}C {weather_label(weather.code)}'
+
+    def tasks(self):
+        return [(self.tick, 1000)]
+
+    def get_labels(self):
+        return ['FILES', 'SETTINGS', self.get_ip_address(), 'GAME']
+
+    def update_widgets(self):
+        self.set_labels(self.get_labels())
+        # Cached weather centered between the bottom labels
+        self.weather.set_text(self.get_weather_text())
 
     def render(self, tim=None):
+        self.update_widgets()
+        if self.drawn and (self.ui.clock_type == 0 or not self.layout.dirty()):
+            # Only widgets changed, repaint them and the clock's news.
+            # The analog dial reaches under the labels, so it is redrawn
+            # in full when one of them changes
+            self.layout.paint(self)
+            self.render_clock(full=False)
+            self.flush()
+            return
+        self.redraw()
+        self.flush()
+        self.drawn = True
+
+    def redraw(self):
         self.clear()
-        
         self.render_clock()
+        self.layout.paint(self, True)
 
-        labels = ['FILES', 'SETTINGS', self.get_ip_address(), 'GAME']
-
-        self.render_labels(labels)
-        
-        self.display.update()
+    def tick(self):
+        """Per-second update, redraws the clock and labels that changed."""
+        if self.ui.wifi and not self.ui.wifi.is_connected():
+            # Connection progress label counts down while not connected
+            self.render()
+            return
+        self.render_clock(full=False)
+        self.flush()
 
-    def render_clock(self):
+    def render_clock(self, full=True):
         if self.ui.clock_type == 0:
-            self.render_clock_digital()
+            self.render_clock_digital(full)
         else:
-            self.render_clock_analog()
+            self.render_clock_analog(full)
+
+    def fit_clock_scale(self):
+        """CLOCK_SCALE, or less when 'HH:MM:SS' would not fit the panel."""
+        scale = CLOCK_SCALE
+        while scale > 1 and self.clock_width(scale) > self.ui.width - 2 * CLOCK_MARGIN:
+            scale -= 1
+        return scale
+
+    def clock_width(self, scale):
+        # Glyphs are spaced one scale unit apart
+        return sum(glyph_width(':' if c == ':' else '0') * scale + scale for c in 'HH:MM:SS') - scale
+
+    def layout_clock_digital(self):
+        """Top-left corners of the six digit cells and two colons, centered."""
+        scale = self.clock_scale
+        gap = scale
+        layout = 'HH:MM:SS'
+        x = (self.ui.width - self.clock_width(scale)) // 2
+        y = (self.ui.height - GLYPH_HEIGHT * scale) // 2
+        digits = []
+        colons = []
+        for c in layout:
+            if c == ':':
+                colons.append((x, y))
+                x += glyph_width(':') * scale + gap
+            else:
+                digits.append((x, y))
+                x += glyph_width('0') * scale + gap
+        return digits, colons
 
-    def render_clock_digital(self):
+    def render_clock_digital(self, full=True):
+        """Draw HH:MM:SS from cached glyphs. Unless full, only the digit
+        cells that differ from what is on the panel are repainted."""
         ct = self.rtc.datetime()
-        unit = 6
-        font_scale = 8
-        ct_hours = f'{ct[4]:02d}'
-        ct_minutes = f'{ct[5]:02d}'
-        ct_seconds = f'{ct[6]:02d}'
-        self.display.set_pen(self.palette.primary)
-        self.display.text(f'{ct_hours}:{ct_minutes}:{ct_seconds}', 12, int((240 - unit * font_scale) / 2), 320, font_scale)
+        digits = self.clock_digits
+        digits[0] = ct[4] // 10
+        digits[1] = ct[4] % 10
+        digits[2] = ct[5] // 10
+        digits[3] = ct[5] % 10
+        digits[4] = ct[6] // 10
+        digits[5] = ct[6] % 10
+        if full:
+            self.display.set_pen(self.palette.primary)
+            for x, y in self.colon_cells:
+                self.draw_glyph(glyph_rects(':', self.clock_scale), x, y)
+        cell_width = glyph_width('0') * self.clock_scale
+        cell_height = GLYPH_HEIGHT * self.clock_scale
+        for i in range(6):
+            if full or digits[i] != self.drawn_digits[i]:
+                x, y = self.digit_cells[i]
+                if not full:
+                    self.erase_rect(x, y, cell_width, cell_height)
+                self.display.set_pen(self.palette.primary)
+                self.draw_glyph(self.digit_rects[digits[i]], x, y)
+                self.drawn_digits[i] = digits[i]
+
+    def draw_glyph(self, rects, x, y):
+        for gx, gy, w, h in rects:
+            self.display.rectangle(x + gx, y + gy, w, h)
 
-    def render_clock_analog(self):
+    def render_clock_analog(self, face=True):
+        """Draw the hands from the endpoint tables. With face, the static
+        dial is drawn first; otherwise it is left as it is on the panel and
+        only the old hands are erased before the new ones are drawn."""
         ct = self.rtc.datetime()
-        cx = 160
-        cy = 120
-        cr = 100
-        self.display.set_pen(self.palette.primary)
-        self.display.circle(cx, cy, cr)
+        cx = self.clock_cx
+        cy = self.clock_cy
+        cr = self.clock_r
+        hands = self.drawn_hands
+        tables = (self.second_table, self.minute_table, self.hour_table)
+        if face:
+            self.display.set_pen(self.palette.primary)
+            self.draw_circle(cx, cy, cr)
+            self.display.set_pen(self.palette.secondary)
+            self.display.circle(cx, cy, cr - 2)
+            self.display.set_pen(self.palette.primary)
+            xs, ys = self.tick_table
+            for i in range(0, 30, 5):
+                self.display.line(cx + xs[i], cy + ys[i], cx - xs[i], cy - ys[i])
+            self.display.set_pen(self.palette.secondary)
+            self.display.circle(cx, cy, cr - 10)
+            hands[0] = hands[1] = hands[2] = -1
+        second = ct[6]
+        minute = ct[5]
+        hour = (ct[4] % 12) * 60 + ct[5]
+        # Erase hands that moved by drawing them in the background pen
         self.display.set_pen(self.palette.secondary)
-        self.display.circle(cx, cy, cr - 2)
+        for i, index in enumerate((second, minute, hour)):
+            if hands[i] >= 0 and hands[i] != index:
+                xs, ys = tables[i]
+                self.draw_line(cx, cy, cx + xs[hands[i]], cy + ys[hands[i]])
+        # Redraw all hands, an erased one may have crossed the others
         self.display.set_pen(self.palette.primary)
-        for a in [0, 30, 60, 90, 120, 150]:
-            dx = int(cr * math.cos(math.radians(a - 90)))
-            dy = int(cr * math.sin(math.radians(a - 90)))
-            self.display.line(cx + dx, cy + dy, cx - dx, cy - dy)
-        self.display.set_pen(self.palette.secondary)
-        self.display.circle(cx, cy, cr - 10)
-        self.display.set_pen(self.palette.primary)
-        # seconds
-        slen = 80
-        srad = math.radians(ct[6] * 6 - 90)
-        sx = cx + int(slen * math.cos(srad))
-        sy = cy + int(slen * math.sin(srad))
-        self.display.line(cx, cy, sx, sy)
-        # minutes
-        mlen = 70
-        mrad = math.radians((ct[5] + ct[6]/60)* 6 - 90)
-        mx = cx + int(mlen * math.cos(mrad))
-        my = cy + int(mlen * math.sin(mrad))
-        self.display.line(cx, cy, mx, my)
-        # hours
-        hl = 50
-        hrad = math.radians((ct[4] + ct[5]/60) * 30 - 90)
-        hx = cx + int(hl * math.cos(hrad))
-        hy = cy + int(hl * math.sin(hrad))
-        self.display.line(cx, cy, hx, hy)
-        pass
+        for i, index in enumerate((second, minute, hour)):
+            xs, ys = tables[i]
+            if hands[i] != index:
+                self.draw_line(cx, cy, cx + xs[index], cy + ys[index])
+                hands[i] = index
+            else:
+                self.display.line(cx, cy, cx + xs[index], cy + ys[index])
 
     def btn_a_handler(self):
         self.ui.set_active_screen('FILES')
@@ -0,0 +1,345 @@
+"""
+Declarative widget layout.
+
+A screen declares its widgets once, as a tree of containers around text
+and button leaves. Positions come from measuring the leaves and from
+the panel size, not from constants, so the same screen fits any panel.
+The tree is laid out the first time it is painted and the rectangles
+are kept until the panel size changes or a leaf's measured size does.
+
+Setting a leaf's text only marks it dirty when the text differs, and
+paint() then redraws just the dirty leaves after erasing what they
+covered before. Leaves are drawn in tree order, and a clean leaf that
+overlaps a dirty one is redrawn with it, so the result is the same as
+painting everything.
+"""
+from screen.base import GLYPH_HEIGHT
+
+# Anchors for UIPlace and alignment of UIText
+LEFT = 0
+TOP = 0
+CENTER = 1
+RIGHT = 2
+BOTTOM = 2
+# UIPlace only, the child spans the whole side
+STRETCH = 3
+
+# Button label box: text inset and height at font scale 2
+BUTTON_PADDING = 6
+BUTTON_HEIGHT = 24
+
+
+class UIWidget:
+    """Node of a layout tree with the rectangle its parent gave it."""
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.w = 0
+        self.h = 0
+
+    def measure(self, ui):
+        """Preferred size as (w, h)."""
+        return 0, 0
+
+    def place(self, ui, x, y, w, h):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+
+    def leaves(self):
+        yield self
+
+
+class UISpace(UIWidget):
+    """Empty rectangle of a fixed measured size, room kept free or an
+    area a screen draws into by itself."""
+
+    def __init__(self, w=0, h=0):
+        super().__init__()
+        self.size = (w, h)
+
+    def measure(self, ui):
+        return self.size
+
+
+class UIText(UIWidget):
+    """One line of text in the primary pen. With fit, text longer than
+    the rectangle is ellipsized instead of wrapping onto the next row."""
+
+    def __init__(self, text=None, scale=2, align=LEFT, fit=False):
+        super().__init__()
+        self.text = text
+        self.scale = scale
+        self.align = align
+        self.fit = fit
+        self.layout = None
+        # Measured size, None until measured or after the text changed
+        self.size = None
+        self.dirty = True
+        # Area drawn last time as (x, y, w, h), erased before a redraw
+        self.painted = None
+
+    def set_text(self, text):
+        if text == self.text:
+            return
+        self.text = text
+        self.dirty = True
+        size = self.size
+        if size is not None and self.layout:
+            # A new width moves this leaf or its neighbours
+            if self.measure(self.layout.ui) != size:
+                self.layout.stale = True
+
+    def measure(self, ui):
+        if not self.text:
+            self.size = (0, GLYPH_HEIGHT * self.scale)
+        else:
+            self.size = (ui.text_cache.width(self.text, self.scale), GLYPH_HEIGHT * self.scale)
+        return self.size
+
+    def place(self, ui, x, y, w, h):
+        if x != self.x or y != self.y or w != self.w or h != self.h:
+            self.dirty = True
+        super().place(ui, x, y, w, h)
+
+    def draw(self, screen):
+        """Draw into the rectangle, return the area covered or None."""
+        if not self.text:
+            return None
+        cache = screen.ui.text_cache
+        text = cache.fit(self.text, self.scale, self.w) if self.fit else self.text
+        width = cache.width(text, self.scale)
+        x = self.x
+        if self.align == CENTER:
+            x += (self.w - width) // 2
+        elif self.align == RIGHT:
+            x += self.w - width
+        screen.display.set_pen(screen.palette.primary)
+        screen.draw_text(text, x, self.y, screen.ui.width - x, self.scale)
+        return x, self.y, min(width, screen.ui.width - x), GLYPH_HEIGHT * self.scale
+
+
+class UIButton(UIText):
+    """Button label, text on a box in the primary pen. Hidden without text."""
+
+    def measure(self, ui):
+        if not self.text:
+            self.size = (0, 0)
+        else:
+            self.size = (ui.text_cache.width(self.text, self.scale) + 2 * BUTTON_PADDING, BUTTON_HEIGHT)
+        return self.size
+
+    def draw(self, screen):
+        if not self.text:
+            return None
+        screen.display.set_pen(screen.palette.primary)
+        screen.fill_rect(self.x, self.y, self.w, self.h)
+        screen.display.set_pen(screen.palette.secondary)
+        screen.display.text(self.text, self.x + BUTTON_PADDING, self.y + BUTTON_PADDING, screen.ui.width, self.scale)
+        return self.x, self.y, self.w, self.h
+
+
+class UIContainer(UIWidget):
+
+    def __init__(self, children):
+        super().__init__()
+        self.children = children
+
+    def leaves(self):
+        for child in self.children:
+            yield from child.leaves()
+
+
+class UIColumn(UIContainer):
+    """Children stacked top to bottom at their measured heights."""
+
+    def __init__(self, children, gap=0):
+        super().__init__(children)
+        self.gap = gap
+
+    def measure(self, ui):
+        sizes = [child.measure(ui) for child in self.children]
+        return (max(w for w, _ in sizes), sum(h for _, h in sizes) + self.gap * (len(sizes) - 1))
+
+    def place(self, ui, x, y, w, h):
+        super().place(ui, x, y, w, h)
+        for child in self.children:
+            child_h = child.measure(ui)[1]
+            child.place(ui, x, y, w, child_h)
+            y += child_h + self.gap
+
+
+class UITable(UIContainer):
+    """Rows of cells in aligned columns. Every column is as wide as its
+    widest cell, except the last, which gets the rest of the width."""
+
+    def __init__(self, rows, column_gap=0, row_gap=0):
+        super().__init__([cell for row in rows for cell in row])
+        self.rows = rows
+        self.column_gap = column_gap
+        self.row_gap = row_gap
+
+    def _columns(self, ui):
+        widths = [0] * len(self.rows[0])
+        heights = []
+        for row in self.rows:
+            height = 0
+            for i, cell in enumerate(row):
+                w, h = cell.measure(ui)
+                widths[i] = max(widths[i], w)
+                height = max(height, h)
+            heights.append(height)
+        return widths, heights
+
+    def measure(self, ui):
+        widths, heights = self._columns(ui)
+        return (sum(widths) + self.column_gap * (len(widths) - 1),
+                sum(heights) + self.row_gap * (len(heights) - 1))
+
+    def place(self, ui, x, y, w, h):
+        super().place(ui, x, y, w, h)
+        widths, heights = self._columns(ui)
+        for row, height in zip(self.rows, heights):
+            cx = x
+            for i, cell in enumerate(row):
+                cw = widths[i] if i < len(row) - 1 else max(0, x + w - cx)
+                cell.place(ui, cx, y, cw, height)
+                cx += cw + self.column_gap
+            y += height + self.row_gap
+
+
+class UIBar(UIContainer):
+    """Left and right children at their measured widths on either end,
+    and a middle one given the space between them, gap away from an end
+    that is not empty. Every child is as high as the bar."""
+
+    def __init__(self, left, middle, right, gap=0):
+        super().__init__([left, middle, right])
+        self.gap = gap
+
+    def measure(self, ui):
+        sizes = [child.measure(ui) for child in self.children]
+        gaps = sum(self.gap for w, _ in (sizes[0], sizes[2]) if w)
+        return sum(w for w, _ in sizes) + gaps, max(h for _, h in sizes)
+
+    def place(self, ui, x, y, w, h):
+        super().place(ui, x, y, w, h)
+        left, middle, right = self.children
+        lw = left.measure(ui)[0]
+        rw = right.measure(ui)[0]
+        left.place(ui, x, y, lw, h)
+        right.place(ui, x + w - rw, y, rw, h)
+        if lw:
+            lw += self.gap
+        if rw:
+            rw += self.gap
+        middle.place(ui, x + lw, y, max(0, w - lw - rw), h)
+
+
+class UIStack(UIContainer):
+    """Children laid over each other, each given the whole rectangle."""
+
+    def measure(self, ui):
+        sizes = [child.measure(ui) for child in self.children]
+        return max(w for w, _ in sizes), max(h for _, h in sizes)
+
+    def place(self, ui, x, y, w, h):
+        super().place(ui, x, y, w, h)
+        for child in self.children:
+            child.place(ui, x, y, w, h)
+
+
+class UIPlace(UIContainer):
+    """Its child at its measured size, anchored to a side or corner of
+    the rectangle and inset by dx and dy from the anchored edges. Along
+    a STRETCH axis the child spans the rectangle past the inset."""
+
+    def __init__(self, child, h=LEFT, v=TOP, dx=0, dy=0):
+        super().__init__([child])
+        self.halign = h
+        self.valign = v
+        self.dx = dx
+        self.dy = dy
+
+    def measure(self, ui):
+        w, h = self.children[0].measure(ui)
+        return w + self.dx, h + self.dy
+
+    def place(self, ui, x, y, w, h):
+        super().place(ui, x, y, w, h)
+        child = self.children[0]
+        cw, ch = child.measure(ui)
+        if self.halign == STRETCH or cw > w - self.dx:
+            cw = w - self.dx
+        if self.valign == STRETCH or ch > h - self.dy:
+            ch = h - self.dy
+        cx = _anchor(x, w, cw, self.halign, self.dx)
+        cy = _anchor(y, h, ch, self.valign, self.dy)
+        child.place(ui, cx, cy, cw, ch)
+
+
+def _anchor(start, space, size, anchor, inset):
+    if anchor == CENTER:
+        return start + (space - size) // 2
+    if anchor == RIGHT:
+        return start + space - size - inset
+    # LEFT, TOP or STRETCH
+    return start + inset
+
+
+class UILayout:
+    """A widget tree laid out for the panel and painted leaf by leaf."""
+
+    def __init__(self, ui, root):
+        self.ui = ui
+        self.root = root
+        self.leaves = list(root.leaves())
+        for leaf in self.leaves:
+            leaf.layout = self
+        # Panel size the rectangles were computed for
+        self.size = None
+        # Set when a leaf's measured size changed
+        self.stale = True
+
+    def update(self):
+        """Lay the tree out again if the panel or a leaf's size changed."""
+        ui = self.ui
+        if self.stale or self.size != (ui.width, ui.height):
+            self.root.place(ui, 0, 0, ui.width, ui.height)
+            self.size = (ui.width, ui.height)
+            self.stale = False
+
+    def dirty(self):
+        """Whether any leaf changed since it was painted."""
+        for leaf in self.leaves:
+            if leaf.dirty:
+                return True
+        return False
+
+    def paint(self, screen, full=False):
+        """Draw the dirty leaves, or every leaf onto a just cleared screen."""
+        self.update()
+        leaves = self.leaves
+        if not full:
+            # Erase everything first, a moved leaf may land where
+            # another one was
+            for leaf in leaves:
+                if leaf.dirty:
+                    if leaf.painted:
+                        screen.erase_rect(*leaf.painted)
+                        self._touch(leaf.painted)
+                    self._touch((leaf.x, leaf.y, leaf.w, leaf.h))
+        for leaf in leaves:
+            if full or leaf.dirty:
+                leaf.painted = leaf.draw(screen)
+                leaf.dirty = False
+
+    def _touch(self, area):
+        """Mark the leaves drawn over area for a redraw."""
+        x, y, w, h = area
+        for leaf in self.leaves:
+            p = leaf.painted
+            if not leaf.dirty and p and p[0] < x + w and x < p[0] + p[2] and p[1] < y + h and y < p[1] + p[3]:
+                leaf.dirty = True
@@ -1,47 +1,222 @@
+from array import array
+import time
 from screen.base import UIScreen
+from screen.layout import UILayout, UIBar, UISpace, BUTTON_HEIGHT, BUTTON_PADDING
+from events import BTN_A, BTN_B
 
-class UIListItem:
-    """Represents an item in a list screen."""
-    
-    def __init__(self, label='empty', value=None, is_active=False, is_selected=False, on_select=None):
-        self.label = label
-        self.value = value
-        self.is_active = is_active
-        self.is_selected = is_selected
-        self.on_select = on_select
+# Rows are as high as a button label, with its text inset and scale.
+# The panel shows as many whole rows as fit its height
+ITEM_HEIGHT = BUTTON_HEIGHT
+ITEM_PADDING = BUTTON_PADDING
+ITEM_SCALE = 2
+# Scrollbar strip on the right edge, ITEM_PADDING from the rows, with
+# its thumb inset by SCROLLBAR_PADDING
+SCROLLBAR_WIDTH = 18
+SCROLLBAR_PADDING = 6
+# Rows kept between the highlight and the viewport's top or bottom edge
+SCROLL_THRESHOLD = 2
+# Smooth scrolling frame period while the viewport moves
+SCROLL_FRAME_MS = 20
+# Held A/B repeat after REPEAT_DELAY_MS, every REPEAT_MS at first and
+# speeding up to REPEAT_MIN_MS, moving up to REPEAT_MAX_ROWS rows a step
+REPEAT_DELAY_MS = 400
+REPEAT_MS = 150
+REPEAT_MIN_MS = 40
+REPEAT_MAX_ROWS = 5
+
+class UIListModel:
+    """Labels and values of a list, stored compactly.
+
+    Labels are packed UTF-8 in one bytearray with an array of end
+    offsets, so an entry costs its bytes plus a few more instead of a
+    string object per label. Values are kept only once one is given, and
+    entries inserted out of order are reached through a list of indexes.
+    A label is decoded when its row is drawn.
+    """
+
+    def __init__(self, items=()):
+        self.text = bytearray()
+        self.ends = array('L')
+        # Bumped by every change, so rows cached by position can tell
+        # they are stale
+        self.generation = 0
+        self.values = None
+        # Display position -> storage index, None while in append order
+        self.order = None
+        for item in items:
+            if isinstance(item, tuple):
+                self.append(item[0], item[1])
+            else:
+                self.append(item)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, idx):
+        return self.label(idx)
+
+    def _store(self, label, value):
+        self.generation += 1
+        index = len(self.ends)
+        self.text.extend(label.encode())
+        self.ends.append(len(self.text))
+        if value is not None and self.values is None:
+            self.values = [None] * index
+        if self.values is not None:
+            self.values.append(value)
+        return index
+
+    def append(self, label, value=None):
+        index = self._store(label, value)
+        if self.order is not None:
+            self.order.append(index)
+
+    def insert(self, idx, label, value=None):
+        if self.order is None:
+            self.order = list(range(len(self.ends)))
+        self.order.insert(idx, self._store(label, value))
+
+    def _index(self, idx):
+        if idx < 0:
+            idx += len(self.ends)
+        return self.order[idx] if self.order is not None else idx
+
+    def label(self, idx):
+        index = self._index(idx)
+        start = self.ends[index - 1] if index else 0
+        return str(self.text[start:self.ends[index]], 'utf-8')
+
+    def value(self, idx):
+        """The value given for the entry, or its label if there was none."""
+        index = self._index(idx)
+        if self.values is None or self.values[index] is None:
+            return self.label(idx)
+        return self.values[index]
+
+    def find_value(self, value):
+        """Position of the first entry with value, or -1."""
+        for idx in range(len(self.ends)):
+            if self.value(idx) == value:
+                return idx
+        return -1
 
 # List screen
 
 class UIListScreen(UIScreen):
     """Base class for scrollable list screens."""
+
+    track_damage = True
     
     def __init__(self, name, ui, on_select=None):
         super().__init__(name, ui)
-        self.list = ['-- list is empty --']
+        self.list = UIListModel(['-- list is empty --'])
         self.active_item = 0
+        # Index of the entry marked as chosen, -1 for none
+        self.selected_item = -1
         self.list_offset = 0
         self.on_select = on_select
+        # Rows are drawn left of the scrollbar strip, both laid out for
+        # the panel
+        self.rows_area = UISpace()
+        self.scrollbar_area = UISpace(SCROLLBAR_WIDTH)
+        self.layout = UILayout(ui, UIBar(UISpace(), self.rows_area, self.scrollbar_area, ITEM_PADDING))
+        self.layout.update()
+        self.item_height = ITEM_HEIGHT
+        self.items_on_screen = self.rows_area.h // ITEM_HEIGHT
+        # What is on the panel, so a highlight move repaints two rows only
+        self.rendered_active = None
+        self.rendered_offset = None
+        self.rendered_count = None
+        # Pixel row of the list at the top of the viewport, eased towards
+        # the list_offset row when smooth scrolling
+        self.scroll_px = 0
+        self.frame_ms = 0
+        # Button held for auto-repeat, with when it went down and repeats next
+        self.hold_button = None
+        self.hold_since = 0
+        self.next_repeat = 0
+        # Fitted labels of drawn rows by position, for one generation of
+        # one list and selection, so a repaint decodes no labels
+        self.row_labels = {}
+        self.row_list = None
+        self.row_generation = -1
+        self.row_selected = -1
     
     def init(self):
+        self.invalidate()
         self.render()
+
+    def invalidate(self):
+        """Force the next render to repaint every row."""
+        self.rendered_active = None
+        self.rendered_offset = None
+        self.rendered_count = None
+        self.scroll_px = -self.list_offset * self.item_height
+        self.frame_ms = 0
+        self.hold_button = None
     
     def deinit(self):
         pass
 
+    def snapshot_key(self):
+        if self.needs_render or self.scroll_px != -self.list_offset * self.item_height:
+            # Left mid-animation or with a render pending
+            return None
+        return self.active_item, self.list_offset, self.selected_item, len(self.list)
+
+    def restore(self):
+        self.invalidate()
+        self.rendered_active = self.active_item
+        self.rendered_offset = self.list_offset
+        self.rendered_count = max(len(self.list), self.items_on_screen)
+
+    def update(self):
+        """Auto-repeat held buttons and step the scroll animation."""
+        if self.hold_button is not None:
+            self.repeat_held()
+        target = -self.list_offset * self.item_height
+        if self.scroll_px != target and not self.needs_render:
+            diff = target - self.scroll_px
+            # Ease out, half the remaining distance per frame
+            step = diff // 2 if diff > 0 else -(-diff // 2)
+            self.scroll_px += step or diff
+            self.render_viewport()
+        elif self.hold_button is None and not self.needs_render:
+            self.frame_ms = 0
+
+    def repeat_held(self):
+        if not self.ui.is_held(self.hold_button):
+            self.hold_button = None
+            return
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.next_repeat) < 0:
+            return
+        held_ms = time.ticks_diff(now, self.hold_since)
+        # Faster and further the longer the button is held
+        self.next_repeat = time.ticks_add(now, max(REPEAT_MIN_MS, REPEAT_MS - held_ms // 20))
+        rows = min(REPEAT_MAX_ROWS, 1 + held_ms // 1000)
+        self.scroll_by(rows if self.hold_button == BTN_B else -rows)
+
+    def scroll_by(self, rows):
+        """Move the highlight by rows, stopping at either end of the list."""
+        self.set_active_item(max(0, min(len(self.list) - 1, self.active_item + rows)))
+
+    def hold(self, button):
+        """Start auto-repeat for a just pressed button while it stays down."""
+        now = time.ticks_ms()
+        self.hold_button = button
+        self.hold_since = now
+        self.next_repeat = time.ticks_add(now, REPEAT_DELAY_MS)
+        self.frame_ms = SCROLL_FRAME_MS
+
     def render(self):
-        list = self.get_list_for_render()
-        unit = 6
-        padding_scale = 1
-        padding = unit * padding_scale
-        font_scale = 2
-        font = unit * font_scale
-        scroll_threshold = 2
-
-        item_width = self.ui.width - 24
-        item_height = (font + 2 * padding)
+        self.layout.update()
+        scroll_threshold = SCROLL_THRESHOLD
+        rows = self.rows_area
+        item_height = self.item_height
         
-        items_on_screen = 10
-        items_in_list = len(list)
+        items_on_screen = self.items_on_screen
+        items_in_list = len(self.list)
         if items_in_list < items_on_screen:
             items_in_list = items_on_screen
         
@@ -52,11 +227,12 @@ class UIListScreen(UIScreen):
         else:
             items_above = self.active_item + self.list_offset
             
+            # Held buttons move several rows at once, follow all the way
             if items_above < scroll_threshold:
-                self.list_offset += 1
+                self.list_offset = scroll_threshold - self.active_item
                 
             if items_above > items_on_screen - 1 - scroll_threshold:
-                self.list_offset -= 1
+                self.list_offset = items_on_screen - 1 - scroll_threshold - self.active_item
             
                 
     #         if active_item_offset_bottom:
@@ -70,41 +246,135 @@ class UIListScreen(UIScreen):
                 self.list_offset = items_on_screen - items_in_list
         
         list_offst_px = self.list_offset * item_height
+        if self.ui.smooth_scroll and self.rendered_count is not None and self.scroll_px != -list_offst_px:
+            # update() eases the viewport to the new offset frame by frame
+            self.frame_ms = SCROLL_FRAME_MS
+            self.rendered_offset = None
+            self.render_viewport()
+            return
+        self.scroll_px = -list_offst_px
+        # Only the rows inside the viewport are materialized and drawn
+        first_visible = -self.list_offset
+        last_visible = min(first_visible + items_on_screen, len(self.list))
+
+        if (self.rendered_offset == self.list_offset and
+            self.rendered_count == items_in_list and
+            self.rendered_active is not None and
+            first_visible <= self.rendered_active < last_visible):
+            # Only the highlight moved
+            for idx in (self.rendered_active, self.active_item):
+                item_y = rows.y + idx * item_height + list_offst_px
+                self.erase_rect(rows.x, item_y, rows.w, item_height)
+                self.render_item(idx, item_y)
+            self.rendered_active = self.active_item
+            self.flush()
+            return
         
         self.clear()
-        for idx, item in enumerate(list):
-            item_x = 0
-            item_y = idx * item_height + list_offst_px
+        for idx in range(first_visible, last_visible):
+            item_y = rows.y + idx * item_height + list_offst_px
+            self.render_item(idx, item_y)
+        self.render_scrollbar(items_in_list)
+        self.rendered_active = self.active_item
+        self.rendered_offset = self.list_offset
+        self.rendered_count = items_in_list
+        self.flush()
+
+    def render_viewport(self):
+        """Draw the rows overlapping the viewport at scroll_px and the
+        scrollbar. PicoGraphics cannot shift its framebuffer, so every
+        visible row moves and is redrawn, but only the list area and the
+        scrollbar strip are pushed, not the whole panel."""
+        self.layout.update()
+        rows = self.rows_area
+        item_height = self.item_height
+        items_in_list = max(len(self.list), self.items_on_screen)
+        self.display.set_clip(rows.x, rows.y, rows.w, rows.h)
+        self.erase_rect(rows.x, rows.y, rows.w, rows.h)
+        self.render_rows()
+        self.display.remove_clip()
+        self.render_scrollbar(items_in_list)
+        self.rendered_active = self.active_item
+        self.rendered_count = items_in_list
+        if self.scroll_px == -self.list_offset * item_height:
+            self.rendered_offset = self.list_offset
+        self.flush()
+
+    def render_rows(self):
+        """Draw the rows overlapping the viewport at scroll_px."""
+        item_height = self.item_height
+        top = self.rows_area.y - self.scroll_px
+        first = self.scroll_px // item_height
+        last = min(len(self.list), (self.scroll_px + self.rows_area.h + item_height - 1) // item_height)
+        for idx in range(first, last):
+            self.render_item(idx, top + idx * item_height)
+
+    def redraw(self):
+        self.layout.update()
+        self.clear()
+        self.render_rows()
+        self.render_scrollbar(max(len(self.list), self.items_on_screen))
+
+    def render_scrollbar(self, items_in_list):
+        items_on_screen = self.items_on_screen
+        if items_in_list <= items_on_screen:
+            return
+        bar = self.scrollbar_area
+        scroll_width = bar.w
+        scroll_height = bar.h
+        scroll_x = bar.x
+        scroll_y = bar.y
+        scroll_padding = SCROLLBAR_PADDING
+        self.display.set_pen(self.palette.secondary)
+        self.fill_rect(scroll_x, scroll_y, scroll_width, scroll_height)
         
-            self.display.set_pen(self.palette.primary)
-            if item.is_active:
-                self.display.rectangle(item_x, item_y, item_width, item_height)
-                self.display.set_pen(self.palette.secondary)
-            item_label = ('> ' if item.is_selected else '') + item.label
-            self.display.text(item_label, item_x + padding, item_y + padding, item_width - 2 * padding, font_scale)
-        # ADD SCROLL BAR
-        if items_in_list > items_on_screen:
-            scroll_width = 18
-            scroll_height = self.ui.height
-            scroll_x = self.ui.width - scroll_width
-            scroll_y = 0
-            scroll_padding = 6
+        # Thumb is proportional to the visible share of the list and
+        # follows the viewport to the pixel
+        track_height = scroll_height - scroll_padding * 2
+        scrollbar_width = scroll_width - scroll_padding * 2
+        scrollbar_height = max(scrollbar_width, track_height * items_on_screen // items_in_list)
+        scrollbar_x = scroll_x + scroll_padding
+        scrollable_px = (items_in_list - items_on_screen) * self.item_height
+        scrollbar_y = scroll_y + scroll_padding + (track_height - scrollbar_height) * self.scroll_px // scrollable_px
+        self.display.set_pen(self.palette.primary)
+        self.fill_rect(scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height)
+
+    def render_item(self, idx, item_y):
+        item_x = self.rows_area.x
+        item_width = self.rows_area.w
+        text_width = item_width - 2 * ITEM_PADDING
+        self.display.set_pen(self.palette.primary)
+        if idx == self.active_item:
+            self.fill_rect(item_x, item_y, item_width, self.item_height)
             self.display.set_pen(self.palette.secondary)
-            self.display.rectangle(scroll_x, scroll_y, scroll_width, scroll_height)
-            
-            scrollbar_width = scroll_width - scroll_padding * 2
-            scrollbar_height = scroll_height - scroll_padding * 2 - scrollbar_width * (items_in_list - items_on_screen)
-            scrollbar_x = scroll_x + scroll_padding
-            scrollbar_y = scroll_y + scroll_padding + (self.list_offset * -scrollbar_width)
-            self.display.set_pen(self.palette.primary)
-            self.display.rectangle(scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height)
-        self.display.update()
-    def get_list_for_render(self):
-        return [UIListItem(item, item, self.active_item == idx) for idx, item in enumerate(self.list)]
+        item_label = self.row_label(idx, ITEM_SCALE, text_width)
+        self.display.text(item_label, item_x + ITEM_PADDING, item_y + ITEM_PADDING, text_width, ITEM_SCALE)
+
+    def row_label(self, idx, font_scale, max_width):
+        """Label of row idx as drawn, decoded and ellipsized once."""
+        model = self.list
+        labels = self.row_labels
+        if (self.row_list is not model or self.row_generation != model.generation or
+                self.row_selected != self.selected_item):
+            labels.clear()
+            self.row_list = model
+            self.row_generation = model.generation
+            self.row_selected = self.selected_item
+        label = labels.get(idx)
+        if label is None:
+            if len(labels) >= 2 * self.items_on_screen:
+                # Scrolled on, keep only rows near the viewport
+                labels.clear()
+            label = self.ui.text_cache.fit(model.label(idx), font_scale, max_width, '> ' if idx == self.selected_item else '')
+            labels[idx] = label
+        return label
+
     def btn_a_handler(self):
         self.activate_prev_item()
+        self.hold(BTN_A)
     def btn_b_handler(self):
         self.activate_next_item()
+        self.hold(BTN_B)
     def btn_x_handler(self):
         self.go_back()
     def btn_y_handler(self):
@@ -117,7 +387,7 @@ class UIListScreen(UIScreen):
                 self.active_item = len(self.list) - 1
             else:
                 self.active_item = n
-            self.render()
+            self.request_render()
     def activate_prev_item(self):
         self.set_active_item(self.active_item - 1)
     def activate_next_item(self):
@@ -1,124 +1,58 @@
 """Network connection details screen."""
-import network
-from machine import Timer
 from screen.base import UIScreen
+from screen.layout import UILayout, UIStack, UIPlace, UIColumn, UITable, UIText, STRETCH
+from netstatus import DISABLED
+
+DETAIL_LABELS = ('Status:', 'SSID:', 'IP Address:', 'Netmask:', 'Gateway:', 'DNS:', 'MAC:', 'Signal:')
 
 
 class UINetworkScreen(UIScreen):
     """Screen displaying network connection details."""
     
+    record_frames = True
+
     def __init__(self, name, ui):
         super().__init__(name, ui)
-        self.rtc_timer = None
+        # Values line up in a column right of the widest label
+        self.values = [UIText(fit=True) for _ in DETAIL_LABELS]
+        table = UITable([(UIText(label), value) for label, value in zip(DETAIL_LABELS, self.values)],
+                        column_gap=10, row_gap=4)
+        self.layout = UILayout(ui, UIStack([
+            UIPlace(UIColumn([UIText('NETWORK INFO', 3), table], gap=16), STRETCH, STRETCH, 10, 10),
+        ] + self.corner_buttons()))
+        self.set_labels([None, None, 'BACK', None])
     
     def init(self):
         """Called when screen becomes active."""
+        if self.ui.network:
+            self.ui.network.subscribe(self.on_network_change)
         self.render()
-        self.rtc_timer = Timer(mode=Timer.PERIODIC, period=1000, callback=self.render)
     
     def deinit(self):
         """Called when screen becomes inactive."""
-        if self.rtc_timer:
-            self.rtc_timer.deinit()
+        if self.ui.network:
+            self.ui.network.unsubscribe(self.on_network_change)
+    
+    def on_network_change(self, snapshot, previous):
+        """Re-render only when the cached network status changed."""
+        self.request_render()
     
     def get_network_info(self):
-        """Get network connection details."""
-        try:
-            wlan = network.WLAN(network.STA_IF)
-            
-            if not wlan.active():
-                return {
-                    'status': 'WiFi Disabled',
-                    'ssid': '-',
-                    'ip': '-',
-                    'netmask': '-',
-                    'gateway': '-',
-                    'dns': '-',
-                    'mac': '-',
-                    'rssi': '-'
-                }
-            
-            if not wlan.isconnected():
-                mac = ':'.join(f'{b:02x}' for b in wlan.config('mac'))
-                return {
-                    'status': 'Not Connected',
-                    'ssid': '-',
-                    'ip': '-',
-                    'netmask': '-',
-                    'gateway': '-',
-                    'dns': '-',
-                    'mac': mac,
-                    'rssi': '-'
-                }
-            
-            ifconfig = wlan.ifconfig()
-            mac = ':'.join(f'{b:02x}' for b in wlan.config('mac'))
-            
-            try:
-                rssi = wlan.status('rssi')
-            except:
-                rssi = 'N/A'
-            
-            return {
-                'status': 'Connected',
-                'ssid': wlan.config('essid'),
-                'ip': ifconfig[0],
-                'netmask': ifconfig[1],
-                'gateway': ifconfig[2],
-                'dns': ifconfig[3],
-                'mac': mac,
-                'rssi': f'{rssi} dBm' if rssi != 'N/A' else 'N/A'
-            }
-        except Exception as e:
-            return {
-                'status': f'Error: {str(e)}',
-                'ssid': '-',
-                'ip': '-',
-                'netmask': '-',
-                'gateway': '-',
-                'dns': '-',
-                'mac': '-',
-                'rssi': '-'
-            }
+        """Latest network status snapshot."""
+        if self.ui.network:
+            return self.ui.network.snapshot
+        return DISABLED
     
     def render(self, tim=None):
         """Render the network details screen."""
         self.clear()
-        
         info = self.get_network_info()
-        
-        # Title
-        title = 'NETWORK INFO'
-        self.display.set_pen(self.palette.primary)
-        self.display.text(title, 10, 10, 320, 3)
-        
-        # Network details
-        y_pos = 50
-        line_height = 20
-        label_x = 10
-        value_x = 120
-        
-        details = [
-            ('Status:', info['status']),
-            ('SSID:', info['ssid']),
-            ('IP Address:', info['ip']),
-            ('Netmask:', info['netmask']),
-            ('Gateway:', info['gateway']),
-            ('DNS:', info['dns']),
-            ('MAC:', info['mac']),
-            ('Signal:', info['rssi'])
-        ]
-        
-        for label, value in details:
-            self.display.set_pen(self.palette.primary)
-            self.display.text(label, label_x, y_pos, 320, 2)
-            self.display.text(value, value_x, y_pos, 320, 2)
-            y_pos += line_height
-        
-        # Render labels
-        self.render_labels([None, None, 'BACK', None])
-        
-        self.display.update()
+        for widget, value in zip(self.values, (info.status, info.ssid, info.ip, info.netmask,
+                                               info.gateway, info.dns, info.mac, info.rssi)):
+            widget.set_text(value)
+        # The display list works out what changed, so paint everything
+        self.layout.paint(self, True)
+        self.flush()
     
     def btn_a_handler(self):
         """Button A handler."""
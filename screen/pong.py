@@ -1,12 +1,29 @@
 """Pong game screen."""
 import time
 import random
-from machine import Timer
-from screen.base import UIScreen
+from screen.base import UIScreen, GLYPH_HEIGHT
+
+# Positions and velocities are fixed-point with this many fraction bits
+FP_SHIFT = 8
+FP_ONE = 1 << FP_SHIFT
+# Simulation step, the game runs at this rate however fast frames render
+TICK_MS = 16
+# Most simulation steps run in one update before the backlog is dropped
+MAX_CATCH_UP = 5
 
 
 class UIPongScreen(UIScreen):
-    """Pong game screen with AI opponent."""
+    """Pong game screen with AI opponent.
+
+    The game advances in fixed TICK_MS steps from an accumulator of real
+    elapsed time, so slow frames cost rendered frames, not game speed.
+    The ball is drawn interpolated between the last two steps.
+    """
+
+    # Render at ~60 FPS
+    frame_ms = 16
+    # Frames after the first only repaint the sprites that moved
+    track_damage = True
     
     def __init__(self, name, ui):
         super().__init__(name, ui)
@@ -17,6 +34,12 @@ class UIPongScreen(UIScreen):
         self.paddle_speed = 5
         self.ai_speed = 3
         
+        # Per-second counters, of the last full second
+        self.ticks_per_second = 0
+        self.frames_per_second = 0
+        self.dropped_ticks = 0
+        self.fps_metric = ui.metrics.gauge('pong.fps')
+        
         # Game state
         self.reset_game()
         
@@ -25,12 +48,11 @@ class UIPongScreen(UIScreen):
         # Paddle positions (y coordinate)
         self.player_y = (self.ui.height - self.paddle_height) // 2
         self.ai_y = (self.ui.height - self.paddle_height) // 2
+        # Paddle moves queued by the buttons, applied on the next step
+        self.player_move = 0
         
         # Ball position and velocity
-        self.ball_x = self.ui.width // 2
-        self.ball_y = self.ui.height // 2
-        self.ball_vx = random.choice([-3, 3])
-        self.ball_vy = random.choice([-2, -1, 1, 2])
+        self.reset_ball()
         
         # Scores
         self.player_score = 0
@@ -38,86 +60,141 @@ class UIPongScreen(UIScreen):
         
         # Game state
         self.paused = False
-        self.needs_update = True
+        self.reset_clock()
+        
+    def reset_clock(self):
+        """Restart timekeeping, e.g. after a pause."""
+        self.last_ticks = time.ticks_ms()
+        self.accumulator = 0
+        self.counter_start = self.last_ticks
+        self.tick_count = 0
+        self.frame_count = 0
         
     def init(self):
         """Called when screen becomes active."""
         self.reset_game()
         self.render()
-        # Start game loop timer (run at ~60 FPS)
-        self.game_timer = Timer(mode=Timer.PERIODIC, period=16, callback=self.game_tick)
-    
+
     def deinit(self):
-        """Called when screen becomes inactive."""
-        if hasattr(self, 'game_timer'):
-            self.game_timer.deinit()
-    
-    def game_tick(self, tim=None):
-        """Timer callback - just sets flag for update."""
-        self.needs_update = True
+        # Not playing, no frame rate to report
+        self.ui.metrics.unset(self.fps_metric)
         
     def update(self):
-        """Update game state - called by main loop."""
-        if not self.needs_update or self.paused:
+        """Advance the game by the time elapsed since the last call and
+        render one frame - called by the scheduler every frame_ms."""
+        now = time.ticks_ms()
+        if self.paused:
+            self.last_ticks = now
             return
         
-        self.needs_update = False
+        self.accumulator += time.ticks_diff(now, self.last_ticks)
+        self.last_ticks = now
+        steps = 0
+        while self.accumulator >= TICK_MS:
+            if steps == MAX_CATCH_UP:
+                # Too far behind, drop the backlog instead of spiralling
+                self.dropped_ticks += self.accumulator // TICK_MS
+                self.accumulator %= TICK_MS
+                break
+            self.step()
+            self.accumulator -= TICK_MS
+            steps += 1
+        self.tick_count += steps
+        
+        self.render_changes()
+        self.frame_count += 1
+        
+        if time.ticks_diff(now, self.counter_start) >= 1000:
+            self.ticks_per_second = self.tick_count
+            self.frames_per_second = self.frame_count
+            self.ui.metrics.set(self.fps_metric, self.frames_per_second)
+            self.tick_count = 0
+            self.frame_count = 0
+            self.counter_start = now
+        
+    def step(self):
+        """Advance the simulation by one TICK_MS step."""
+        height = self.ui.height << FP_SHIFT
+        size = self.ball_size << FP_SHIFT
+        
+        self.prev_ball_x = self.ball_x
+        self.prev_ball_y = self.ball_y
+        
+        # Apply queued player input
+        if self.player_move:
+            self.player_y = max(0, min(self.ui.height - self.paddle_height, 
+                                       self.player_y + self.player_move))
+            self.player_move = 0
         
         # Move ball
         self.ball_x += self.ball_vx
         self.ball_y += self.ball_vy
         
         # Ball collision with top/bottom
-        if self.ball_y <= 0 or self.ball_y >= self.ui.height - self.ball_size:
+        if self.ball_y <= 0 or self.ball_y >= height - size:
             self.ball_vy = -self.ball_vy
-            self.ball_y = max(0, min(self.ball_y, self.ui.height - self.ball_size))
+            self.ball_y = max(0, min(self.ball_y, height - size))
         
         # Ball collision with player paddle
-        if (self.ball_x <= self.paddle_width and 
-            self.player_y <= self.ball_y + self.ball_size and 
-            self.ball_y <= self.player_y + self.paddle_height):
+        if (self.ball_x <= self.paddle_width << FP_SHIFT and 
+            self.player_y << FP_SHIFT <= self.ball_y + size and 
+            self.ball_y <= (self.player_y + self.paddle_height) << FP_SHIFT):
             self.ball_vx = abs(self.ball_vx)
             # Add some angle based on where it hit the paddle
-            hit_pos = (self.ball_y - self.player_y) / self.paddle_height
-            self.ball_vy = int((hit_pos - 0.5) * 4)
+            self.ball_vy = self.hit_angle(self.player_y)
         
         # Ball collision with AI paddle
-        if (self.ball_x >= self.ui.width - self.paddle_width - self.ball_size and 
-            self.ai_y <= self.ball_y + self.ball_size and 
-            self.ball_y <= self.ai_y + self.paddle_height):
+        if (self.ball_x >= (self.ui.width - self.paddle_width - self.ball_size) << FP_SHIFT and 
+            self.ai_y << FP_SHIFT <= self.ball_y + size and 
+            self.ball_y <= (self.ai_y + self.paddle_height) << FP_SHIFT):
             self.ball_vx = -abs(self.ball_vx)
             # Add some angle based on where it hit the paddle
-            hit_pos = (self.ball_y - self.ai_y) / self.paddle_height
-            self.ball_vy = int((hit_pos - 0.5) * 4)
+            self.ball_vy = self.hit_angle(self.ai_y)
         
         # Score points
         if self.ball_x < 0:
             self.ai_score += 1
             self.reset_ball()
-        elif self.ball_x > self.ui.width:
+        elif self.ball_x > self.ui.width << FP_SHIFT:
             self.player_score += 1
             self.reset_ball()
         
         # AI movement (simple AI that follows the ball)
-        ball_center = self.ball_y + self.ball_size // 2
+        ball_center = (self.ball_y >> FP_SHIFT) + self.ball_size // 2
         ai_center = self.ai_y + self.paddle_height // 2
         
         if ball_center < ai_center - 5:
             self.ai_y = max(0, self.ai_y - self.ai_speed)
         elif ball_center > ai_center + 5:
             self.ai_y = min(self.ui.height - self.paddle_height, self.ai_y + self.ai_speed)
-        
-        self.render()
+    
+    def hit_angle(self, paddle_y):
+        """Vertical speed from -2 to 2 px/step by where the ball hit the paddle."""
+        return (self.ball_y - (paddle_y << FP_SHIFT)) * 4 // self.paddle_height - 2 * FP_ONE
     
     def reset_ball(self):
         """Reset ball to center with random direction."""
-        self.ball_x = self.ui.width // 2
-        self.ball_y = self.ui.height // 2
-        self.ball_vx = random.choice([-3, 3])
-        self.ball_vy = random.choice([-2, -1, 1, 2])
+        self.ball_x = (self.ui.width // 2) << FP_SHIFT
+        self.ball_y = (self.ui.height // 2) << FP_SHIFT
+        self.ball_vx = random.choice([-3, 3]) * FP_ONE
+        self.ball_vy = random.choice([-2, -1, 1, 2]) * FP_ONE
+        # No interpolation across the jump back to the center
+        self.prev_ball_x = self.ball_x
+        self.prev_ball_y = self.ball_y
+    
+    def ball_position(self):
+        """Ball pixel position interpolated between the last two steps."""
+        alpha = self.accumulator * FP_ONE // TICK_MS
+        x = self.prev_ball_x + ((self.ball_x - self.prev_ball_x) * alpha >> FP_SHIFT)
+        y = self.prev_ball_y + ((self.ball_y - self.prev_ball_y) * alpha >> FP_SHIFT)
+        return x >> FP_SHIFT, y >> FP_SHIFT
         
     def render(self):
         """Render the game."""
+        self.redraw()
+        self.flush()
+
+    def redraw(self):
         self.clear()
         
         # Draw center line
@@ -126,18 +203,14 @@ class UIPongScreen(UIScreen):
             self.display.rectangle(self.ui.width // 2 - 1, y, 2, 5)
         
         # Draw paddles
-        self.display.set_pen(self.palette.primary)
-        self.display.rectangle(0, self.player_y, self.paddle_width, self.paddle_height)
-        self.display.rectangle(self.ui.width - self.paddle_width, self.ai_y, 
-                              self.paddle_width, self.paddle_height)
+        self.draw_paddles()
         
         # Draw ball
-        self.display.rectangle(int(self.ball_x), int(self.ball_y), 
-                              self.ball_size, self.ball_size)
+        self.drawn_ball = self.ball_position()
+        self.display.rectangle(self.drawn_ball[0], self.drawn_ball[1], self.ball_size, self.ball_size)
         
         # Draw scores
-        self.display.text(str(self.player_score), self.ui.width // 2 - 30, 10, scale=2)
-        self.display.text(str(self.ai_score), self.ui.width // 2 + 20, 10, scale=2)
+        self.draw_scores()
         
         # Draw pause indicator
         if self.paused:
@@ -146,19 +219,99 @@ class UIPongScreen(UIScreen):
             self.display.text(pause_text, 
                             (self.ui.width - text_width) // 2, 
                             self.ui.height // 2 - 10, scale=2)
+    
+    def render_changes(self):
+        """Repaint only the sprites that moved or changed since the last
+        frame, plus whatever their erased rectangles uncovered."""
+        ball = self.ball_position()
+        paddles = (self.player_y, self.ai_y)
+        scores_changed = (str(self.player_score), str(self.ai_score)) != self.drawn_scores
+        if ball == self.drawn_ball and paddles == self.drawn_paddles and not scores_changed:
+            return
+        
+        # Erase the old sprites, remembering what was erased
+        erased = []
+        if ball != self.drawn_ball:
+            erased.append((self.drawn_ball[0], self.drawn_ball[1], self.ball_size, self.ball_size))
+        old_paddles = self.paddle_rects()
+        for i in range(2):
+            if paddles[i] != self.drawn_paddles[i]:
+                erased.append(old_paddles[i])
+        if scores_changed:
+            erased.extend(self.score_rects())
+        for rect in erased:
+            self.erase_rect(*rect)
+        
+        # Redraw the center line dashes and sprites under erased areas
+        self.display.set_pen(self.palette.primary)
+        line_x = self.ui.width // 2 - 1
+        for x, y, w, h in erased:
+            if x < line_x + 2 and line_x < x + w:
+                for dash_y in range((y - 5) // 10 * 10, y + h, 10):
+                    if dash_y >= 0:
+                        self.fill_rect(line_x, dash_y, 2, 5)
+        for i in range(2):
+            if paddles[i] != self.drawn_paddles[i] or self.overlaps(erased, (old_paddles[i],)):
+                self.draw_paddle(i)
+        if scores_changed or self.overlaps(erased, self.score_rects()):
+            self.draw_scores()
+        
+        self.display.set_pen(self.palette.primary)
+        self.fill_rect(ball[0], ball[1], self.ball_size, self.ball_size)
+        self.drawn_ball = ball
         
-        self.display.update()
+        self.flush()
+    
+    def draw_paddles(self):
+        self.drawn_paddles = (None, None)
+        self.draw_paddle(0)
+        self.draw_paddle(1)
+    
+    def draw_paddle(self, i):
+        """Draw the player (0) or AI (1) paddle at its current position."""
+        self.display.set_pen(self.palette.primary)
+        if i == 0:
+            self.fill_rect(0, self.player_y, self.paddle_width, self.paddle_height)
+            self.drawn_paddles = (self.player_y, self.drawn_paddles[1])
+        else:
+            self.fill_rect(self.ui.width - self.paddle_width, self.ai_y, 
+                           self.paddle_width, self.paddle_height)
+            self.drawn_paddles = (self.drawn_paddles[0], self.ai_y)
+    
+    def paddle_rects(self):
+        """Paddle rectangles as currently on the panel."""
+        player_y, ai_y = self.drawn_paddles
+        return [(0, player_y, self.paddle_width, self.paddle_height),
+                (self.ui.width - self.paddle_width, ai_y, self.paddle_width, self.paddle_height)]
+    
+    def draw_scores(self):
+        self.display.set_pen(self.palette.primary)
+        self.drawn_scores = (str(self.player_score), str(self.ai_score))
+        self.draw_text(self.drawn_scores[0], self.ui.width // 2 - 30, 10, self.ui.width, 2)
+        self.draw_text(self.drawn_scores[1], self.ui.width // 2 + 20, 10, self.ui.width, 2)
+    
+    def score_rects(self):
+        """Score text rectangles as currently on the panel."""
+        player, ai = self.drawn_scores
+        return [(self.ui.width // 2 - 30, 10, self.ui.text_cache.width(player, 2), GLYPH_HEIGHT * 2),
+                (self.ui.width // 2 + 20, 10, self.ui.text_cache.width(ai, 2), GLYPH_HEIGHT * 2)]
+    
+    def overlaps(self, rects, others):
+        for x, y, w, h in rects:
+            for ox, oy, ow, oh in others:
+                if x < ox + ow and ox < x + w and y < oy + oh and oy < y + h:
+                    return True
+        return False
     
     def btn_a_handler(self):
-        """Move paddle up."""
+        """Move paddle up on the next step."""
         if not self.paused:
-            self.player_y = max(0, self.player_y - self.paddle_speed)
+            self.player_move -= self.paddle_speed
     
     def btn_b_handler(self):
-        """Move paddle down."""
+        """Move paddle down on the next step."""
         if not self.paused:
-            self.player_y = min(self.ui.height - self.paddle_height, 
-                              self.player_y + self.paddle_speed)
+            self.player_move += self.paddle_speed
     
     def btn_x_handler(self):
         """Go back to home."""
@@ -167,4 +320,4 @@ class UIPongScreen(UIScreen):
     def btn_y_handler(self):
         """Toggle pause."""
         self.paused = not self.paused
-        self.render()
+        self.request_render()
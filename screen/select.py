@@ -1,23 +1,19 @@
-from screen.list import UIListScreen, UIListItem
+from screen.list import UIListScreen, UIListModel
 
 class UISelectScreen(UIListScreen):
     """Selection list screen with current value indication."""
     
     def __init__(self, name, ui, items_list, value, on_select):
         super().__init__(name, ui, on_select)
-        self.list = items_list
+        self.list = UIListModel(items_list)
         self.value = value
-    def get_list_for_render(self):
-        return [UIListItem(
-            item[0],
-            item[1],
-            self.active_item == idx,
-            item[1] == self.value) for idx, item in enumerate(self.list)
-        ]
+        self.selected_item = self.list.find_value(value)
     def select_item(self):
-        value = self.list[self.active_item][1]
+        value = self.list.value(self.active_item)
         self.value = value
+        self.selected_item = self.active_item
         super().select_item(value)
-        self.render()
+        self.invalidate()
+        self.request_render()
     def go_back(self):
         self.ui.set_active_screen('SETTINGS')
\ No newline at end of file
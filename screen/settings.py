@@ -1,13 +1,11 @@
-from screen.list import UIListScreen, UIListItem
+from screen.list import UIListScreen, UIListModel
 
 class UISettingsScreen(UIListScreen):
     """Settings menu screen."""
     
     def __init__(self, name, ui, items_list, on_select):
         super().__init__(name, ui, on_select)
-        self.list = items_list
-    def get_list_for_render(self):
-        return [UIListItem(item[0], item[1], self.active_item == idx) for idx, item in enumerate(self.list)]
+        self.list = UIListModel(items_list)
     def select_item(self):
-        value = self.list[self.active_item][1]
+        value = self.list.value(self.active_item)
         super().select_item(value)
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Paged text/hex file viewer.
+
+Only the page on screen is ever in memory: it is read with readinto()
+into one preallocated buffer, so files of any size are viewed in a few
+hundred bytes of RAM. Text pages end wherever their last row wraps, so
+their start offsets are remembered in a sparse index plus a small ring
+of recent pages, and paging backwards does not rescan from the top.
+"""
+from array import array
+from screen.base import UIScreen
+
+# Text page geometry at font scale 2 between the label bars
+TEXT_COLS = 25
+TEXT_ROWS = 12
+LINE_HEIGHT = 16
+TOP = 24
+PADDING = 6
+# Bytes shown per hex row, offset + hex + ASCII fits one row at scale 2
+HEX_BYTES = 4
+# A text row is at most TEXT_COLS bytes plus its CR LF
+PAGE_BYTES = TEXT_ROWS * (TEXT_COLS + 2)
+# Start offsets of every stride-th text page, stride doubles when full
+INDEX_SIZE = 128
+# Start offsets of the most recently visited text pages
+RECENT_SIZE = 16
+
+MODE_TEXT = 0
+MODE_HEX = 1
+
+
+class UIViewerScreen(UIScreen):
+    """Shows the file set with open() one page at a time."""
+
+    record_frames = True
+
+    def __init__(self, name, ui):
+        super().__init__(name, ui)
+        self.path = None
+        self.file = None
+        self.size = 0
+        self.error = None
+        self.mode = MODE_TEXT
+        self.buffer = bytearray(PAGE_BYTES)
+        self.view = memoryview(self.buffer)
+        # Bytes in the buffer and the (start, end) buffer indexes of each row
+        self.length = 0
+        self.rows = array('H', [0] * (2 * TEXT_ROWS))
+        self.row_count = 0
+        self.index = array('L', [0] * INDEX_SIZE)
+        self.recent_pages = array('l', [-1] * RECENT_SIZE)
+        self.recent_offsets = array('L', [0] * RECENT_SIZE)
+        self.reset()
+
+    def reset(self):
+        self.page = 0
+        self.offset = 0
+        self.next_offset = 0
+        # Text page left for hex, returned to if still on screen, or -1
+        self.text_page = -1
+        self.text_offset = 0
+        self.index[0] = 0
+        self.index_count = 1
+        self.stride = 1
+        for i in range(RECENT_SIZE):
+            self.recent_pages[i] = -1
+
+    def open(self, path):
+        """Show path from its first page the next time the screen is entered."""
+        self.path = path
+        self.mode = MODE_TEXT
+        self.reset()
+
+    def init(self):
+        self.error = None
+        try:
+            self.file = open(self.path, 'rb')
+            self.size = self.file.seek(0, 2)
+        except OSError as e:
+            self.file = None
+            self.size = 0
+            self.error = f'Error: {e}'
+        self.render()
+
+    def deinit(self):
+        # The file handle is only held while the viewer is on screen
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    # PAGES
+
+    def read(self, offset, count):
+        """Fill the buffer with up to count bytes from offset."""
+        self.file.seek(offset)
+        self.length = self.file.readinto(self.view[:count]) or 0
+        return self.length
+
+    def layout_text(self, offset):
+        """Read the text page at offset, split it into rows and return
+        the offset of the page after it."""
+        buf = self.buffer
+        n = self.read(offset, PAGE_BYTES)
+        rows = self.rows
+        row = 0
+        pos = 0
+        while row < TEXT_ROWS and pos < n:
+            start = pos
+            stop = min(pos + TEXT_COLS, n)
+            while pos < stop and buf[pos] != 10:
+                pos += 1
+            end = pos
+            if end > start and buf[end - 1] == 13:
+                end -= 1
+            if pos < n and buf[pos] == 10:
+                pos += 1
+            elif pos + 1 < n and buf[pos] == 13 and buf[pos + 1] == 10:
+                # Full width row followed by its line break
+                pos += 2
+            rows[2 * row] = start
+            rows[2 * row + 1] = end
+            row += 1
+        self.row_count = row
+        return offset + pos
+
+    def remember(self, page, offset):
+        slot = page % RECENT_SIZE
+        self.recent_pages[slot] = page
+        self.recent_offsets[slot] = offset
+        if page % self.stride or page // self.stride != self.index_count:
+            return
+        if self.index_count == INDEX_SIZE:
+            # Keep every other checkpoint and halve the index density
+            for i in range(INDEX_SIZE // 2):
+                self.index[i] = self.index[2 * i]
+            self.index_count = INDEX_SIZE // 2
+            self.stride *= 2
+            if page % self.stride:
+                return
+        self.index[self.index_count] = offset
+        self.index_count += 1
+
+    def text_page_offset(self, page):
+        """Start offset of a text page at or before the furthest one seen."""
+        slot = page % RECENT_SIZE
+        if self.recent_pages[slot] == page:
+            return self.recent_offsets[slot]
+        # Rescan forward from the closest checkpoint
+        checkpoint = min(page // self.stride, self.index_count - 1)
+        current = checkpoint * self.stride
+        offset = self.index[checkpoint]
+        while current < page:
+            offset = self.layout_text(offset)
+            current += 1
+            self.remember(current, offset)
+        return offset
+
+    def find_text_page(self, offset):
+        """Text page containing the byte at offset, pages are scanned
+        forward from the closest checkpoint before it."""
+        checkpoint = 0
+        while checkpoint + 1 < self.index_count and self.index[checkpoint + 1] <= offset:
+            checkpoint += 1
+        page = checkpoint * self.stride
+        start = self.index[checkpoint]
+        while True:
+            end = self.layout_text(start)
+            if end > offset or end >= self.size or end == start:
+                return page, start
+            page += 1
+            start = end
+            self.remember(page, start)
+
+    def hex_page_bytes(self):
+        return TEXT_ROWS * HEX_BYTES
+
+    def has_next_page(self):
+        if self.mode == MODE_HEX:
+            return self.offset + self.hex_page_bytes() < self.size
+        return self.offset < self.next_offset < self.size
+
+    def next_page(self):
+        if not self.file or not self.has_next_page():
+            return
+        self.page += 1
+        if self.mode == MODE_HEX:
+            self.offset += self.hex_page_bytes()
+        else:
+            self.offset = self.next_offset
+            self.remember(self.page, self.offset)
+        self.request_render()
+
+    def prev_page(self):
+        if not self.file or self.page == 0:
+            return
+        self.page -= 1
+        if self.mode == MODE_HEX:
+            self.offset -= self.hex_page_bytes()
+        else:
+            self.offset = self.text_page_offset(self.page)
+        self.request_render()
+
+    def toggle_mode(self):
+        """Switch between text and hex, keeping the first byte on screen."""
+        if not self.file:
+            return
+        if self.mode == MODE_TEXT:
+            self.mode = MODE_HEX
+            self.text_page = self.page
+            self.text_offset = self.offset
+            self.page = self.offset // self.hex_page_bytes()
+            self.offset = self.page * self.hex_page_bytes()
+        else:
+            self.mode = MODE_TEXT
+            if self.text_page >= 0 and 0 <= self.text_offset - self.offset < self.hex_page_bytes():
+                # The hex page was aligned down, a text page found from
+                # its offset could be the one before
+                self.page, self.offset = self.text_page, self.text_offset
+            else:
+                self.page, self.offset = self.find_text_page(self.offset)
+            self.text_page = -1
+        self.request_render()
+
+    # RENDER
+
+    def printable(self, count):
+        """Replace control and non-ASCII bytes in the buffer with dots."""
+        buf = self.buffer
+        for i in range(count):
+            c = buf[i]
+            if c < 32 or c > 126:
+                buf[i] = 46
+
+    def render_text(self):
+        self.next_offset = self.layout_text(self.offset)
+        self.printable(self.length)
+        view = self.view
+        rows = self.rows
+        y = TOP
+        for row in range(self.row_count):
+            self.display.text(str(view[rows[2 * row]:rows[2 * row + 1]], 'ascii'), PADDING, y, self.ui.width, 2)
+            y += LINE_HEIGHT
+
+    def render_hex(self):
+        n = self.read(self.offset, self.hex_page_bytes())
+        buf = self.buffer
+        hex_bytes = [' '.join(f'{b:02x}' for b in buf[i:min(i + HEX_BYTES, n)]) for i in range(0, n, HEX_BYTES)]
+        self.printable(n)
+        y = TOP
+        for row, i in enumerate(range(0, n, HEX_BYTES)):
+            text = f'{self.offset + i:06x} {hex_bytes[row]:<{HEX_BYTES * 3 - 1}} '
+            self.display.text(text + str(self.view[i:min(i + HEX_BYTES, n)], 'ascii'), PADDING, y, self.ui.width, 2)
+            y += LINE_HEIGHT
+
+    def render(self):
+        self.clear()
+        self.display.set_pen(self.palette.primary)
+        if self.error:
+            self.display.text(self.error, PADDING, TOP, self.ui.width - 2 * PADDING, 2)
+        elif self.size == 0:
+            self.display.text('-- file is empty --', PADDING, TOP, self.ui.width, 2)
+        elif self.mode == MODE_HEX:
+            self.render_hex()
+        else:
+            self.render_text()
+        if self.size and not self.error:
+            end = self.next_offset if self.mode == MODE_TEXT else self.offset + self.length
+            position = f'{end * 100 // self.size}%'
+            self.display.text(position, (self.ui.width - self.ui.text_cache.width(position, 2)) // 2, self.ui.height - 18, self.ui.width, 2)
+        self.render_labels(['PREV', 'NEXT', 'BACK', 'HEX' if self.mode == MODE_TEXT else 'TEXT'])
+        self.flush()
+
+    def btn_a_handler(self):
+        self.prev_page()
+
+    def btn_b_handler(self):
+        self.next_page()
+
+    def btn_x_handler(self):
+        self.ui.set_active_screen('FILES')
+
+    def btn_y_handler(self):
+        self.toggle_mode()
@@ -0,0 +1,123 @@
+"""
+Screen snapshot cache.
+
+Switching screens runs the new screen's init(), which redraws it from
+scratch. Screens that can tell whether their state changed since they
+were last shown hand out a snapshot key; when one is left its frame is
+copied out of the framebuffer, deflate-compressed where the firmware
+supports it, and kept in a small least recently used cache under a byte
+budget. Coming back with the same key puts the pixels back and pushes
+them instead of rendering.
+"""
+import io
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+# Compression window, 2**8 bytes keeps the compressor's buffer small
+WINDOW_BITS = 8
+
+
+def framebuffer(display):
+    """The display's pixel buffer. PicoGraphics exposes it through the
+    buffer protocol, the host stand-in as an attribute."""
+    try:
+        return memoryview(display)
+    except TypeError:
+        return memoryview(display.framebuffer)
+
+
+class UISnapshotCache:
+    """Compressed framebuffer copies of recently left screens, by name."""
+
+    def __init__(self, ui, budget):
+        self.ui = ui
+        # Total bytes of snapshot data kept, 0 disables the cache
+        self.budget = budget
+        self.used = 0
+        # name -> (key, data, compressed)
+        self.entries = {}
+        # Least recently used first
+        self.order = []
+        self.compress = deflate is not None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, screen):
+        """Snapshot key of screen including the colors, None if it has none."""
+        if not self.budget or self.ui.profiler.overlay:
+            # The overlay is drawn into the frame and changes every frame
+            return None
+        key = screen.snapshot_key()
+        if key is None:
+            return None
+        palette = self.ui.palette
+        return key, palette.primary, palette.secondary
+
+    def save(self, screen):
+        """Keep the frame of screen, which is on the panel and being left."""
+        self.discard(screen.name)
+        key = self.key(screen)
+        if key is None:
+            return
+        data, compressed = self._pack(framebuffer(self.ui.display))
+        if len(data) > self.budget:
+            return
+        while self.used + len(data) > self.budget:
+            self.discard(self.order[0])
+        self.entries[screen.name] = (key, data, compressed)
+        self.order.append(screen.name)
+        self.used += len(data)
+
+    def restore(self, screen):
+        """Put back the frame of screen if its state is unchanged since it
+        was saved. Returns whether the framebuffer now holds it."""
+        entry = self.entries.get(screen.name)
+        if entry is None:
+            return False
+        key, data, compressed = entry
+        if key != self.key(screen):
+            self.discard(screen.name)
+            self.misses += 1
+            return False
+        self._unpack(data, compressed, framebuffer(self.ui.display))
+        self.order.remove(screen.name)
+        self.order.append(screen.name)
+        self.hits += 1
+        return True
+
+    def discard(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.order.remove(name)
+            self.used -= len(entry[1])
+
+    def clear(self):
+        self.entries.clear()
+        self.order.clear()
+        self.used = 0
+
+    def _pack(self, buf):
+        if self.compress:
+            stream = io.BytesIO()
+            try:
+                with deflate.DeflateIO(stream, deflate.RAW, WINDOW_BITS) as f:
+                    f.write(buf)
+                return stream.getvalue(), True
+            except (OSError, AttributeError):
+                # Firmware built with decompression only
+                self.compress = False
+        return bytes(buf), False
+
+    def _unpack(self, data, compressed, buf):
+        if not compressed:
+            buf[:] = data
+            return
+        with deflate.DeflateIO(io.BytesIO(data), deflate.RAW, WINDOW_BITS) as f:
+            pos = 0
+            while pos < len(buf):
+                n = f.readinto(buf[pos:])
+                if not n:
+                    break
+                pos += n
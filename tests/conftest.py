@@ -0,0 +1,32 @@
+"""Runs the UI under CPython on the headless backend in host/."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import host  # noqa: E402
+host.install()
+
+
+@pytest.fixture
+def make_ui():
+    """Fresh UI on the shared host display, pushing only dirty regions,
+    under the manual clock."""
+    import ui
+
+    def make(**settings):
+        host.clock.set_manual()
+        u = ui.UI(ui.display, ui.palette, True)
+        for name, value in settings.items():
+            setattr(u, name, value)
+        return u
+    return make
+
+
+@pytest.fixture
+def panel():
+    """Copy of what the host panel shows, i.e. only what was pushed."""
+    import ui
+    return lambda: bytes(ui.display.panel)
@@ -0,0 +1,57 @@
+"""Button event queue."""
+import host
+from events import UIEventQueue, BTN_A, BTN_B, BTN_X, BTN_Y
+
+
+def test_debounce():
+    queue = UIEventQueue(200)
+    assert queue.push(BTN_A, 1000)
+    # Bounces of A within 200 ms, B is debounced on its own
+    assert not queue.push(BTN_A, 1001)
+    assert not queue.push(BTN_A, 1199)
+    assert queue.push(BTN_B, 1100)
+    assert queue.push(BTN_A, 1200)
+    assert [queue.pop() for _ in range(4)] == [(BTN_A, 1000), (BTN_B, 1100), (BTN_A, 1200), None]
+    assert queue.dropped == 0
+
+
+def test_debounce_across_tick_wrap():
+    queue = UIEventQueue(200)
+    t = host.TICKS_PERIOD - 100
+    assert queue.push(BTN_X, t)
+    assert not queue.push(BTN_X, 50)
+    assert queue.push(BTN_X, 100)
+
+
+def test_first_press_at_zero():
+    # Nothing was pressed yet, so time 0 is not a bounce of time 0
+    queue = UIEventQueue(200)
+    assert queue.push(BTN_Y, 0)
+
+
+def test_overflow():
+    queue = UIEventQueue(0, size=4)
+    for i in range(3):
+        assert queue.push(i, i)
+    # One slot stays free to tell a full ring from an empty one
+    assert len(queue) == 3
+    assert not queue.push(BTN_Y, 10)
+    assert not queue.push(BTN_Y, 11)
+    assert queue.dropped == 2
+    assert queue.pop() == (0, 0)
+    assert queue.push(BTN_Y, 12)
+    assert [queue.pop() for _ in range(4)] == [(1, 1), (2, 2), (BTN_Y, 12), None]
+    assert len(queue) == 0
+
+
+def test_wake():
+    class Flag:
+        set_count = 0
+
+        def set(self):
+            self.set_count += 1
+    queue = UIEventQueue(200)
+    queue.wake = Flag()
+    queue.push(BTN_A, 0)
+    queue.push(BTN_A, 10)
+    assert queue.wake.set_count == 1
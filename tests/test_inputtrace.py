@@ -0,0 +1,39 @@
+"""Input trace packing and files."""
+import pytest
+
+from inputtrace import UITrace
+
+
+def test_varint_round_trip(tmp_path):
+    # Gaps packing into one to four varint bytes, and presses at once
+    gaps = [0, 5, 0, 35, 3960, 2 ** 18, 2 ** 25]
+    sizes = [1, 1, 1, 2, 2, 3, 4]
+    presses = []
+    t = 0
+    for i, gap in enumerate(gaps):
+        t += gap
+        presses.append((i % 4, t))
+    trace = UITrace(0xdeadbeef, 1000)
+    for button, t in presses:
+        trace.record(button, 1000 + t)
+    assert list(trace.presses()) == presses
+    assert len(trace.data) == sum(sizes)
+    path = str(tmp_path / 'trace.bin')
+    trace.save(path)
+    loaded = UITrace.load(path)
+    assert loaded.seed == 0xdeadbeef
+    assert loaded.count == len(presses)
+    assert list(loaded.presses()) == presses
+
+
+def test_short_gap_is_one_byte():
+    trace = UITrace(1, 0)
+    trace.record(3, 31)
+    assert trace.data == bytes([31 << 2 | 3])
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'trace.bin'
+    path.write_bytes(b'PNG\x00\x00\x00\x00\x00')
+    with pytest.raises(ValueError):
+        UITrace.load(str(path))
@@ -0,0 +1,85 @@
+"""JSONFieldReader fed a document in arbitrary chunks."""
+import json
+
+import pytest
+
+from libs.jsonstream.lib_jsonstream import JSONFieldReader
+
+DOCUMENT = {
+    'latitude': -33.87,
+    'name': 'say "hi"\\ \n\t/ done',
+    'current': {'time': '2026-10-18T12:00', 'temperature_2m': 21.5, 'weather_code': 61,
+                'wind_speed_10m': 1.25e1, 'rain': None, 'is_day': True},
+    'skipped': {'current': {'time': 'wrong'}, 'list': [1, [2, 3], {'time': 'wrong'}]},
+    'daily': {'time': ['2026-10-18', '2026-10-19'],
+              'temperature_2m_max': [24, -3.5, 0],
+              'nested': [[10, 11], [20, {'deep': 'x'}]]},
+    'last': False,
+}
+PATHS = [
+    ('latitude',),
+    ('name',),
+    ('current', 'time'),
+    ('current', 'temperature_2m'),
+    ('current', 'weather_code'),
+    ('current', 'wind_speed_10m'),
+    ('current', 'rain'),
+    ('current', 'is_day'),
+    ('daily', 'time', 1),
+    ('daily', 'temperature_2m_max', 0),
+    ('daily', 'temperature_2m_max', 1),
+    ('daily', 'temperature_2m_max', 2),
+    ('daily', 'nested', 1, 0),
+    ('daily', 'nested', 1, 1, 'deep'),
+    ('last',),
+]
+# Spaced like a server would, compact like a small device would
+TEXTS = [json.dumps(DOCUMENT, indent=2).encode(), json.dumps(DOCUMENT, separators=(',', ':')).encode()]
+
+
+def expected(path):
+    value = DOCUMENT
+    for key in path:
+        value = value[key]
+    return value
+
+
+def read(chunks):
+    reader = JSONFieldReader(PATHS)
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader
+
+
+def check(reader):
+    assert reader.values == {path: expected(path) for path in PATHS}
+    for path in PATHS:
+        assert type(reader.get(path)) is type(expected(path)), path
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_whole(text):
+    check(read([text]))
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_byte_at_a_time(text):
+    check(read(text[i:i + 1] for i in range(len(text))))
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_every_split(text):
+    for i in range(len(text) + 1):
+        check(read([text[:i], text[i:]]))
+
+
+@pytest.mark.parametrize('size', [2, 3, 5, 7, 64])
+def test_chunk_sizes(size):
+    text = TEXTS[1]
+    check(read(memoryview(text)[i:i + size] for i in range(0, len(text), size)))
+
+
+def test_missing():
+    reader = read([b'{"current": {"time": "x"}, "daily": {"temperature_2m_max": []}}'])
+    assert reader.values == {('current', 'time'): 'x'}
+    assert reader.get(('daily', 'temperature_2m_max', 0), 'none') == 'none'
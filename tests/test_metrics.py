@@ -0,0 +1,82 @@
+"""Metric storage and the StatsD payload."""
+from metrics import UIMetrics, FRAME_US_BOUNDS, MAX_DATAGRAM, SUM_MAX
+
+
+def test_histogram_sum_overflow():
+    metrics = UIMetrics()
+    h = metrics.histogram('frame_us', FRAME_US_BOUNDS)
+    # Over SUM_MAX us of frames without an export, as while offline
+    n = SUM_MAX // 125000
+    for _ in range(n):
+        metrics.observe(h, 125000)
+    assert metrics.sums[h] == n * 125000
+    metrics.observe(h, 125000)
+    # Started over instead of raising or wrapping
+    assert metrics.sums[h] == 125000
+    assert sum(metrics.buckets[h]) == 1
+    lines = metrics.encode('pico').decode().split('\n')
+    assert 'pico.frame_us.count:1|c' in lines
+    assert 'pico.frame_us.sum:125000|c' in lines
+
+
+def test_encode():
+    metrics = UIMetrics()
+    presses = metrics.counter('button.a')
+    heap = metrics.gauge('mem.free')
+    rssi = metrics.gauge('wifi.rssi')
+    screen = metrics.state('ui.screen')
+    frame = metrics.histogram('ui.frame_us', (2000, 16000))
+    metrics.sampler(lambda m: m.set(heap, 81234))
+    metrics.inc(presses)
+    metrics.inc(presses, 2)
+    metrics.set_state(screen, 'HOME')
+    for us in (1500, 2000, 2001, 40000):
+        metrics.observe(frame, us)
+    assert metrics.encode('pico').decode().split('\n') == [
+        'pico.button.a:3|c',
+        # rssi was never set, so it is left out
+        'pico.mem.free:81234|g',
+        'pico.ui.screen.HOME:1|g',
+        'pico.ui.frame_us.le_2000:2|c',
+        'pico.ui.frame_us.le_16000:1|c',
+        'pico.ui.frame_us.le_inf:1|c',
+        'pico.ui.frame_us.count:4|c',
+        'pico.ui.frame_us.sum:45501|c',
+    ]
+    # Counters and histograms start over, the sampler sets the heap
+    # again, and the state that no longer holds goes back to 0
+    metrics.set(rssi, -61)
+    metrics.set_state(screen, 'PONG')
+    assert metrics.encode('pico').decode().split('\n') == [
+        'pico.button.a:0|c',
+        'pico.mem.free:81234|g',
+        'pico.wifi.rssi:-61|g',
+        'pico.ui.screen.HOME:0|g',
+        'pico.ui.screen.PONG:1|g',
+        'pico.ui.frame_us.le_2000:0|c',
+        'pico.ui.frame_us.le_16000:0|c',
+        'pico.ui.frame_us.le_inf:0|c',
+        'pico.ui.frame_us.count:0|c',
+        'pico.ui.frame_us.sum:0|c',
+    ]
+    metrics.unset(rssi)
+    assert 'pico.wifi.rssi' not in metrics.encode('pico').decode()
+
+
+def test_encode_datagram_limit():
+    metrics = UIMetrics()
+    for i in range(200):
+        metrics.inc(metrics.counter(f'counter.{i:03d}'))
+    payload = metrics.encode('pico')
+    assert len(payload) <= MAX_DATAGRAM
+    lines = payload.decode().split('\n')
+    assert lines[0] == 'pico.counter.000:1|c'
+    assert len(lines) < 200
+
+
+def test_register_twice():
+    metrics = UIMetrics()
+    assert metrics.counter('a') == metrics.counter('a')
+    assert metrics.gauge('g') == metrics.gauge('g')
+    assert metrics.state('s') == metrics.state('s')
+    assert metrics.histogram('h', (1,)) == metrics.histogram('h', (1,))
@@ -0,0 +1,65 @@
+"""Framebuffer mirror row encoding."""
+import asyncio
+import random
+
+import pytest
+
+import mirror
+from host.mirror_client import MirrorClient
+
+
+def decode_row(runs):
+    row = bytearray()
+    for i in range(0, len(runs), 2):
+        assert 1 <= runs[i] <= 255
+        row.extend(bytes([runs[i + 1]]) * runs[i])
+    return row
+
+
+@pytest.mark.parametrize('row', [
+    b'',
+    bytes(160),
+    # Longer than a run can count
+    b'\x11' * 600,
+    bytes([0x12, 0x34]) * 80,
+    b'\x00' * 10 + b'\xff' + b'\x00' * 149,
+    bytes(random.Random(1).getrandbits(8) for _ in range(160)),
+])
+def test_encode_row_round_trip(row):
+    out = bytearray()
+    mirror.encode_row(row, out)
+    assert decode_row(out) == row
+    # Every run as long as it can be
+    for i in range(2, len(out), 2):
+        assert out[i + 1] != out[i - 1] or out[i - 2] == 255
+
+
+def test_encode_row_appends():
+    out = bytearray(b'xy')
+    mirror.encode_row(b'\x05\x05\x05', out)
+    assert out == b'xy\x03\x05'
+
+
+def test_client_applies_encoded_rows():
+    width, height = 8, 4
+    rows = {1: bytes([0x12, 0x12, 0x12, 0x34]), 3: bytes([0xf0, 0x0f, 0xf0, 0x0f])}
+    stream = bytearray(mirror.MAGIC + width.to_bytes(2, 'little') + height.to_bytes(2, 'little'))
+    stream += b'F' + len(rows).to_bytes(2, 'little')
+    for y, row in rows.items():
+        runs = bytearray()
+        mirror.encode_row(row, runs)
+        stream += y.to_bytes(2, 'little') + len(runs).to_bytes(2, 'little') + runs
+
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes(stream))
+        reader.feed_eof()
+        client = MirrorClient(reader)
+        await client.read_header()
+        assert await client.read_frame() == 2
+        return client
+    client = asyncio.run(read())
+    # Two pixels per byte, the even one in the high nibble
+    assert client.pixels[8:16] == bytes([1, 2, 1, 2, 1, 2, 3, 4])
+    assert client.pixels[24:32] == bytes([15, 0, 0, 15, 15, 0, 0, 15])
+    assert client.pixels[:8] == bytes(8)
@@ -0,0 +1,79 @@
+"""Shared network status cache."""
+import pytest
+
+import host
+import network
+import netstatus
+import wifi
+
+
+@pytest.fixture
+def service():
+    host.clock.set_manual()
+    network.WLAN.reset()
+    manager = wifi.WiFiManager('ssid', 'password')
+    service = netstatus.NetworkStatusService(manager, poll_ms=500)
+    service.changes = []
+    service.subscribe(lambda snapshot, previous: service.changes.append((snapshot, previous)))
+    yield service
+    network.WLAN.reset()
+
+
+def test_notifies_only_on_change(service):
+    service.poll()
+    # Nothing changed, the radio is still off
+    assert service.changes == []
+    assert service.snapshot is netstatus.DISABLED
+    service.wifi.start()
+    # Associating, then associated
+    network.WLAN._state['status'] = network.STAT_CONNECTING
+    service.poll()
+    service.poll()
+    network.WLAN._state['status'] = network.STAT_GOT_IP
+    service.poll()
+    service.poll()
+    statuses = [snapshot.status for snapshot, _ in service.changes]
+    assert statuses == ['Connecting #1', 'Connected']
+    snapshot, previous = service.changes[-1]
+    assert snapshot is service.snapshot
+    assert previous.status == 'Connecting #1'
+    assert (snapshot.ssid, snapshot.ip, snapshot.rssi) == ('ssid', '192.168.1.50', '-52 dBm')
+    assert service.rssi == -52
+
+
+def test_reads_the_driver_once_per_poll(service):
+    service.wifi.start()
+    service.wifi.poll()
+    service.poll()
+    calls = network.WLAN.calls
+    service.poll()
+    # active, isconnected, ifconfig and rssi; MAC and SSID are cached
+    assert network.WLAN.calls - calls == 4
+    assert len(service.changes) == 1
+
+
+def test_unsubscribe(service):
+    calls = []
+
+    def callback(snapshot, previous):
+        calls.append(snapshot)
+    service.subscribe(callback)
+    service.subscribe(callback)
+    service.wifi.start()
+    service.poll()
+    assert len(calls) == 1
+    service.unsubscribe(callback)
+    service.wifi.poll()
+    service.poll()
+    assert len(calls) == 1
+
+
+def test_driver_error(service, monkeypatch):
+    service.wifi.start()
+
+    def broken():
+        raise OSError('radio')
+    monkeypatch.setattr(service.wlan, 'active', broken)
+    service.poll()
+    service.poll()
+    assert [snapshot.status for snapshot, _ in service.changes] == ['Error: radio']
@@ -0,0 +1,29 @@
+"""Lazy screen registry."""
+import time
+
+import host
+import registry
+
+
+def test_evict_idle_order(make_ui, monkeypatch):
+    u = make_ui()
+    # Used in this order across a wrap of ticks_ms()
+    host.clock.set_manual(host.TICKS_PERIOD - 1500)
+    for name in ('SETTINGS', 'FILES', 'PONG', 'HOME'):
+        u.set_active_screen(name)
+        time.sleep_ms(1000)
+    assert u.screens.last_used['PONG'] < u.screens.last_used['SETTINGS']
+    evicted = []
+    evict = u.screens.evict
+
+    def record(name):
+        if evict(name):
+            evicted.append(name)
+            return True
+        return False
+    monkeypatch.setattr(u.screens, 'evict', record)
+    # Enough heap once two screens are gone
+    monkeypatch.setattr(registry.gc, 'mem_free', lambda: len(evicted) * u.screens.min_free // 2)
+    u.screens.evict_idle()
+    assert evicted == ['SETTINGS', 'FILES']
+    assert 'PONG' in u.screens.screens
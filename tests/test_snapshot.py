@@ -0,0 +1,93 @@
+"""Snapshot cache of left screens' frames."""
+import pytest
+
+import snapshot
+from snapshot import UISnapshotCache, framebuffer
+
+
+class Screen:
+    def __init__(self, name, key=1):
+        self.name = name
+        self.key = key
+
+    def snapshot_key(self):
+        return self.key
+
+
+def fill(u, value):
+    buf = framebuffer(u.display)
+    buf[:] = bytes([value]) * len(buf)
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_restore(make_ui, compress):
+    u = make_ui()
+    cache = UISnapshotCache(u, len(framebuffer(u.display)))
+    cache.compress = compress and snapshot.deflate is not None
+    screen = Screen('A')
+    fill(u, 0x12)
+    framebuffer(u.display)[100:110] = b'\x34' * 10
+    frame = bytes(framebuffer(u.display))
+    cache.save(screen)
+    fill(u, 0)
+    assert cache.restore(screen)
+    assert bytes(framebuffer(u.display)) == frame
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_changed_key_misses(make_ui):
+    u = make_ui()
+    cache = UISnapshotCache(u, len(framebuffer(u.display)))
+    screen = Screen('A')
+    cache.save(screen)
+    screen.key = 2
+    assert not cache.restore(screen)
+    assert cache.misses == 1
+    # Dropped, the frame can never match again
+    assert 'A' not in cache.entries and cache.used == 0
+
+
+def test_palette_change_misses(make_ui):
+    u = make_ui()
+    cache = UISnapshotCache(u, len(framebuffer(u.display)))
+    screen = Screen('A')
+    cache.save(screen)
+    u.palette.primary = (u.palette.primary + 1) % 8
+    assert not cache.restore(screen)
+
+
+def test_not_saved(make_ui):
+    u = make_ui()
+    cache = UISnapshotCache(u, len(framebuffer(u.display)))
+    cache.save(Screen('A', None))
+    u.profiler.toggle_overlay()
+    cache.save(Screen('B'))
+    assert cache.entries == {}
+    assert UISnapshotCache(u, 0).key(Screen('C')) is None
+
+
+def test_evicts_least_recently_used(make_ui):
+    u = make_ui()
+    size = len(framebuffer(u.display))
+    cache = UISnapshotCache(u, 2 * size)
+    cache.compress = False
+    a, b, c = Screen('A'), Screen('B'), Screen('C')
+    cache.save(a)
+    cache.save(b)
+    # A is used again, so B is the one to go
+    assert cache.restore(a)
+    cache.save(c)
+    assert list(cache.entries) == ['A', 'C']
+    assert cache.order == ['A', 'C']
+    assert cache.used == 2 * size
+    # Saving again replaces the old frame
+    cache.save(c)
+    assert cache.order == ['A', 'C'] and cache.used == 2 * size
+
+
+def test_larger_than_budget(make_ui):
+    u = make_ui()
+    cache = UISnapshotCache(u, 100)
+    cache.compress = False
+    cache.save(Screen('A'))
+    assert cache.entries == {} and cache.used == 0
@@ -0,0 +1,111 @@
+"""Paged text/hex file viewer."""
+import pytest
+
+from screen.viewer import INDEX_SIZE
+
+
+def open_viewer(make_ui, tmp_path, lines):
+    """Viewer on a file of short and wrapped lines, and its bytes."""
+    data = b''.join(b'%d ' % i * (i % 7 * 3) + b'\r\n' for i in range(lines))
+    path = tmp_path / 'file.txt'
+    path.write_bytes(data)
+    u = make_ui()
+    viewer = u.screens.get('VIEWER')
+    viewer.open(str(path))
+    u.set_active_screen('VIEWER')
+    return viewer, data
+
+
+def scan(viewer):
+    """Start offsets of every text page, laid out one after the other."""
+    offsets = [0]
+    while True:
+        end = viewer.layout_text(offsets[-1])
+        if end >= viewer.size or end == offsets[-1]:
+            return offsets
+        offsets.append(end)
+
+
+def forward(viewer, pages):
+    """Page forward as render() would, without drawing."""
+    for _ in range(pages):
+        viewer.next_offset = viewer.layout_text(viewer.offset)
+        viewer.next_page()
+
+
+@pytest.fixture
+def viewer(make_ui, tmp_path):
+    return open_viewer(make_ui, tmp_path, 400)
+
+
+@pytest.fixture
+def long_viewer(make_ui, tmp_path):
+    """Enough pages to halve the index density twice."""
+    viewer, data = open_viewer(make_ui, tmp_path, 4000)
+    assert len(scan(viewer)) > 2 * INDEX_SIZE
+    return viewer, data
+
+
+def test_text_hex_text(viewer):
+    viewer, _ = viewer
+    for page in range(20):
+        text = viewer.page, viewer.offset
+        viewer.toggle_mode()
+        viewer.render()
+        assert viewer.offset <= text[1] < viewer.offset + viewer.hex_page_bytes()
+        viewer.toggle_mode()
+        viewer.render()
+        # Back on the same page, not the one the aligned hex offset starts in
+        assert (viewer.page, viewer.offset) == text, f'page {page}'
+        viewer.next_page()
+        viewer.render()
+
+
+def test_hex_paged_away(viewer):
+    viewer, _ = viewer
+    for _ in range(3):
+        viewer.next_page()
+        viewer.render()
+    viewer.toggle_mode()
+    for _ in range(10):
+        viewer.next_page()
+    hex_offset = viewer.offset
+    viewer.toggle_mode()
+    viewer.render()
+    # The text page showing the first byte of the hex page
+    assert viewer.offset <= hex_offset < viewer.next_offset
+
+
+def test_paging(long_viewer):
+    viewer, _ = long_viewer
+    offsets = scan(viewer)
+    for page, offset in enumerate(offsets):
+        assert (viewer.page, viewer.offset) == (page, offset)
+        forward(viewer, 1)
+    # The last page has no next
+    assert viewer.page == len(offsets) - 1
+    assert viewer.stride > 2
+    for page in reversed(range(len(offsets) - 1)):
+        viewer.prev_page()
+        assert (viewer.page, viewer.offset) == (page, offsets[page])
+
+
+def test_text_page_offset(long_viewer):
+    viewer, _ = long_viewer
+    offsets = scan(viewer)
+    forward(viewer, len(offsets))
+    # Out of the recent ring, rescanned from the index in any order
+    for page in [0, 1, 200, 17, len(offsets) - 1, 128, 129, 5, 300]:
+        assert viewer.text_page_offset(page) == offsets[page], f'page {page}'
+
+
+def test_find_text_page(long_viewer):
+    viewer, data = long_viewer
+    offsets = scan(viewer)
+    forward(viewer, 150)
+    # Before, inside and past the pages seen so far
+    for offset in [0, 1, offsets[3] - 1, offsets[3], offsets[100] + 7, offsets[149],
+                   offsets[240] + 1, len(data) - 1]:
+        page, start = viewer.find_text_page(offset)
+        assert start == offsets[page], f'offset {offset}'
+        assert offset < (offsets + [len(data)])[page + 1], f'offset {offset}'
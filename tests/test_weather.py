@@ -0,0 +1,107 @@
+"""WeatherService against the local Open-Meteo stand-in in host/httpd.py."""
+import asyncio
+import copy
+import json
+import time
+
+import pytest
+
+import weather
+from host import httpd
+
+
+def fetch(tmp_path, **serve):
+    """A service fetched once from a server started with serve."""
+    async def run():
+        server = await httpd.serve(**serve)
+        try:
+            service = weather.WeatherService(host='127.0.0.1', port=httpd.port(server),
+                                             cache_file=str(tmp_path / 'weather.json'))
+            updates = []
+            service.subscribe(updates.append)
+            await service.fetch()
+            return service, updates
+        finally:
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(run())
+
+
+def test_fetch(tmp_path):
+    # Small delayed chunks split the body across parser feeds
+    service, updates = fetch(tmp_path, chunk=7, delay_ms=1)
+    current = httpd.FORECAST['current']
+    assert service.snapshot[:4] == (current['temperature_2m'], current['weather_code'],
+                                    current['wind_speed_10m'], current['time'])
+    assert service.error is None
+    assert updates == [service.snapshot]
+    assert service.next_fetch == service.snapshot.fetched + weather.TTL_S
+    with open(tmp_path / 'weather.json') as f:
+        assert json.load(f) == list(service.snapshot)
+
+
+def test_http_error(tmp_path):
+    before = int(time.time())
+    service, updates = fetch(tmp_path, status='500 Internal Server Error')
+    assert service.snapshot is None
+    assert service.error == 'Weather: HTTP 500 Internal Server Error'
+    assert not service.fetching
+    assert updates == []
+    assert before + weather.RETRY_S <= service.next_fetch <= int(time.time()) + weather.RETRY_S
+    assert not (tmp_path / 'weather.json').exists()
+
+
+@pytest.mark.parametrize('field, value', [
+    ('temperature_2m', None),
+    ('weather_code', None),
+    ('weather_code', 'rain'),
+    ('wind_speed_10m', True),
+    ('time', None),
+])
+def test_bad_field(tmp_path, field, value):
+    payload = copy.deepcopy(httpd.FORECAST)
+    payload['current'][field] = value
+    service, updates = fetch(tmp_path, payload=payload)
+    assert service.snapshot is None
+    assert service.error.startswith('Weather: bad field')
+    assert updates == []
+    assert service.next_fetch > int(time.time())
+    assert not (tmp_path / 'weather.json').exists()
+
+
+def test_missing_field(tmp_path):
+    payload = copy.deepcopy(httpd.FORECAST)
+    del payload['current']['temperature_2m']
+    service, _ = fetch(tmp_path, payload=payload)
+    assert service.snapshot is None
+    assert service.error == 'Weather: bad field None'
+
+
+def test_cache_reload(tmp_path):
+    fetched, _ = fetch(tmp_path)
+    service = weather.WeatherService(cache_file=str(tmp_path / 'weather.json'))
+    assert service.snapshot == fetched.snapshot
+    # Fresh, the first poll makes no request
+    assert service.next_fetch == fetched.snapshot.fetched + weather.TTL_S
+    service.poll()
+    assert not service.fetching
+
+
+def test_cache_expired(tmp_path):
+    stale = list(httpd.FORECAST['current'][key] for key in
+                 ('temperature_2m', 'weather_code', 'wind_speed_10m', 'time'))
+    stale.append(int(time.time()) - weather.TTL_S - 1)
+    with open(tmp_path / 'weather.json', 'w') as f:
+        json.dump(stale, f)
+    service = weather.WeatherService(cache_file=str(tmp_path / 'weather.json'))
+    # Shown until the request it is due for returns
+    assert list(service.snapshot) == stale
+    assert service.next_fetch == 0
+
+
+def test_cache_bad_field(tmp_path):
+    with open(tmp_path / 'weather.json', 'w') as f:
+        json.dump([None, 61, 14.8, '2026-10-18T12:00', int(time.time())], f)
+    service = weather.WeatherService(cache_file=str(tmp_path / 'weather.json'))
+    assert service.snapshot is None
+    assert service.next_fetch == 0
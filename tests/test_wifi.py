@@ -0,0 +1,79 @@
+"""WiFi connection state machine."""
+import pytest
+
+import host
+import network
+import wifi
+
+
+@pytest.fixture
+def manager():
+    host.clock.set_manual()
+    network.WLAN.reset('down')
+    manager = wifi.WiFiManager('ssid', 'password', poll_ms=250)
+    manager.start()
+    yield manager
+    network.WLAN.reset()
+
+
+def fail_attempt(manager):
+    """Poll an attempt the driver rejects into the backoff."""
+    assert manager.state == wifi.STATE_CONNECTING
+    manager.poll()
+    assert manager.state == wifi.STATE_FAILED
+    manager.poll()
+    assert manager.state == wifi.STATE_BACKOFF
+
+
+def test_backoff_doubles_up_to_max(manager):
+    waits = []
+    for attempt in range(1, 9):
+        assert manager.attempts == attempt
+        fail_attempt(manager)
+        waits.append(manager.backoff_ms)
+        host.clock.advance(manager.backoff_ms - 1)
+        manager.poll()
+        assert manager.state == wifi.STATE_BACKOFF
+        assert manager.status_text() == 'retry 0s'
+        host.clock.advance(1)
+        manager.poll()
+    assert waits == [2000, 4000, 8000, 16000, 32000, 60000, 60000, 60000]
+
+
+def test_connects_after_backoff(manager):
+    fail_attempt(manager)
+    network.WLAN.scenario = 'connected'
+    host.clock.advance(manager.backoff_ms)
+    manager.poll()
+    assert manager.state == wifi.STATE_CONNECTING
+    manager.poll()
+    assert manager.is_connected()
+    assert manager.status_text() == '192.168.1.50'
+    # The next failure backs off from the start again
+    assert (manager.attempts, manager.backoff_ms) == (0, 0)
+
+
+def test_connect_timeout(manager):
+    network.WLAN._state['status'] = network.STAT_CONNECTING
+    host.clock.advance(wifi.CONNECT_TIMEOUT_MS)
+    manager.poll()
+    assert manager.state == wifi.STATE_CONNECTING
+    assert manager.status_text() == 'wifi 15s'
+    host.clock.advance(1)
+    manager.poll()
+    assert manager.state == wifi.STATE_FAILED
+
+
+def test_link_lost(manager):
+    network.WLAN.scenario = 'connected'
+    fail_attempt(manager)
+    host.clock.advance(manager.backoff_ms)
+    manager.poll()
+    manager.poll()
+    assert manager.is_connected()
+    network.WLAN._state['status'] = network.STAT_IDLE
+    manager.poll()
+    # Reconnects straight away, without a backoff
+    assert manager.state == wifi.STATE_CONNECTING
+    assert manager.ip is None
+    assert manager.attempts == 1
@@ -0,0 +1,69 @@
+"""
+Text measurement and truncation cache.
+
+Labels and list rows are mostly the same strings from frame to frame, so
+their measured widths and the ellipsized form that fits a box are kept
+by text and scale. A steady-state render then neither measures nor
+builds strings. Everything is dropped when the font changes, the only
+thing besides the text that changes the result.
+"""
+
+# Entries per table before it is cleared and refilled
+TEXT_CACHE_SIZE = 128
+ELLIPSIS = '...'
+
+
+class UITextCache:
+    """Cached measure_text() and single-line fitting for one display."""
+
+    def __init__(self, display, size=TEXT_CACHE_SIZE):
+        self.display = display
+        self.size = size
+        # (text, scale) -> width in px
+        self.widths = {}
+        # (prefix, text, scale, max_width) -> string drawn
+        self.fits = {}
+
+    def set_font(self, font):
+        self.display.set_font(font)
+        self.clear()
+
+    def clear(self):
+        self.widths.clear()
+        self.fits.clear()
+
+    def width(self, text, scale=2):
+        key = (text, scale)
+        width = self.widths.get(key)
+        if width is None:
+            if len(self.widths) >= self.size:
+                self.widths.clear()
+            width = self.display.measure_text(text, scale)
+            self.widths[key] = width
+        return width
+
+    def fit(self, text, scale, max_width, prefix=''):
+        """prefix + text, shortened with an ellipsis to fit max_width."""
+        key = (prefix, text, scale, max_width)
+        fitted = self.fits.get(key)
+        if fitted is None:
+            if len(self.fits) >= self.size:
+                self.fits.clear()
+            fitted = self._fit(prefix + text, scale, max_width)
+            self.fits[key] = fitted
+        return fitted
+
+    def _fit(self, text, scale, max_width):
+        measure = self.display.measure_text
+        if measure(text, scale) <= max_width:
+            return text
+        # Longest prefix that still fits with the ellipsis
+        lo = 0
+        hi = len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if measure(text[:mid] + ELLIPSIS, scale) <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo] + ELLIPSIS if lo else ELLIPSIS
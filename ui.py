@@ -1,19 +1,42 @@
 from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY_2, PEN_P4  # type: ignore
+import gc
+import random
 import time
 from machine import Pin
-from screen.home import UIHomeScreen
-from screen.settings import UISettingsScreen
-from screen.network import UINetworkScreen
-from screen.select import UISelectScreen
-from screen.files import UIFilesScreen
-from screen.pong import UIPongScreen
+from events import UIEventQueue, BTN_A, BTN_B, BTN_X, BTN_Y, BUTTON_COUNT
+from scheduler import UIScheduler
+from registry import UIScreenRegistry
+from profiler import UIProfiler
+from textcache import UITextCache
+from snapshot import UISnapshotCache
+from inputtrace import UITrace, TRACE_FILE
+from metrics import UIMetrics, FRAME_US_BOUNDS
 from config import DISPLAY_BACKLIGHT, DEBOUNCE_DELAY
+try:
+    from config import DISPLAY_PARTIAL_UPDATE
+except ImportError:
+    # Only enable on firmware whose driver implements partial_update()
+    DISPLAY_PARTIAL_UPDATE = False
+try:
+    from config import LIST_SMOOTH_SCROLL
+except ImportError:
+    LIST_SMOOTH_SCROLL = False
+try:
+    from config import SNAPSHOT_CACHE_BYTES
+except ImportError:
+    # Off unless there is heap to spare for frames of left screens
+    SNAPSHOT_CACHE_BYTES = 0
+try:
+    from config import TRACE_INPUT
+except ImportError:
+    TRACE_INPUT = False
 
 # Display
 
 display = PicoGraphics(display=DISPLAY_PICO_DISPLAY_2, pen_type=PEN_P4, rotate=0)
 display.set_backlight(DISPLAY_BACKLIGHT)
-display.set_font("bitmap6")
+# Set through the text cache by UI, which drops its widths with the font
+DISPLAY_FONT = 'bitmap6'
 
 # Colors
 
@@ -70,20 +93,65 @@ palette = Palette(palette_colors)
 class UI:
     """Main UI controller managing screens and button handlers."""
     
-    def __init__(self, display, palette):
+    def __init__(self, display, palette, partial_update=False, wifi=None, network=None, weather=None):
         self.display = display
         self.width, self.height = display.get_bounds()
         self.palette = palette
+        # Measured widths and fitted strings, font changes go through it
+        # so they are dropped
+        self.text_cache = UITextCache(display)
+        self.text_cache.set_font(DISPLAY_FONT)
+        # Push only dirty regions of damage-tracking screens
+        self.partial_update = partial_update
+        # Ease list viewports between rows instead of jumping
+        self.smooth_scroll = LIST_SMOOTH_SCROLL
         self.clock_type = 0
-        # Dictionary to store screens by name
-        self.screens = {}
+        # wifi.WiFiManager, netstatus.NetworkStatusService and
+        # weather.WeatherService, if any
+        self.wifi = wifi
+        self.network = network
+        self.weather = weather
+        # Filled by the button IRQs, drained by update()
+        self.events = UIEventQueue(int(DEBOUNCE_DELAY * 1000))
+        # Presses since boot for host/replay.py, None unless tracing
+        self.trace = None
+        if TRACE_INPUT:
+            self.start_trace()
+        # Pins by button id once init_ui_buttons() ran, to poll held buttons
+        self.button_pins = [None] * BUTTON_COUNT
+        self.button_handlers = (self.btn_a_handler, self.btn_b_handler, self.btn_x_handler, self.btn_y_handler)
+        self.scheduler = UIScheduler(self)
+        # Per-frame timings, optionally drawn over the active screen
+        self.profiler = UIProfiler(self)
+        # Health values for a metrics.UIMetricsExporter, ids by metric
+        self.metrics = UIMetrics()
+        self.frame_metric = self.metrics.histogram('ui.frame_us', FRAME_US_BOUNDS)
+        # One counter per button, in button id order
+        self.button_metric = self.metrics.counter('ui.button.a')
+        for name in ('b', 'x', 'y'):
+            self.metrics.counter('ui.button.' + name)
+        self.heap_metric = self.metrics.gauge('mem.free')
+        self.dropped_metric = self.metrics.gauge('ui.events_dropped')
+        self.rssi_metric = self.metrics.gauge('wifi.rssi')
+        self.screen_metric = self.metrics.state('ui.screen')
+        self.metrics.sampler(self.sample_metrics)
+        # mirror.UIMirrorServer streaming the panel to a viewer, if any
+        self.mirror = None
+        # Frames of recently left screens, restored if they are unchanged
+        self.snapshots = UISnapshotCache(self, SNAPSHOT_CACHE_BYTES)
+        # Screens by name, imported and built on first use
+        self.screens = UIScreenRegistry(self)
         # List to maintain screen order
-        self.screen_order = []
-        self._add_screen(UIHomeScreen('HOME', self))
-        self._add_screen(UIFilesScreen('FILES', self))
-        self._add_screen(UISettingsScreen('SETTINGS', self, [
+        self.screen_order = self.screens.order
+        self._add_screen('HOME', 'screen.home', 'UIHomeScreen', pinned=True)
+        self._add_screen('FILES', 'screen.files', 'UIFilesScreen')
+        self._add_screen('VIEWER', 'screen.viewer', 'UIViewerScreen')
+        self._add_screen('SETTINGS', 'screen.settings', 'UISettingsScreen', lambda: ([
             ('Clock', 0),
             ('Colors', 1),
+            ('Profiler', 6),
+            ('Profile dump', 7),
+            ('Save trace', 8),
             ('Test #2', 2),
             ('Test #3', 3),
             ('Test #4', 4),
@@ -102,21 +170,19 @@ class UI:
             ('Test #17', 4),
             ('Test #18', 5)
         ], self.on_setting_select))
-        self._add_screen(UINetworkScreen('NETWORK', self))
-        self._add_screen(UISelectScreen('CLOCK', self, [('Digital', 0), ('Analog', 1)], self.clock_type, self.on_clock_select))
-        self._add_screen(UISelectScreen('COLORS', self, [(color[0], idx) for idx, color in enumerate(self.palette.colors)], self.palette.primary, self.on_color_select))
-        self._add_screen(UIPongScreen('PONG', self))
+        self._add_screen('NETWORK', 'screen.network', 'UINetworkScreen')
+        self._add_screen('CLOCK', 'screen.select', 'UISelectScreen', lambda: ([('Digital', 0), ('Analog', 1)], self.clock_type, self.on_clock_select))
+        self._add_screen('COLORS', 'screen.select', 'UISelectScreen', lambda: ([(color[0], idx) for idx, color in enumerate(self.palette.colors)], self.palette.primary, self.on_color_select))
+        self._add_screen('PONG', 'screen.pong', 'UIPongScreen')
         self.active_screen = self.screen_order[0]
-        self.screens[self.active_screen].init()
+        self.get_active_screen().init()
 
-    def _add_screen(self, screen):
-        """Add a screen to the UI by name."""
-        screen_name = screen.name
-        self.screens[screen_name] = screen
-        self.screen_order.append(screen_name)
+    def _add_screen(self, name, module, class_name, args=None, pinned=False):
+        """Register a screen by name, it is built on its first activation."""
+        self.screens.register(name, module, class_name, args, pinned)
 
     def get_active_screen(self):
-        return self.screens[self.active_screen]
+        return self.screens.get(self.active_screen)
 
     def set_active_screen(self, screen_name):
         """Switch to a screen by name or index.
@@ -132,15 +198,79 @@ class UI:
             raise ValueError(f"Screen '{screen_name}' not found")
         
         active_screen = self.get_active_screen()
+        self.scheduler.stop_screen()
+        self.snapshots.save(active_screen)
         active_screen.deinit()
         self.active_screen = screen_name
         active_screen = self.get_active_screen()
-        active_screen.init()
+        active_screen.needs_render = False
+        if active_screen.frame:
+            # The panel still shows the previous screen
+            active_screen.frame.forget()
+        start = time.ticks_us()
+        if self.snapshots.restore(active_screen):
+            active_screen.restore()
+            self.display.update()
+            if self.mirror:
+                self.mirror.pushed(((0, 0, self.width, self.height),))
+        else:
+            active_screen.init()
+        self.profiler.add_render(time.ticks_diff(time.ticks_us(), start))
+        self.scheduler.start_screen(active_screen)
 
     # UPDATE
     
     def update(self):
-        self.get_active_screen().update()
+        """Run one frame: handle queued input, step the screen, render once."""
+        profiler = self.profiler
+        profiler.begin()
+        event = self.events.pop()
+        while event is not None:
+            if self.trace is not None:
+                self.trace.record(event[0], event[1])
+            self.metrics.inc(self.button_metric + event[0])
+            self.button_handlers[event[0]]()
+            event = self.events.pop()
+        screen = self.get_active_screen()
+        # Animated screens draw from update(), both count as rendering
+        start = time.ticks_us()
+        screen.update()
+        # Any number of presses since the last frame cost one render
+        if screen.needs_render:
+            screen.needs_render = False
+            screen.render()
+        profiler.add_render(time.ticks_diff(time.ticks_us(), start))
+        self.metrics.observe(self.frame_metric, profiler.end(self.active_screen))
+
+    def sample_metrics(self, metrics):
+        """Fill in the gauges read rather than tracked, before an export."""
+        metrics.set(self.heap_metric, gc.mem_free())
+        metrics.set(self.dropped_metric, self.events.dropped)
+        metrics.set_state(self.screen_metric, self.active_screen)
+        # What the network screen shows, as a number
+        if self.network and self.network.rssi is not None:
+            metrics.set(self.rssi_metric, self.network.rssi)
+        else:
+            metrics.unset(self.rssi_metric)
+
+    def start_trace(self):
+        """Record presses from now on, and reseed random with a seed kept
+        in the trace so Pong serves the same balls on replay."""
+        seed = random.getrandbits(32)
+        random.seed(seed)
+        self.trace = UITrace(seed)
+
+    def save_trace(self, path=TRACE_FILE):
+        if self.trace is None:
+            print('Input tracing is off, set TRACE_INPUT in config.py')
+            return
+        self.trace.save(path)
+        print(f'{self.trace.count} presses saved to {path}')
+
+    def is_held(self, button):
+        """Whether button is down right now. Pins pull up, pressed reads 0."""
+        pin = self.button_pins[button]
+        return pin is not None and pin.value() == 0
 
     # BUTTON ACTIONS
     
@@ -163,6 +293,14 @@ class UI:
             self.set_active_screen('CLOCK')
         elif value == 1:
             self.set_active_screen('COLORS')
+        elif value == 6:
+            self.profiler.toggle_overlay()
+            # Flush now to draw it, or to draw what it covered
+            self.get_active_screen().request_render()
+        elif value == 7:
+            self.profiler.dump()
+        elif value == 8:
+            self.save_trace()
 
     def on_clock_select(self, value):
         self.clock_type = value
@@ -171,32 +309,28 @@ class UI:
         self.palette.primary = value
         self.palette.secondary = 1 if value == 0 else 0
 
-def init_ui() -> UI:
-    ui = UI(display, palette)
+def init_ui(wifi=None, network=None, weather=None) -> UI:
+    ui = UI(display, palette, DISPLAY_PARTIAL_UPDATE, wifi, network, weather)
     return ui
         
 # Button setup
 
-def create_button_handler(pin_number, handler_func):
+def create_button_handler(pin_number, button, events):
+    """Attach an IRQ that only queues a timestamped press of button.
+
+    The screen handler runs later from UI.update(), outside the interrupt.
+    """
     btn = Pin(pin_number, Pin.IN, Pin.PULL_UP)
     
     def handler(pin):
-        btn.irq(handler=None)
-        handler_func()
-        time.sleep(DEBOUNCE_DELAY)
-        btn.irq(handler=handler)
+        events.push(button, time.ticks_ms())
     
     btn.irq(handler, Pin.IRQ_FALLING)
     return btn
 
 def init_ui_buttons(ui_instance: UI):
-    create_button_handler(12, ui_instance.btn_a_handler)
-    create_button_handler(13, ui_instance.btn_b_handler)
-    create_button_handler(14, ui_instance.btn_x_handler)
-    create_button_handler(15, ui_instance.btn_y_handler)
-
-# Initialize button interrupts
-# btnA = create_button_handler(12, myUI.btn_a_handler)
-# btnB = create_button_handler(13, myUI.btn_b_handler)
-# btnX = create_button_handler(14, myUI.btn_x_handler)
-# btnY = create_button_handler(15, myUI.btn_y_handler)
\ No newline at end of file
+    pins = ui_instance.button_pins
+    pins[BTN_A] = create_button_handler(12, BTN_A, ui_instance.events)
+    pins[BTN_B] = create_button_handler(13, BTN_B, ui_instance.events)
+    pins[BTN_X] = create_button_handler(14, BTN_X, ui_instance.events)
+    pins[BTN_Y] = create_button_handler(15, BTN_Y, ui_instance.events)
\ No newline at end of file
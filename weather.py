@@ -0,0 +1,191 @@
+"""
+Weather data fetcher for the Open-Meteo API.
+
+Requests run as asyncio tasks so the UI loop never waits on the network,
+and the response is parsed as it streams in, keeping only the current
+conditions. The last result is cached in flash with the time it was
+fetched, so after a reboot the home screen shows it straight away and
+no request is made until it is older than TTL_S.
+"""
+import asyncio
+import json
+import socket
+import time
+from collections import namedtuple
+from config import WEATHER_LAT, WEATHER_LNG
+from libs.jsonstream.lib_jsonstream import JSONFieldReader
+
+API_HOST = 'api.open-meteo.com'
+API_PORT = 80
+CACHE_FILE = 'weather.json'
+# Cached data younger than this is shown without a request
+TTL_S = 30 * 60
+# Wait after a failed request before trying again
+RETRY_S = 60
+FETCH_TIMEOUT_S = 10
+# Bytes read from the socket per parser feed
+CHUNK_SIZE = 128
+# How often the UI loop should call poll()
+POLL_MS = 1000
+
+Weather = namedtuple('Weather', ('temperature', 'code', 'wind', 'time', 'fetched'))
+
+FIELDS = (
+    ('current', 'temperature_2m'),
+    ('current', 'weather_code'),
+    ('current', 'wind_speed_10m'),
+    ('current', 'time'),
+)
+# Types each of the FIELDS must have, a response with another is an error
+FIELD_TYPES = ((int, float), (int, float), (int, float), str)
+
+
+def weather_label(code):
+    """Short description of a WMO weather code."""
+    if code == 0:
+        return 'Clear'
+    if code <= 2:
+        return 'Cloudy'
+    if code == 3:
+        return 'Overcast'
+    if code <= 48:
+        return 'Fog'
+    if code <= 57:
+        return 'Drizzle'
+    if code <= 67:
+        return 'Rain'
+    if code <= 77:
+        return 'Snow'
+    if code <= 82:
+        return 'Showers'
+    if code <= 86:
+        return 'Snow'
+    return 'Storm'
+
+
+def check_fields(values):
+    """Raise ValueError unless values are the FIELDS, each of its type.
+    JSON null arrives as None and true or false as a bool."""
+    for value, types in zip(values, FIELD_TYPES):
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise ValueError(f'bad field {value!r}')
+
+
+class WeatherService:
+    """Fetches the current weather in the background and caches it."""
+
+    def __init__(self, wifi=None, host=API_HOST, port=API_PORT, cache_file=CACHE_FILE,
+                 lat=WEATHER_LAT, lng=WEATHER_LNG):
+        self.wifi = wifi
+        self.host = host
+        self.port = port
+        # IP address of host, resolved on the first request
+        self.address = None
+        self.cache_file = cache_file
+        self.path = (f'/v1/forecast?latitude={lat}&longitude={lng}'
+                     '&current=temperature_2m,weather_code,wind_speed_10m')
+        self.snapshot = None
+        self.subscribers = []
+        self.fetching = False
+        self.error = None
+        # time.time() at which the next request is due
+        self.next_fetch = 0
+        self.load()
+
+    def subscribe(self, callback):
+        """callback(snapshot) is called after new data arrived."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def age(self):
+        """Seconds since the data was fetched, None when unknown. Before
+        the RTC is set after a reboot the clock can be behind the cache."""
+        if self.snapshot is None:
+            return None
+        age = int(time.time()) - self.snapshot.fetched
+        return age if age >= 0 else None
+
+    def load(self):
+        """Show the cached result, and skip the first request while it is fresh."""
+        try:
+            with open(self.cache_file) as f:
+                snapshot = Weather(*json.load(f))
+            check_fields(snapshot)
+        except (OSError, ValueError, TypeError):
+            return
+        self.snapshot = snapshot
+        age = self.age()
+        if age is not None and age < TTL_S:
+            self.next_fetch = self.snapshot.fetched + TTL_S
+
+    def save(self):
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump(list(self.snapshot), f)
+        except OSError as e:
+            print(f'Weather cache not saved: {e}')
+
+    def poll(self):
+        """Start a request when one is due. Never blocks."""
+        if self.fetching or int(time.time()) < self.next_fetch:
+            return
+        if self.wifi and not self.wifi.is_connected():
+            return
+        self.fetching = True
+        asyncio.create_task(self.fetch())
+
+    async def fetch(self):
+        try:
+            fields = await asyncio.wait_for(self._request(), FETCH_TIMEOUT_S)
+            values = [fields.get(field) for field in FIELDS]
+            # A missing or null field would break every home screen render
+            check_fields(values)
+            self.snapshot = Weather(*values, int(time.time()))
+            self.error = None
+            self.next_fetch = self.snapshot.fetched + TTL_S
+        except Exception as e:
+            self.error = f'Weather: {e}'
+            self.next_fetch = int(time.time()) + RETRY_S
+            print(self.error)
+            return
+        finally:
+            self.fetching = False
+        self.save()
+        for callback in self.subscribers:
+            callback(self.snapshot)
+
+    async def _request(self):
+        """GET the forecast and return the fields parsed from the body."""
+        if self.address is None:
+            # getaddrinfo() blocks the UI loop on MicroPython, resolve
+            # once and connect to the IP address from then on
+            self.address = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)[0][-1][0]
+        try:
+            reader, writer = await asyncio.open_connection(self.address, self.port)
+        except OSError:
+            # Look the host up again next time, in case it moved
+            self.address = None
+            raise
+        try:
+            # HTTP/1.0 so the body is never chunked
+            writer.write(f'GET {self.path} HTTP/1.0\r\nHost: {self.host}\r\n\r\n'.encode())
+            await writer.drain()
+            status = await reader.readline()
+            if b' 200 ' not in status:
+                raise OSError(f'HTTP {str(status, "ascii").split(" ", 1)[-1].strip()}')
+            while (await reader.readline()) not in (b'\r\n', b''):
+                pass
+            parser = JSONFieldReader(FIELDS)
+            while True:
+                chunk = await reader.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            return parser.values
+        finally:
+            writer.close()
+            await writer.wait_closed()
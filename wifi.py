@@ -1,27 +1,106 @@
 """
 WiFi connection handler for Pico.
+
+The connection runs as a small state machine polled from the UI loop, so
+nothing ever waits on the radio: association is given a timeout, and a
+failed attempt is retried after an exponentially growing backoff.
 """
-from time import sleep
+import time
 import network
 from config import WIFI_SSID, WIFI_PASSWORD
+try:
+    from config import WIFI_POLL_MS
+except ImportError:
+    # Often enough to notice an association within a frame or two
+    WIFI_POLL_MS = 250
+
+STATE_IDLE = 'idle'
+STATE_CONNECTING = 'connecting'
+STATE_CONNECTED = 'connected'
+STATE_FAILED = 'failed'
+STATE_BACKOFF = 'backoff'
+
+# Give up on an association attempt after this long
+CONNECT_TIMEOUT_MS = 15000
+# Retry delay doubles from BACKOFF_MIN_MS up to BACKOFF_MAX_MS
+BACKOFF_MIN_MS = 2000
+BACKOFF_MAX_MS = 60000
+
+
+class WiFiManager:
+    """Non-blocking station connection with timeout and reconnect backoff."""
+
+    def __init__(self, ssid=WIFI_SSID, password=WIFI_PASSWORD, poll_ms=WIFI_POLL_MS):
+        self.ssid = ssid
+        self.password = password
+        # How often the UI loop should call poll()
+        self.poll_ms = poll_ms
+        self.wlan = network.WLAN(network.STA_IF)
+        self.state = STATE_IDLE
+        self.since = time.ticks_ms()
+        self.attempts = 0
+        self.backoff_ms = 0
+        self.ip = None
+
+    def start(self):
+        """Begin connecting; poll() drives the rest."""
+        self.wlan.active(True)
+        self._connect()
+
+    def stop(self):
+        self.wlan.disconnect()
+        self._set_state(STATE_IDLE)
+
+    def _set_state(self, state):
+        self.state = state
+        self.since = time.ticks_ms()
+
+    def _connect(self):
+        self.attempts += 1
+        self.wlan.connect(self.ssid, self.password)
+        self._set_state(STATE_CONNECTING)
+
+    def elapsed_ms(self):
+        """Time spent in the current state."""
+        return time.ticks_diff(time.ticks_ms(), self.since)
+
+    def poll(self):
+        """Advance the state machine by at most one step. Never blocks."""
+        state = self.state
+        if state == STATE_CONNECTING:
+            if self.wlan.isconnected():
+                self.ip = self.wlan.ifconfig()[0]
+                self.attempts = 0
+                self.backoff_ms = 0
+                self._set_state(STATE_CONNECTED)
+                print(f'Connected! IP: {self.ip}')
+            elif self.wlan.status() < 0 or self.elapsed_ms() > CONNECT_TIMEOUT_MS:
+                self._set_state(STATE_FAILED)
+        elif state == STATE_FAILED:
+            self.wlan.disconnect()
+            self.backoff_ms = min(BACKOFF_MAX_MS, BACKOFF_MIN_MS << min(self.attempts - 1, 10))
+            self._set_state(STATE_BACKOFF)
+        elif state == STATE_BACKOFF:
+            if self.elapsed_ms() >= self.backoff_ms:
+                self._connect()
+        elif state == STATE_CONNECTED:
+            if not self.wlan.isconnected():
+                # Link lost, start over without waiting
+                self.ip = None
+                self._connect()
 
+    def is_connected(self):
+        return self.state == STATE_CONNECTED
 
-def connect():
-    """
-    Connect to WiFi network using credentials from config.
-    
-    Returns:
-        wlan: Connected WLAN interface object
-    """
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.connect(WIFI_SSID, WIFI_PASSWORD)
-    
-    while not wlan.isconnected():
-        print('Waiting for connection...')
-        sleep(1)
-
-    ip = wlan.ifconfig()[0]
-    print(f'Connected! IP: {ip}')
-    
-    return wlan
+    def status_text(self):
+        """Short human readable status for labels."""
+        state = self.state
+        if state == STATE_CONNECTED:
+            return self.ip
+        if state == STATE_CONNECTING:
+            return f'wifi {self.elapsed_ms() // 1000}s'
+        if state == STATE_BACKOFF:
+            return f'retry {max(0, self.backoff_ms - self.elapsed_ms()) // 1000}s'
+        if state == STATE_FAILED:
+            return 'wifi failed'
+        return 'no wifi'